@@ -0,0 +1,298 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# bench.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import argparse
+import json
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple, Optional
+from colors import bold_text, color_text
+from models.model import Term, Variable, Abstraction, Application, church_numeral, count_nodes
+from models.exceptions import FixedPointDetected, ReductionBudgetExceeded
+from models.reduction import normalize, choose_strategy, STRATEGIES
+from parser import parse_lambda, substitute_free_vars, TEST_LITERALS
+from utils.trace import ReductionTrace
+
+# Steps each workload may take unless --budget says otherwise
+DEFAULT_BENCH_BUDGET = 20000
+# Relative slowdown, or memory growth, reported as a regression
+DEFAULT_TOLERANCE = 0.10
+# Timings below this many seconds are too noisy to compare
+MIN_COMPARABLE_SECONDS = 0.005
+
+# MARK: Definitions
+# Combinators the workloads are written in, each closed over the earlier ones
+PRELUDE = [
+    ('I', r"\x. x"),
+    ('K', r"\x. \y. x"),
+    ('S', r"\x. \y. \z. x (z) (y (z))"),
+    ('Y', r"\f. (\x. f (x (x))) (\x. f (x (x)))"),
+    ('TRUE', r"\t. \f. t"),
+    ('FALSE', r"\t. \f. f"),
+    ('succ', r"\n. \f. \x. f (n (f) (x))"),
+    ('add', r"\m. \n. \f. \x. m (f) (n (f) (x))"),
+    ('mult', r"\m. \n. \f. m (n (f))"),
+    ('exp', r"\m. \n. n (m)"),
+    ('pred', r"\n. \f. \x. n (\g. \h. h (g (f))) (\u. x) (\u. u)"),
+    ('sub', r"\m. \n. n (pred) (m)"),
+    ('iszero', r"\n. n (\x. FALSE) (TRUE)"),
+    ('leq', r"\m. \n. iszero (sub (m) (n))"),
+    ('fact', r"Y (\r. \n. iszero (n) (\f. \x. f (x)) (mult (n) (r (pred (n)))))"),
+    ('fib', r"Y (\r. \n. leq (n) (\f. \x. f (x)) (n) (add (r (pred (n))) (r (pred (pred (n))))))"),
+    ('ack', r"\m. m (\g. \n. n (g) (g (\f. \x. f (x)))) (succ)"),
+    # Scott-encoded lists: nil and cons h t select the first or second handler
+    ('nil', r"\n. \c. n"),
+    ('cons', r"\h. \t. \n. \c. c (h) (t)"),
+    ('insert', r"Y (\r. \x. \l. l (cons (x) (nil)) (\h. \t. leq (x) (h) (cons (x) (l)) (cons (h) (r (x) (t)))))"),
+    ('sort', r"Y (\r. \l. l (nil) (\h. \t. insert (h) (r (t))))"),
+]
+
+def definitions() -> list[tuple[str, Term]]:
+    """PRELUDE parsed, with Church numerals C0 to C9 added"""
+    defined = [(f"C{n}", church_numeral(n)) for n in range(10)]
+    for name, literal in PRELUDE:
+        defined.append((name, substitute_free_vars(parse_lambda(literal), defined)))
+    return defined
+
+def scott_list(items: list[str]) -> str:
+    literal = "nil"
+    for item in reversed(items):
+        literal = f"cons ({item}) ({literal})"
+    return literal
+
+# MARK: Workloads
+class Workload(NamedTuple):
+    name: str
+    term: Term
+    budget: Optional[int] = None    # Overrides the run's budget when set
+
+def nested_identity(depth: int) -> Term:
+    """I (I (... (I y))), an argument spine `depth` applications deep"""
+    term: Term = Variable('y')
+    for _ in range(depth):
+        term = Application(Abstraction(Variable('x'), Variable('x')), term)
+    return term
+
+def left_spine(width: int) -> Term:
+    """(\\x. x) f a a ... a, a function spine `width` applications long"""
+    term: Term = Application(Abstraction(Variable('x'), Variable('x')), Variable('f'))
+    for _ in range(width):
+        term = Application(term, Variable('a'))
+    return term
+
+def workloads() -> list[Workload]:
+    defined = definitions()
+    def term(literal: str) -> Term:
+        return substitute_free_vars(parse_lambda(literal), defined)
+
+    suite = [
+        Workload('church/add', term("add (C3) (C4)")),
+        Workload('church/mult', term("mult (C3) (C4)")),
+        Workload('church/exp', term("exp (C2) (C3)")),
+        Workload('church/pred', term("pred (C5)")),
+        Workload('y/factorial', term("fact (C3)")),
+        Workload('y/fibonacci', term("fib (C4)")),
+        Workload('ackermann', term("ack (C2) (C2)")),
+        Workload('scott/sort', term(f"sort ({scott_list(['C2', 'C0', 'C1'])})")),
+        Workload('spine/nested', nested_identity(200)),
+        Workload('spine/left', left_spine(200)),
+    ]
+    # Parser samples, divergent ones included, each under a small budget
+    suite += [
+        Workload(f"parser/{number:02d}", term(literal), budget=200)
+        for number, literal in enumerate(TEST_LITERALS, 1)
+    ]
+    return suite
+
+# MARK: Engines
+def traced_step(strategy: str = 'normal') -> Callable[[Term], Term]:
+    """Steps through ReductionTrace, recording deltas as the REPL does"""
+    trace = ReductionTrace()
+    counter = [0]
+    def step(term: Term) -> Term:
+        counter[0] += 1
+        return trace.reduce(counter[0], term, base_index=counter[0] - 1, strategy=strategy)
+    return step
+
+# (engine, strategy) -> factory for a fresh one-step reducer
+ENGINES: dict[tuple[str, str], Callable[[], Callable[[Term], Term]]] = {
+    ('term', 'normal'): lambda: STRATEGIES['normal'],
+    ('term', 'applicative'): lambda: STRATEGIES['applicative'],
+    ('trace', 'normal'): traced_step,
+    ('trace', 'applicative'): lambda: traced_step('applicative'),
+}
+# Picks a term engine strategy per workload with `choose_strategy`, as MAP
+# and non-interactive RED do; the type inference is part of the timing
+AUTO_ENGINE = ('term', 'auto')
+
+# MARK: Measurement
+def reduce_once(term: Term, step: Optional[Callable[[Term], Term]], budget: int) -> dict:
+    """Normalize `term` once, returning its status, steps and result size
+
+    A `step` of None picks the strategy with `choose_strategy`.
+    """
+    taken = [0]
+    def on_step(_, steps):
+        taken[0] = steps
+    result = None
+    terminates = False
+    try:
+        if step is None:
+            strategy, terminates = choose_strategy(term)
+            step = STRATEGIES[strategy]
+        result, _ = normalize(term, budget, step=step, on_step=on_step, terminates=terminates)
+        status = 'normal_form'
+    except FixedPointDetected as e:
+        status, result = 'fixed_point', e.term
+    except ReductionBudgetExceeded as e:
+        status, result = 'budget_exceeded', e.term
+    except RecursionError:
+        status = 'recursion_limit'
+    return {
+        'status': status,
+        'steps': taken[0],
+        'nodes': count_nodes([result]) if result is not None else None,
+    }
+
+def measure(workload: Workload, engine: str, strategy: str, budget: int, repeat: int = 1) -> dict:
+    """Best wall time of `repeat` runs, then one traced run for peak memory"""
+    budget = workload.budget or budget
+    factory = ENGINES.get((engine, strategy), lambda: None)
+    best = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        outcome = reduce_once(workload.term, factory(), budget)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Memory is traced separately: tracemalloc slows the run it watches
+    tracemalloc.start()
+    try:
+        reduce_once(workload.term, factory(), budget)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'workload': workload.name,
+        'engine': engine,
+        'strategy': strategy,
+        **outcome,
+        'seconds': best,
+        'steps_per_second': outcome['steps'] / best if best else 0.0,
+        'peak_bytes': peak,
+    }
+
+def run_suite(
+    pattern: Optional[str] = None,
+    engines: Optional[list[str]] = None,
+    budget: int = DEFAULT_BENCH_BUDGET,
+    repeat: int = 1,
+    on_result: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """Run every workload matching `pattern` on every selected engine
+
+    Returns:
+        dict: `created`, `python`, `platform`, `budget` and the `results` list
+    """
+    results = []
+    for workload in workloads():
+        if pattern and not re.search(pattern, workload.name):
+            continue
+        for engine, strategy in [*ENGINES, AUTO_ENGINE]:
+            if engines and engine not in engines and f"{engine}/{strategy}" not in engines:
+                continue
+            result = measure(workload, engine, strategy, budget, repeat)
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'budget': budget,
+        'results': results,
+    }
+
+# MARK: Comparison
+def compare(baseline: dict, current: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """Describe every regression of `current` against `baseline`
+
+    A result regresses when its status or step count changes, when it runs
+    more than `tolerance` slower (ignoring runs under MIN_COMPARABLE_SECONDS),
+    or when its peak memory grows by more than `tolerance`.
+    """
+    def key(result):
+        return (result['workload'], result['engine'], result['strategy'])
+    previous = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        name = '/'.join(key(result))
+        before = previous.get(key(result))
+        if before is None:
+            continue
+        if result['status'] != before['status'] or result['steps'] != before['steps']:
+            regressions.append(
+                f"{name}: {before['status']} in {before['steps']} steps became "
+                f"{result['status']} in {result['steps']} steps"
+            )
+        if before['seconds'] >= MIN_COMPARABLE_SECONDS and result['seconds'] > before['seconds'] * (1 + tolerance):
+            regressions.append(
+                f"{name}: {before['seconds'] * 1000:.1f} ms became {result['seconds'] * 1000:.1f} ms "
+                f"({result['seconds'] / before['seconds'] - 1:+.0%})"
+            )
+        if before['peak_bytes'] and result['peak_bytes'] > before['peak_bytes'] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak memory {before['peak_bytes'] // 1024} KiB became {result['peak_bytes'] // 1024} KiB"
+            )
+    return regressions
+
+# MARK: Command Line
+def format_result(result: dict) -> str:
+    return (
+        f"{result['workload']:<16} {result['engine'] + '/' + result['strategy']:<18} "
+        f"{result['status']:<16} {result['steps']:>7} {result['steps_per_second']:>11.0f} "
+        f"{result['peak_bytes'] / 1024:>10.1f} {result['seconds'] * 1000:>10.2f}"
+    )
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark PyLambda reduction engines on standard workloads")
+    parser.add_argument('pattern', nargs='?', help="Only run workloads whose name matches this regex")
+    parser.add_argument('--engine', action='append', help="Engine or engine/strategy to run, repeatable, e.g. term/normal")
+    parser.add_argument('--budget', type=int, default=DEFAULT_BENCH_BUDGET, help="Steps a workload may take")
+    parser.add_argument('--repeat', type=int, default=1, help="Timed runs per workload; the best is kept")
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    parser.add_argument('--compare', metavar='BASELINE', help="Flag regressions against an earlier --output file")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown")
+    options = parser.parse_args(argv)
+
+    print(bold_text(f"{'workload':<16} {'engine':<18} {'status':<16} {'steps':>7} {'steps/s':>11} {'peak KiB':>10} {'ms':>10}"))
+    report = run_suite(
+        options.pattern, options.engine, options.budget, options.repeat,
+        on_result=lambda result: print(format_result(result), flush=True)
+    )
+
+    if options.output:
+        with open(options.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if options.compare:
+        with open(options.compare) as file:
+            regressions = compare(json.load(file), report, options.tolerance)
+        for regression in regressions:
+            print(color_text(f"[REGRESSION] {regression}", "#D60025"))
+        if regressions:
+            return 1
+        print(color_text("No regressions", "#3FF1B0"))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
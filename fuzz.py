@@ -0,0 +1,194 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# fuzz.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import argparse
+import random
+import sys
+from typing import Callable, Iterator, NamedTuple, Optional
+from colors import bold_text, color_text
+from models.model import Term, Variable, Abstraction, Application, Path, alpha_equivalent
+from models.exceptions import FixedPointDetected, ReductionBudgetExceeded
+from models.reduction import normalize
+from bench import ENGINES
+
+# Steps each engine may take on one term
+DEFAULT_FUZZ_BUDGET = 500
+# Few, clashing names so shadowing and capture come up often; x' is how a
+# renamed x is shown, to provoke clashes with display names
+DEFAULT_NAMES = ('x', 'y', 'z', "x'")
+
+IDENTITY = Abstraction(Variable('x'), Variable('x'))
+
+# MARK: Generation
+def random_closed_term(rng: random.Random, size: int, names: tuple[str, ...] = DEFAULT_NAMES) -> Term:
+    """A random closed term of about `size` nodes
+
+    Variables are drawn only from enclosing binders, and binder names are
+    drawn from the small pool `names`, so inner binders often shadow outer
+    ones and arguments often carry names a body also binds.
+    """
+    def generate(size: int, scope: list[str]) -> Term:
+        if scope and (size <= 1 or (size == 2 and rng.random() < 0.5)):
+            return Variable(rng.choice(scope))
+        if not scope or size == 2 or rng.random() < 0.35:
+            name = rng.choice(names)
+            return Abstraction(Variable(name), generate(size - 1, scope + [name]))
+        left = rng.randint(1, size - 2)
+        return Application(generate(left, scope), generate(size - 1 - left, scope))
+    return generate(max(2, size), [])
+
+# MARK: Checking
+class Outcome(NamedTuple):
+    status: str                 # normal_form, fixed_point, budget_exceeded or error
+    term: Optional[Term]        # The last term reached
+    steps: int
+    error: Optional[str] = None
+
+def run_engine(term: Term, step: Callable[[Term], Term], budget: int) -> Outcome:
+    taken = [0]
+    def on_step(_, steps):
+        taken[0] = steps
+    try:
+        result, steps = normalize(term, budget, step=step, on_step=on_step)
+        return Outcome('normal_form', result, steps)
+    except FixedPointDetected as e:
+        return Outcome('fixed_point', e.term, taken[0])
+    except ReductionBudgetExceeded as e:
+        return Outcome('budget_exceeded', e.term, e.steps)
+    except Exception as e:
+        return Outcome('error', None, taken[0], f"{e.__class__.__name__}: {e}")
+
+def reference_step(term: Term) -> Term:
+    """The semantics every engine is checked against"""
+    return term.beta_reduce_step()
+
+def differences(term: Term, engines: list[tuple[str, str]], budget: int = DEFAULT_FUZZ_BUDGET) -> list[str]:
+    """How each engine disagrees with `reference_step` on `term`
+
+    Every engine must agree on the normal form up to alpha-equivalence
+    whenever both runs reach one. Normal-order engines must also take the
+    same number of steps and end the same way; other strategies may
+    legitimately run out of budget where normal order terminates.
+    Crashes are always reported.
+
+    Returns:
+        list[str]: One description per disagreeing engine; empty if all agree
+    """
+    expected = run_engine(term, reference_step, budget)
+    if expected.status == 'error':
+        return [f"reference: {expected.error}"]
+    found = []
+    for engine, strategy in engines:
+        name = f"{engine}/{strategy}"
+        outcome = run_engine(term, ENGINES[(engine, strategy)](), budget)
+        if outcome.status == 'error':
+            found.append(f"{name}: {outcome.error}")
+        elif expected.status == outcome.status == 'normal_form' and not alpha_equivalent(expected.term, outcome.term):
+            found.append(f"{name}: normal form {outcome.term.literal()} instead of {expected.term.literal()}")
+        elif strategy == 'normal' and (outcome.status, outcome.steps) != (expected.status, expected.steps):
+            found.append(
+                f"{name}: {outcome.status} in {outcome.steps} steps instead of "
+                f"{expected.status} in {expected.steps} steps"
+            )
+    return found
+
+# MARK: Shrinking
+def _paths(term: Term) -> Iterator[tuple[Path, Term]]:
+    stack: list[tuple[Path, Term]] = [((), term)]
+    while stack:
+        path, node = stack.pop()
+        yield path, node
+        if isinstance(node, Abstraction):
+            stack.append(((*path, 'body'), node.body))
+        elif isinstance(node, Application):
+            stack += (((*path, 'value'), node.value), ((*path, 'function'), node.function))
+
+def shrink_candidates(term: Term) -> list[Term]:
+    """Closed terms smaller than `term`, made by cutting one piece out, smallest first
+
+    A subterm may replace the whole term or its own parent application,
+    any compound subterm may become the identity, and an abstraction whose
+    variable is unused may become its body.
+    """
+    candidates = []
+    for path, node in _paths(term):
+        if path and not node.free_variables():
+            candidates.append(node)
+        if isinstance(node, (Abstraction, Application)) and node.size > 3:
+            candidates.append(term.replace_at(path, IDENTITY))
+        if isinstance(node, Application):
+            candidates.append(term.replace_at(path, node.function))
+            candidates.append(term.replace_at(path, node.value))
+        if isinstance(node, Abstraction) and not node.body.has_free(node.var.name):
+            candidates.append(term.replace_at(path, node.body))
+    size = term.size
+    closed = [c for c in candidates if not c.free_variables() and c.size < size]
+    return sorted(closed, key=lambda c: c.size)
+
+def shrink(term: Term, fails: Callable[[Term], bool]) -> Term:
+    """Greedily reduce `term` to a smaller one on which `fails` still holds"""
+    while True:
+        for candidate in shrink_candidates(term):
+            if fails(candidate):
+                term = candidate
+                break
+        else:
+            return term
+
+# MARK: Command Line
+def fuzz(
+    count: int,
+    size: int,
+    seed: int,
+    engines: list[tuple[str, str]],
+    budget: int = DEFAULT_FUZZ_BUDGET,
+    on_failure: Optional[Callable[[Term, Term, list[str]], None]] = None
+) -> int:
+    """Check `count` random terms, shrinking each failure
+
+    Returns:
+        int: Number of terms on which some engine disagreed
+    """
+    rng = random.Random(seed)
+    failures = 0
+    for _ in range(count):
+        term = random_closed_term(rng, rng.randint(2, size))
+        if not differences(term, engines, budget):
+            continue
+        failures += 1
+        minimal = shrink(term, lambda t: bool(differences(t, engines, budget)))
+        if on_failure:
+            on_failure(term, minimal, differences(minimal, engines, budget))
+    return failures
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check reduction engines against Term.beta_reduce_step on random closed terms")
+    parser.add_argument('--count', type=int, default=500, help="Terms to generate")
+    parser.add_argument('--size', type=int, default=24, help="Largest term size, in nodes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=int, default=DEFAULT_FUZZ_BUDGET, help="Steps each engine may take per term")
+    parser.add_argument('--engine', action='append', help="engine/strategy to check, repeatable; all by default")
+    options = parser.parse_args(argv)
+
+    engines = [tuple(name.split('/', 1)) for name in options.engine] if options.engine else list(ENGINES)
+    unknown = [f"{engine}/{strategy}" for engine, strategy in engines if (engine, strategy) not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engine {', '.join(unknown)}; choose from {', '.join('/'.join(key) for key in ENGINES)}")
+
+    def report(term: Term, minimal: Term, found: list[str]) -> None:
+        print(bold_text(color_text("[FAIL]", "#D60025")), term.literal())
+        print(color_text("[MINIMAL]", "#D60025"), minimal.literal())
+        for difference in found:
+            print(color_text("[DIFF]", "#D60025"), difference)
+
+    failures = fuzz(options.count, options.size, options.seed, engines, options.budget, on_failure=report)
+    summary = f"{failures} of {options.count} terms disagreed" if failures else f"All {options.count} terms agreed"
+    print(color_text(summary, "#D60025" if failures else "#3FF1B0"))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
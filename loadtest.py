@@ -0,0 +1,302 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# loadtest.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import argparse
+import asyncio
+import json
+import os
+import select
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Optional
+from colors import bold_text, LABELS, IOSYMBOL
+
+# One simulated user's session; `{user}` keeps each user's definitions apart
+DEFAULT_SCRIPT = [
+    "USE numerals",
+    r"DEF u{user}_two := \f. \x. f (f (x))",
+    r"DEF u{user}_succ := \n. \f. \x. f (n (f) (x))",
+    "?LIST u{user}_",
+    "RED u{user}_succ (u{user}_two)",
+    "RED u{user}_succ (u{user}_succ (u{user}_two))",
+]
+# Seconds to wait for a reply before counting the command as failed
+DEFAULT_TIMEOUT = 30.0
+
+LAMBDA_PROMPT = f"[{LABELS['lambda_prompt']} {IOSYMBOL['lambda_prompt']}]".encode()
+BETA_PROMPT = f"[{LABELS['beta_prompt']} {IOSYMBOL['beta_prompt']}]".encode()
+ERROR_LABEL = f"[{LABELS['error']} {IOSYMBOL['error']}]".encode()
+
+def session_lines(script: list[str], user: int, rounds: int) -> list[str]:
+    return [line.replace('{user}', str(user)) for _ in range(rounds) for line in script]
+
+# MARK: Measurement
+class Recorder:
+    """Latencies and failures collected from every simulated user"""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record(self, line: str, seconds: float, ok: bool = True) -> None:
+        keyword = line.lstrip('!.?+&').split(maxsplit=1)[0].upper() if line.strip() else ''
+        with self._lock:
+            self.latencies.setdefault(keyword, []).append(seconds)
+            if not ok:
+                self.failures += 1
+
+    def summary(self, wall: float) -> dict:
+        every = [seconds for values in self.latencies.values() for seconds in values]
+        return {
+            'requests': len(every),
+            'failures': self.failures,
+            'wall_seconds': wall,
+            'throughput': len(every) / wall if wall else 0.0,
+            'latency': percentiles(every),
+            'by_command': {keyword: percentiles(values) for keyword, values in sorted(self.latencies.items())},
+        }
+
+def percentiles(values: list[float]) -> dict:
+    """p50, p90, p99 and max of `values`, in milliseconds"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    def at(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+    return {
+        'count': len(ordered),
+        'p50': at(0.50), 'p90': at(0.90), 'p99': at(0.99),
+        'max': ordered[-1] * 1000,
+        'mean': statistics.fmean(ordered) * 1000,
+    }
+
+def process_memory(pid: int) -> Optional[dict]:
+    """Resident and peak resident memory of `pid` in KiB, where /proc exists"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(':', 1) for line in status if ':' in line)
+    except OSError:
+        return None
+    return {
+        'rss_kib': int(fields['VmRSS'].split()[0]) if 'VmRSS' in fields else None,
+        'peak_rss_kib': int(fields['VmHWM'].split()[0]) if 'VmHWM' in fields else None,
+    }
+
+def isolated_env(db_path: Optional[str]) -> tuple[dict, Optional[str]]:
+    """Environment for spawned processes, pointed at a scratch copy of `db_path`"""
+    env = dict(os.environ, COLUMNS='80')
+    if not db_path:
+        return env, None
+    scratch = tempfile.mkdtemp(prefix='pylambda-load-')
+    copy = os.path.join(scratch, os.path.basename(db_path))
+    # The backup API also picks up pages still sitting in the WAL
+    with sqlite3.connect(db_path) as source, sqlite3.connect(copy) as target:
+        source.backup(target)
+    env['DEFAULT_DB_PATH'] = copy
+    return env, scratch
+
+# MARK: Server Mode
+async def server_user(host: str, port: int, lines: list[str], recorder: Recorder, think: float, timeout: float) -> None:
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 22)
+    try:
+        for line in lines:
+            start = time.perf_counter()
+            writer.write(json.dumps({'line': line}).encode() + b'\n')
+            await writer.drain()
+            try:
+                reply = json.loads(await asyncio.wait_for(reader.readline(), timeout))
+                ok = reply.get('ok', False)
+            except (asyncio.TimeoutError, ValueError):
+                ok = False
+            recorder.record(line, time.perf_counter() - start, ok)
+            if think:
+                await asyncio.sleep(think)
+        writer.write(json.dumps({'line': 'exit'}).encode() + b'\n')
+        await writer.drain()
+    finally:
+        writer.close()
+
+async def drive_server(host: str, port: int, users: int, script: list[str], rounds: int, think: float, timeout: float) -> Recorder:
+    recorder = Recorder()
+    await asyncio.gather(*(
+        server_user(host, port, session_lines(script, user, rounds), recorder, think, timeout)
+        for user in range(users)
+    ))
+    return recorder
+
+def spawn_server(port: int, env: dict) -> subprocess.Popen:
+    """Start `server.py` and wait until it accepts connections"""
+    process = subprocess.Popen(
+        [sys.executable, 'server.py', '--host', '127.0.0.1', '--port', str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"server.py did not start listening on port {port}")
+
+# MARK: Terminal Mode
+class TerminalUser(threading.Thread):
+    """One REPL process behind a pseudo-terminal, as the web terminal runs it"""
+
+    def __init__(self, lines: list[str], recorder: Recorder, env: dict, think: float, timeout: float):
+        super().__init__(daemon=True)
+        self.lines = lines
+        self.recorder = recorder
+        self.env = env
+        self.think = think
+        self.timeout = timeout
+        self.memory: Optional[dict] = None
+
+    def read_until(self, master: int, markers: tuple[bytes, ...]) -> tuple[Optional[bytes], bytes]:
+        """Read output until one of `markers` shows up; returns it (None on timeout) and the output"""
+        output = b''
+        deadline = time.monotonic() + self.timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            ready, _, _ = select.select([master], [], [], remaining)
+            if not ready:
+                break
+            try:
+                chunk = os.read(master, 1 << 16)
+            except OSError:
+                break
+            if not chunk:
+                break
+            output += chunk
+            for marker in markers:
+                if marker in output:
+                    return marker, output
+        return None, output
+
+    def run(self) -> None:
+        import pty
+        master, slave = pty.openpty()
+        process = subprocess.Popen(
+            [sys.executable, 'repl.py'], stdin=slave, stdout=slave, stderr=slave,
+            env=self.env, close_fds=True, start_new_session=True
+        )
+        os.close(slave)
+        try:
+            self.read_until(master, (LAMBDA_PROMPT,))
+            for line in self.lines:
+                start = time.perf_counter()
+                os.write(master, line.encode() + b'\n')
+                marker, output = self.read_until(master, (LAMBDA_PROMPT, BETA_PROMPT))
+                if marker == BETA_PROMPT:
+                    # RED stops at the beta prompt; run it to normal form
+                    os.write(master, b'run\n')
+                    marker, tail = self.read_until(master, (LAMBDA_PROMPT,))
+                    output += tail
+                self.recorder.record(line, time.perf_counter() - start, marker is not None and ERROR_LABEL not in output)
+                if think := self.think:
+                    time.sleep(think)
+            self.memory = process_memory(process.pid)
+            os.write(master, b'exit\n')
+            process.wait(timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+        finally:
+            os.close(master)
+
+def drive_terminals(users: int, script: list[str], rounds: int, env: dict, think: float, timeout: float) -> tuple[Recorder, list[dict]]:
+    recorder = Recorder()
+    workers = [
+        TerminalUser(session_lines(script, user, rounds), recorder, env, think, timeout)
+        for user in range(users)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return recorder, [worker.memory for worker in workers if worker.memory]
+
+# MARK: Command Line
+def format_report(report: dict) -> str:
+    lines = [
+        bold_text(f"{report['mode']} mode, {report['users']} users"),
+        f"requests     {report['requests']} ({report['failures']} failed) in {report['wall_seconds']:.2f} s",
+        f"throughput   {report['throughput']:.1f} requests/s",
+    ]
+    def row(label, stats):
+        return f"{label:<12} p50 {stats['p50']:8.1f}  p90 {stats['p90']:8.1f}  p99 {stats['p99']:8.1f}  max {stats['max']:8.1f} ms"
+    if report['latency']:
+        lines.append(row('latency', report['latency']))
+        lines += [row(f"  {keyword}", stats) for keyword, stats in report['by_command'].items()]
+    for label, memory in report['memory'].items():
+        if memory:
+            lines.append(f"{label:<12} rss {memory['rss_kib']} KiB, peak {memory['peak_rss_kib']} KiB")
+    return "\n".join(lines)
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Drive concurrent simulated REPL sessions and report latency, throughput and memory")
+    parser.add_argument('mode', choices=['server', 'pty'], help="Drive a server.py endpoint, or one repl.py per user under a pseudo-terminal")
+    parser.add_argument('--users', type=int, default=20, help="Concurrent simulated users")
+    parser.add_argument('--rounds', type=int, default=3, help="Times each user runs the script")
+    parser.add_argument('--script', help="File of REPL lines to run instead of the built-in session; {user} is replaced per user")
+    parser.add_argument('--think', type=float, default=0.0, help="Seconds each user pauses between commands")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Seconds to wait for each reply")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7979, help="Server port to connect to, or to start one on with --spawn")
+    parser.add_argument('--spawn', action='store_true', help="Start server.py for the run instead of connecting to a running one")
+    parser.add_argument('--db', default=os.getenv('DEFAULT_DB_PATH', 'terms.db'), help="Database copied for spawned processes")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    options = parser.parse_args(argv)
+
+    script = DEFAULT_SCRIPT
+    if options.script:
+        with open(options.script) as file:
+            script = [line.strip() for line in file if line.strip() and not line.startswith('#')]
+
+    spawned = options.spawn or options.mode == 'pty'
+    env, scratch = isolated_env(options.db if spawned and os.path.exists(options.db) else None)
+    memory = {}
+    server = None
+    try:
+        start = time.perf_counter()
+        if options.mode == 'server':
+            if options.spawn:
+                server = spawn_server(options.port, env)
+                start = time.perf_counter()
+            recorder = asyncio.run(drive_server(
+                options.host, options.port, options.users, script, options.rounds, options.think, options.timeout
+            ))
+            if server:
+                memory['server'] = process_memory(server.pid)
+        else:
+            recorder, usage = drive_terminals(options.users, script, options.rounds, env, options.think, options.timeout)
+            if usage:
+                memory['repl mean'] = {
+                    key: int(statistics.fmean(entry[key] for entry in usage)) for key in ('rss_kib', 'peak_rss_kib')
+                }
+                memory['repl max'] = {key: max(entry[key] for entry in usage) for key in ('rss_kib', 'peak_rss_kib')}
+        wall = time.perf_counter() - start
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {'mode': options.mode, 'users': options.users, **recorder.summary(wall), 'memory': memory}
+    print(json.dumps(report, indent=2) if options.json else format_report(report))
+    return 1 if report['failures'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# models/batch.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, NamedTuple, Optional
+from utils.config import load_env
+from models.model import Term, Application, church_numeral
+from models.exceptions import *
+from models.reduction import normalize, normalize_auto, DEFAULT_REDUCTION_BUDGET
+
+load_env()
+
+# Worker processes a batch may use; 1 evaluates in the calling process
+DEFAULT_BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', os.cpu_count() or 1))
+# Smallest batch worth starting worker processes for
+MIN_PARALLEL_BATCH = int(os.getenv('MIN_PARALLEL_BATCH', 16))
+# Steps spent normalizing the function before a batch; recursive functions
+# built on Y have no normal form and would otherwise burn a full budget
+DEFAULT_PREPARE_BUDGET = int(os.getenv('BATCH_PREPARE_BUDGET', 256))
+
+# A range of numbered identifiers, e.g. C0..C100 or C0..100
+_RANGE = re.compile(r"^([A-Za-z][A-Za-z_'-]*)(\d+)\s*\.\.\s*(?:\1)?(\d+)$")
+# Church numeral identifiers, available to batches even when undefined
+_NUMERAL = re.compile(r"^C(\d+)$")
+
+class BatchResult(NamedTuple):
+    """Outcome of applying the batch function to one argument"""
+    argument: str           # The argument as written, e.g. "C3"
+    status: str             # normal_form, fixed_point, budget_exceeded or recursion_limit
+    steps: int
+    term: Term              # Normal form, or the last term reached
+    strategy: str = 'normal'    # Strategy `normalize_auto` picked
+
+# MARK: Arguments
+def split_map(args: str) -> tuple[str, str]:
+    """Splits `f < a, b, c` into the function and argument literals
+
+    Throws:
+        ParseError: If either side of `<` is missing
+    """
+    parts = args.split('<', 1)
+    if len(parts) != 2 or not parts[0].strip() or not parts[1].strip():
+        raise ParseError(args, "Invalid MAP syntax, expected MAP <function> < <arguments>")
+    return parts[0].strip(), parts[1].strip()
+
+def expand_arguments(spec: str) -> list[str]:
+    """Splits a comma-separated argument list, expanding numbered ranges
+
+    Example:
+        >>> expand_arguments("C0..C2, I")
+        ['C0', 'C1', 'C2', 'I']
+    """
+    items = []
+    for item in (part.strip() for part in spec.split(',')):
+        if not item:
+            continue
+        if match := _RANGE.match(item):
+            prefix, start, end = match.group(1), int(match.group(2)), int(match.group(3))
+            step = 1 if end >= start else -1
+            items += [f"{prefix}{n}" for n in range(start, end + step, step)]
+        else:
+            items.append(item)
+    return items
+
+def resolve_arguments(items: list[str], db, history) -> list[tuple[str, Term]]:
+    """Looks up every identifier in one query; other items are parsed as terms
+
+    Undefined identifiers of the form `C<n>` resolve to Church numerals.
+
+    Throws:
+        ValueError: If an identifier is neither defined nor a numeral
+    """
+    from parser import allowed_identifier, parse_term
+    names = [item for item in items if allowed_identifier(item)]
+    found = dict(db.get_terms(names)) | dict(history.get_entries(names))
+    resolved = []
+    missing = []
+    for item in items:
+        if item in found:
+            resolved.append((item, found[item]))
+        elif match := _NUMERAL.match(item):
+            resolved.append((item, church_numeral(int(match.group(1)))))
+        elif allowed_identifier(item):
+            missing.append(item)
+        else:
+            resolved.append((item, parse_term(item, db, history)))
+    if missing:
+        raise ValueError(f"Undefined identifiers: {', '.join(missing)}")
+    return resolved
+
+# MARK: Evaluation
+def prepare(function: Term, max_steps: Optional[int] = DEFAULT_PREPARE_BUDGET) -> Term:
+    """The function in normal form when it has one within `max_steps`, as is otherwise
+
+    Normalizing once here saves every application of the batch from
+    repeating the same steps inside the function.
+    """
+    try:
+        return normalize(function, max_steps)[0]
+    except (FixedPointDetected, ReductionBudgetExceeded, RecursionError):
+        return function
+
+def apply_one(function: Term, label: str, argument: Term, max_steps: Optional[int]) -> BatchResult:
+    """Normalizes one application, by the fastest strategy its type allows
+
+    The step budget applies whatever the strategy, so a well-typed term with
+    an enormous normal form cannot tie up a worker.
+    """
+    term = Application(function, argument)
+    try:
+        term, steps, strategy = normalize_auto(term, max_steps)
+        return BatchResult(label, 'normal_form', steps, term, strategy)
+    except FixedPointDetected as e:
+        return BatchResult(label, 'fixed_point', -1, e.term)
+    except ReductionBudgetExceeded as e:
+        return BatchResult(label, 'budget_exceeded', e.steps, e.term)
+    except RecursionError:
+        return BatchResult(label, 'recursion_limit', -1, term)
+
+# Each worker process receives the prepared function once, not once per task
+_worker_function: Optional[Term] = None
+
+def _install(function: Term) -> None:
+    global _worker_function
+    _worker_function = function
+
+def _apply_in_worker(task: tuple[str, Term, Optional[int]]) -> BatchResult:
+    return apply_one(_worker_function, *task)
+
+def map_terms(
+    function: Term,
+    arguments: Iterable[tuple[str, Term]],
+    max_steps: Optional[int] = DEFAULT_REDUCTION_BUDGET,
+    workers: int = DEFAULT_BATCH_WORKERS,
+    pre_normalize: bool = True
+) -> list[BatchResult]:
+    """Normalizes `function` applied to each argument, preparing `function` once
+
+    Arguments:
+        function (Term): Resolved function to apply
+        arguments (Iterable): (label, term) pairs, e.g. from `resolve_arguments`
+        max_steps (int | None): Step budget for each application
+        workers (int): Worker processes; batches under MIN_PARALLEL_BATCH
+            run in the calling process
+        pre_normalize (bool): Reduce `function` to normal form first
+
+    Returns:
+        list[BatchResult]: One result per argument, in order
+
+    Example:
+        >>> [r.term.literal() for r in map_terms(parse_term("SUCC"), [("C0", church_numeral(0))])]
+        ['(\\\\f. (\\\\x. f (x)))']
+    """
+    if pre_normalize:
+        function = prepare(function, DEFAULT_PREPARE_BUDGET if max_steps is None else min(max_steps, DEFAULT_PREPARE_BUDGET))
+    tasks = [(label, argument, max_steps) for label, argument in arguments]
+    if workers <= 1 or len(tasks) < MIN_PARALLEL_BATCH:
+        return [apply_one(function, *task) for task in tasks]
+    workers = min(workers, len(tasks))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_install, initargs=(function,)) as pool:
+        return list(pool.map(_apply_in_worker, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
@@ -112,4 +112,35 @@ class UserCancelledOperation(Exception):
         return self.args[0]
 
     def __repr__(self):
-        return f"{self.__class__.__name__}({self.message!r})"
\ No newline at end of file
+        return f"{self.__class__.__name__}({self.message!r})"
+
+
+class ReductionBudgetExceeded(Exception):
+    """Exception raised when a reduction runs out of steps before reaching normal form."""
+    
+    def __init__(self, term=None, steps=0, message="Reduction step budget exhausted before reaching normal form"):
+        self.term = term
+        self.steps = steps
+        self.message = message
+        super().__init__(message)
+    
+    def __str__(self):
+        return self.args[0]
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.term!r}, steps={self.steps!r})"
+
+
+class TypeInferenceError(Exception):
+    """Exception raised when a lambda term has no simple type."""
+    
+    def __init__(self, term=None, message="Term has no simple type"):
+        self.term = term
+        self.message = message
+        super().__init__(message)
+    
+    def __str__(self):
+        return self.args[0]
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.term!r})"
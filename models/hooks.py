@@ -0,0 +1,282 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# models/hooks.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Iterator
+from models.model import Term, Variable, Abstraction, Application
+from utils.trace import ReductionTrace
+
+# Events observers can subscribe to, with the arguments their callbacks get
+HOOK_EVENTS = (
+    'before_step',      # (term) before a reduction step, of any strategy
+    'after_step',       # (term, reduced) after it
+    'on_substitute',    # (term, target, replacement, result) per substitution
+    'on_alpha',         # (abstraction, new_name, result) per bound-variable rename
+    'on_budget',        # (term, steps) when a reduction runs out of budget
+)
+
+# MARK: Method Patching
+# Wrappers from several owners (hooks, the profiler) may sit on one method at
+# once. Each method keeps its original and the ordered wrappers applied to it,
+# so removing any one of them rebuilds the rest instead of unwinding blindly.
+
+class Patch:
+    """Handle for one wrapper installed by `patch`"""
+    __slots__ = ('owner', 'name', 'wrap')
+
+    def __init__(self, owner: object, name: str, wrap: Callable[[Callable], Callable]):
+        self.owner = owner
+        self.name = name
+        self.wrap = wrap
+
+_chains: dict[tuple[int, str], tuple[Callable, list[Patch]]] = {}
+_patch_lock = threading.RLock()
+
+def _rebuild(owner: object, name: str) -> None:
+    original, patches = _chains[(id(owner), name)]
+    method = original
+    for entry in patches:
+        method = entry.wrap(method)
+    setattr(owner, name, method)
+
+def patch(owner: object, name: str, wrap: Callable[[Callable], Callable]) -> Patch:
+    """Replace `owner.name` with `wrap(current)` until `unpatch` is called
+
+    Arguments:
+        owner (object): Class or module defining the attribute
+        name (str): Attribute to wrap
+        wrap (Callable): Builds the wrapper from the function it wraps
+
+    Returns:
+        Patch: Handle to pass to `unpatch`
+    """
+    with _patch_lock:
+        key = (id(owner), name)
+        if key not in _chains:
+            _chains[key] = (owner.__dict__[name], [])
+        entry = Patch(owner, name, wrap)
+        _chains[key][1].append(entry)
+        _rebuild(owner, name)
+        return entry
+
+def unpatch(entry: Patch) -> None:
+    """Remove one wrapper, restoring the original once none are left"""
+    with _patch_lock:
+        key = (id(entry.owner), entry.name)
+        original, patches = _chains[key]
+        patches[:] = [other for other in patches if other is not entry]
+        if patches:
+            _rebuild(entry.owner, entry.name)
+        else:
+            setattr(entry.owner, entry.name, original)
+            del _chains[key]
+
+class _Scopes(threading.local):
+    def __init__(self):
+        self.active: list["HookRegistry"] = []
+
+# Scoped registries active on each thread, innermost last
+_scopes = _Scopes()
+
+# MARK: HookRegistry Class
+class HookRegistry:
+    """Observers of the reduction engine, keyed by event.
+
+    Terms stay plain Variable/Abstraction/Application objects. The methods
+    behind an event are only wrapped while some registry has a callback for
+    it and are restored when the last one is unregistered, so no registry
+    adds overhead while none is in use. Steps and substitutions are reported
+    once per top-level call, not for every node they recurse through.
+
+    The module's `hooks` registry is process-wide. A scoped registry, like
+    the one every REPLSession keeps, only hears about work done inside its
+    `scope()` on the same thread, so sessions sharing a server process do
+    not observe, or unregister, each other's callbacks.
+
+    Example:
+        >>> stop = hooks.register('after_step', lambda term, reduced: print(reduced.literal()))
+        >>> parse_lambda(r"(\\x. x) (y)").beta_reduce_step()
+        y
+        >>> stop()
+    """
+
+    def __init__(self, scoped: bool = False):
+        """Initializes an empty registry.
+
+        Arguments:
+            scoped (bool): Fire only inside `scope()` on the calling thread
+        """
+        self.scoped = scoped
+        self._callbacks: dict[str, list[Callable]] = {event: [] for event in HOOK_EVENTS}
+        self._lock = threading.RLock()
+
+    def active(self, event: str) -> bool:
+        """Whether `event` has any callback"""
+        return bool(self._callbacks[event])
+
+    # MARK: Registration
+    def register(self, event: str, callback: Callable) -> Callable[[], None]:
+        """Call `callback` on every `event`
+
+        Returns:
+            Callable: Unregisters the callback when called
+
+        Throws:
+            ValueError: If `event` is not one of HOOK_EVENTS
+        """
+        if event not in HOOK_EVENTS:
+            raise ValueError(f"Unknown hook event {event!r}, expected one of {', '.join(HOOK_EVENTS)}")
+        with self._lock:
+            self._callbacks[event].append(callback)
+        with _sync_lock:
+            _registries.add(self)
+            _sync()
+        return lambda: self.unregister(event, callback)
+
+    def unregister(self, event: str, callback: Callable) -> None:
+        """Stop calling `callback` on `event`; unknown callbacks are ignored"""
+        with self._lock:
+            if callback not in self._callbacks.get(event, []):
+                return
+            self._callbacks[event].remove(callback)
+        _sync()
+
+    def clear(self) -> None:
+        """Drop every callback, restoring the wrapped methods no other registry needs"""
+        with self._lock:
+            for callbacks in self._callbacks.values():
+                callbacks.clear()
+        _sync()
+
+    def fire(self, event: str, *args) -> None:
+        """Call the callbacks of `event` with `args`, in registration order"""
+        if self.scoped and self not in _scopes.active:
+            return
+        for callback in tuple(self._callbacks[event]):
+            callback(*args)
+
+    @contextmanager
+    def scope(self) -> Iterator["HookRegistry"]:
+        """Let a scoped registry observe the reductions run by this thread in the block"""
+        _scopes.active.append(self)
+        try:
+            yield self
+        finally:
+            _scopes.active.pop()
+
+# Process-wide registry the reduction engine reports to
+hooks = HookRegistry()
+
+def fire_event(event: str, *args) -> None:
+    """Report `event` to `hooks` and to every scoped registry active on this thread"""
+    hooks.fire(event, *args)
+    for registry in dict.fromkeys(_scopes.active):
+        registry.fire(event, *args)
+
+def _listening(events: tuple[str, ...]) -> bool:
+    """Whether a registry would hear any of `events` fired on this thread"""
+    for event in events:
+        if hooks._callbacks[event]:
+            return True
+    for registry in _scopes.active:
+        for event in events:
+            if registry._callbacks[event]:
+                return True
+    return False
+
+# MARK: Instrumentation
+# One set of wrappers serves every registry. It is installed while any
+# registry has a callback for its events; each call first checks that this
+# thread has a listener, so a session that registered nothing runs the
+# original method after a single lookup instead of dispatching events.
+
+# Registries that have had callbacks; weak, so a dropped session's go with it
+_registries: "weakref.WeakSet[HookRegistry]" = weakref.WeakSet()
+# Installed wrappers by group
+_installed: dict[str, list[Patch]] = {}
+class _Calls(threading.local):
+    stepping = False
+    substituting = False
+
+# Which wrapped calls are already under way on this thread
+_calls = _Calls()
+_sync_lock = threading.RLock()
+
+# Events each group of wrappers reports
+_GROUPS = {
+    'step': ('before_step', 'after_step'),
+    'on_substitute': ('on_substitute',),
+    'on_alpha': ('on_alpha',),
+}
+
+def _outermost(flag: str, events: tuple[str, ...], original: Callable, around: Callable) -> Callable:
+    # Recursive calls below the first one, and calls nobody on this thread
+    # listens to, run the original unobserved
+    def wrapper(*args, **kwargs):
+        if getattr(_calls, flag) or not _listening(events):
+            return original(*args, **kwargs)
+        setattr(_calls, flag, True)
+        try:
+            return around(original, *args, **kwargs)
+        finally:
+            setattr(_calls, flag, False)
+    return wrapper
+
+def _step(original: Callable, term: Term, *args, **kwargs) -> Term:
+    fire_event('before_step', term)
+    reduced = original(term, *args, **kwargs)
+    fire_event('after_step', term, reduced)
+    return reduced
+
+def _traced_step(original: Callable, trace: ReductionTrace, index: int, term: Term, base_index: int, **kwargs) -> Term:
+    fire_event('before_step', term)
+    reduced = original(trace, index, term, base_index=base_index, **kwargs)
+    fire_event('after_step', term, reduced)
+    return reduced
+
+def _substitute(original: Callable, term: Term, target: str, replacement: Term) -> Term:
+    result = original(term, target, replacement)
+    fire_event('on_substitute', term, target, replacement, result)
+    return result
+
+def _alpha(original: Callable) -> Callable:
+    def wrapper(term: Abstraction, new_name: str) -> Abstraction:
+        result = original(term, new_name)
+        if _listening(_GROUPS['on_alpha']):
+            fire_event('on_alpha', term, new_name, result)
+        return result
+    return wrapper
+
+def _wrappers(group: str) -> list[tuple[object, str, Callable]]:
+    terms = (Variable, Abstraction, Application)
+    events = _GROUPS[group]
+    if group == 'step':
+        import models.reduction
+        return [
+            (cls, 'beta_reduce_step', lambda f: _outermost('stepping', events, f, _step)) for cls in terms
+        ] + [
+            (models.reduction, 'reduce_step', lambda f: _outermost('stepping', events, f, _step)),
+            (ReductionTrace, 'reduce', lambda f: _outermost('stepping', events, f, _traced_step)),
+        ]
+    if group == 'on_substitute':
+        return [(cls, 'substitute', lambda f: _outermost('substituting', events, f, _substitute)) for cls in terms]
+    if group == 'on_alpha':
+        return [(Abstraction, 'alpha_conversion', _alpha)]
+    return []
+
+def _sync() -> None:
+    """Install the wrappers of every event some registry observes and remove the rest"""
+    with _sync_lock:
+        for group, events in _GROUPS.items():
+            needed = any(registry.active(event) for registry in _registries for event in events)
+            if needed and group not in _installed:
+                _installed[group] = [patch(owner, name, wrap) for owner, name, wrap in _wrappers(group)]
+            elif not needed and group in _installed:
+                for entry in _installed.pop(group):
+                    unpatch(entry)
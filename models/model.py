@@ -5,8 +5,33 @@
 #
 # Makabaka1880, 2025. All rights reserved.
 
+import itertools
 from models.exceptions import *
-from typing import Callable
+from typing import Callable, Iterable, Optional
+
+# A route from a term to one of its subterms, e.g. ("function", "body")
+Path = tuple[str, ...]
+
+# Separates stem and number in names handed out by a NameSupply, e.g. x#12;
+# identifiers cannot contain it, so no name a user writes looks generated
+GENERATED_MARKER = '#'
+# Small free-variable sets are shared between all nodes that have them;
+# the table starts over once it holds this many
+_INTERN_LIMIT = 4096
+_interned: dict[frozenset[str], frozenset[str]] = {}
+_NO_NAMES: frozenset[str] = frozenset()
+
+def _intern(free: frozenset[str]) -> frozenset[str]:
+    if not free:
+        return _NO_NAMES
+    if len(free) > 4:
+        return free
+    shared = _interned.get(free)
+    if shared is None:
+        if len(_interned) >= _INTERN_LIMIT:
+            _interned.clear()
+        shared = _interned[free] = free
+    return shared
 
 def fresh_variable(base: str, crit: Callable[[str], bool]) -> str:
     """Generates a fresh variable name by appending primes until `crit` returns False.
@@ -29,6 +54,88 @@ def fresh_variable(base: str, crit: Callable[[str], bool]) -> str:
         base_ += "'"
     return base_
 
+def is_generated(name: str) -> bool:
+    """Checks whether `name` was handed out by a NameSupply, e.g. "x#12"."""
+    return GENERATED_MARKER in name
+
+def name_stem(name: str) -> str:
+    """The readable part of a name, without a NameSupply number or primes.
+    
+    Example:
+        >>> name_stem("x#12"), name_stem("x''"), name_stem("y")
+        ('x', 'x', 'y')
+    """
+    name = name.split(GENERATED_MARKER, 1)[0]
+    return name.rstrip("'") or name
+
+class NameSupply:
+    """Counter-based source of fresh variable names.
+    
+    Each name is the stem of the name it replaces, GENERATED_MARKER and a
+    number the supply never hands out twice, so a renamed binder is fresh on
+    the first try instead of after a loop of appended primes. Renderers show
+    such names by their stem again, with primes where that is ambiguous, so
+    the marker never reaches a literal.
+    
+    Example:
+        >>> supply = NameSupply()
+        >>> supply.fresh("x"), supply.fresh("x#1"), supply.fresh("y'")
+        ('x#1', 'x#2', 'y#3')
+    """
+
+    def __init__(self, start: int = 1):
+        self._counter = itertools.count(start)
+
+    def fresh(self, base: str, taken: Optional[Callable[[str], bool]] = None) -> str:
+        """Returns a new name for `base`, skipping any for which `taken` is True.
+        
+        Arguments:
+            base (str): Name being replaced (e.g., "x")
+            taken (Callable[[str], bool], optional): Conflict checker, for
+                names another supply handed out
+        """
+        stem = name_stem(base)
+        while True:
+            name = f"{stem}{GENERATED_MARKER}{next(self._counter)}"
+            if taken is None or not taken(name):
+                return name
+
+# Process-wide supply used by parsing and substitution
+names = NameSupply()
+
+def _free_names(term: "Term") -> frozenset[str]:
+    """Free variables of `term`, computed once per node and kept on it.
+    
+    Terms are immutable, so the set stays valid; the walk is iterative and
+    stops at nodes that already know theirs.
+    """
+    if term._free is not None:
+        return term._free
+    stack = [term]
+    while stack:
+        node = stack[-1]
+        if node._free is not None:
+            stack.pop()
+        elif isinstance(node, Abstraction):
+            body = node.body._free
+            if body is None:
+                stack.append(node.body)
+                continue
+            node._free = _intern(body - {node.var.name}) if node.var.name in body else body
+            stack.pop()
+        elif isinstance(node, Application):
+            function, value = node.function._free, node.value._free
+            if function is None or value is None:
+                stack += [child for child in (node.value, node.function) if child._free is None]
+                continue
+            # Closed children are common; reuse a side's set instead of copying
+            node._free = function if value <= function else value if function <= value else _intern(function | value)
+            stack.pop()
+        else:
+            node._free = _intern(frozenset((node.name,)))
+            stack.pop()
+    return term._free
+
 class Term:
     """Abstract base class for lambda calculus terms.
     
@@ -36,8 +143,23 @@ class Term:
     
     Attributes:
         All subclasses define their own attributes (e.g., Variable.name).
+        size (int): Nodes in the term printed as a tree, shared subterms
+            counted every time they occur
+        depth (int): Nodes on the longest path from the root to a variable
+        redexes (int): Beta redexes anywhere in the term
+        generated (int): Binders named by a NameSupply anywhere in the term
+        
+    Terms are never modified after construction, so each node computes
+    these metrics from its children's once, in its constructor.
     """
 
+    size: int
+    depth: int
+    redexes: int
+    generated: int
+    # Free variables, filled in the first time they are asked for
+    _free: Optional[frozenset[str]]
+
     def tree_str(self, indent: str = "", last: bool = True) -> str:
         """Generate hierarchical tree representation for debugging"""
         raise NotImplementedError("tree_str not implemented for base Term")
@@ -53,7 +175,8 @@ class Term:
             replacement (Term): Term to substitute in
             
         Returns:
-            Term: New term with substitutions applied
+            Term: New term with substitutions applied; subterms without a
+                free `target` are shared with this one, not copied
         """
         raise NotImplementedError("Substitute method not implemented.")
 
@@ -95,6 +218,56 @@ class Term:
         """
         raise NotImplementedError("Literal representation not implemented.")
 
+    def free_variables(self) -> frozenset[str]:
+        """Collects the names of all free variables in the term.
+        
+        The set is computed once per node and shared, so it must not be
+        modified.
+        
+        Returns:
+            frozenset[str]: Names occurring free, e.g. {"y"} for "λx. x y"
+        """
+        return _free_names(self)
+
+    def has_free(self, name: str) -> bool:
+        """Checks for free occurrences of `name`, in O(1) once free variables are known."""
+        return name in _free_names(self)
+
+    def redex_path(self) -> Optional[Path]:
+        """Locates the redex `beta_reduce_step` would contract.
+        
+        Returns:
+            Path | None: Attribute names leading to the leftmost-outermost
+            redex, or None if the term is in normal form
+        """
+        raise NotImplementedError("Redex search not implemented.")
+
+    def subterm(self, path: Path) -> "Term":
+        """Follows `path` down from this term.
+        
+        Example:
+            >>> Application(Variable("f"), Variable("x")).subterm(("value",))
+            x
+        """
+        term = self
+        for step in path:
+            term = getattr(term, step)
+        return term
+
+    def replace_at(self, path: Path, replacement: "Term") -> "Term":
+        """Rebuilds the spine along `path` with `replacement` at its end.
+        
+        Nodes off the path are shared with the original term, not copied.
+        
+        Arguments:
+            path (Path): Route to the subterm being replaced
+            replacement (Term): New subterm
+            
+        Returns:
+            Term: New term differing from this one only along `path`
+        """
+        raise NotImplementedError("Path replacement not implemented.")
+
 class Variable(Term):
     """Represents a variable in lambda calculus.
     
@@ -115,6 +288,11 @@ class Variable(Term):
         """
         super().__init__()
         self.name = name
+        self.size = 1
+        self.depth = 1
+        self.redexes = 0
+        self.generated = 0
+        self._free = None
 
     def __repr__(self) -> str:
         return self.name
@@ -150,6 +328,14 @@ class Variable(Term):
         """Checks if this variable matches the given name."""
         return self.name == name
 
+    def redex_path(self) -> Optional[Path]:
+        return None
+
+    def replace_at(self, path: Path, replacement: Term) -> Term:
+        if path:
+            raise InvalidTermError(term=self, message=f"Path {path} leads below a variable")
+        return replacement
+
 class Abstraction(Term):
     """Represents a lambda abstraction (λx. body).
     
@@ -173,13 +359,19 @@ class Abstraction(Term):
         super().__init__()
         self.var = var
         self.body = body
+        self.size = body.size + 1
+        self.depth = body.depth + 1
+        self.redexes = body.redexes
+        self.generated = body.generated + is_generated(var.name)
+        self._free = None
 
     def __repr__(self) -> str:
-        return f"(λ{self.var}. {self.body})"
+        from models.render import join_repr
+        return join_repr(self)
 
     def is_normal_form(self) -> bool:
         """Abstractions are in normal form if their body is."""
-        return self.body.is_normal_form()
+        return self.redexes == 0
 
     def alpha_conversion(self, new_name: str) -> "Abstraction":
         """Renames the bound variable to avoid capture.
@@ -198,11 +390,13 @@ class Abstraction(Term):
             target (str): Variable name to replace
             replacement (Term): Term to substitute in
         """
-        if self.var.name == target:
-            return self  # Bound variable shadows target
+        if self.var.name == target or not self.body.has_free(target):
+            return self  # Bound variable shadows target, or nothing to replace
 
         if replacement.has_free(self.var.name):
-            new_name = fresh_variable(self.var.name, replacement.has_free)
+            # Parsed terms follow the Barendregt convention, so this only happens
+            # once reduction has copied an argument under a binder of the same name
+            new_name = names.fresh(self.var.name, lambda n: replacement.has_free(n) or self.body.has_free(n))
             return self.alpha_conversion(new_name).substitute(target, replacement)
 
         return Abstraction(self.var, self.body.substitute(target, replacement))
@@ -214,27 +408,25 @@ class Abstraction(Term):
         return Abstraction(self.var, self.body.beta_reduce_step())
 
     def literal(self) -> str:
-        return rf"(\{self.var.literal()}. {self.body.literal()})"
-
+        from models.render import join_literal
+        return join_literal(self)
 
     def tree_str(self, indent: str = "", last: bool = True, child: bool = False) -> str:
-        lines = []
-        branch = "└── " if last else "├── "
-        lines.append(f"{indent}{branch}λ {self.var.name}" if child else f"Abstraction λ {self.var.name}" )
+        from models.render import render_tree
+        return render_tree(self, indent=indent, last=last, child=child)
 
-        # Maintain vertical lines for nested abstractions
-        new_indent = indent + ("│   " if not last else "    ")
 
-        # Body subtree (always last child for abstractions)
-        lines.append(self.body.tree_str(new_indent, True, True))
+    def redex_path(self) -> Optional[Path]:
+        if not self.redexes:
+            return None
+        return ("body", *self.body.redex_path())
 
-        return "\n".join(lines)
-
-    def has_free(self, name: str) -> bool:
-        """Checks for free occurrences of `name` in the body."""
-        if self.var.name == name:
-            return False
-        return self.body.has_free(name)
+    def replace_at(self, path: Path, replacement: Term) -> Term:
+        if not path:
+            return replacement
+        if path[0] != "body":
+            raise InvalidTermError(term=self, message=f"Abstraction has no child {path[0]!r}")
+        return Abstraction(self.var, self.body.replace_at(path[1:], replacement))
 
 class Application(Term):
     """Represents function application (f x).
@@ -259,17 +451,19 @@ class Application(Term):
         super().__init__()
         self.function = function
         self.value = value
+        self.size = function.size + value.size + 1
+        self.depth = max(function.depth, value.depth) + 1
+        self.redexes = function.redexes + value.redexes + isinstance(function, Abstraction)
+        self.generated = function.generated + value.generated
+        self._free = None
 
     def __repr__(self) -> str:
-        return f"({self.function} {self.value})"
+        from models.render import join_repr
+        return join_repr(self)
 
     def is_normal_form(self) -> bool:
         """Applications are in normal form if neither component can reduce."""
-        return (
-            not isinstance(self.function, Abstraction) and
-            self.function.is_normal_form() and
-            self.value.is_normal_form()
-        )
+        return self.redexes == 0
 
     def alpha_conversion(self, name: str) -> "Application":
         """Applies alpha conversion to both function and argument."""
@@ -280,47 +474,57 @@ class Application(Term):
 
     def substitute(self, target: str, replacement: Term) -> "Application":
         """Substitutes in both function and argument components."""
-        return Application(
-            self.function.substitute(target, replacement),
-            self.value.substitute(target, replacement)
+        if not self.has_free(target):
+            return self
+        function = self.function.substitute(target, replacement)
+        value = self.value.substitute(target, replacement)
+        if function is self.function and value is self.value:
+            return self
+        return Application(function, value)
+
+    def contract(self) -> Term:
+        """Contracts this application as a redex: (λx. body) v → body[x := v]."""
+        return self.function.body.substitute(
+            self.function.var.name,
+            self.value
         )
 
     def beta_reduce_step(self) -> Term:
         """Performs leftmost-outermost beta reduction."""
         if isinstance(self.function, Abstraction):
-            return self.function.body.substitute(
-                self.function.var.name,
-                self.value
-            )
+            return self.contract()
 
-        try:
+        if self.function.redexes:
             return Application(self.function.beta_reduce_step(), self.value)
-        except ReductionOnNormalForm:
-            return Application(self.function, self.value.beta_reduce_step())
+        return Application(self.function, self.value.beta_reduce_step())
 
     def literal(self) -> str:
-        return f"{self.function.literal()} ({self.value.literal()})"
+        from models.render import join_literal
+        return join_literal(self)
 
     def tree_str(self, indent: str = "", last: bool = True, child: bool = False) -> str:
-        lines = []
-        branch = "└── " if last else "├── "
-        lines.append(f"{indent}{branch}Applicate" if child else f"Application")
+        from models.render import render_tree
+        return render_tree(self, indent=indent, last=last, child=child)
 
-        # Correct indentation: Use vertical lines for all children except last
-        new_indent = indent + ("    " if last else "│   ")
-        # new_indent = "│   "
 
-        # Function subtree (not last)
-        lines.append(self.function.tree_str(new_indent, False, True))
-
-        # Value subtree (last)
-        lines.append(self.value.tree_str(new_indent, True, True))
-
-        return "\n".join(lines)
-
-    def has_free(self, name: str) -> bool:
-        """Checks for free variables in either component."""
-        return self.function.has_free(name) or self.value.has_free(name)
+    def redex_path(self) -> Optional[Path]:
+        if isinstance(self.function, Abstraction):
+            return ()
+        # Redex counts say which side holds the redex, so only one is searched
+        if self.function.redexes:
+            return ("function", *self.function.redex_path())
+        if self.value.redexes:
+            return ("value", *self.value.redex_path())
+        return None
+
+    def replace_at(self, path: Path, replacement: Term) -> Term:
+        if not path:
+            return replacement
+        if path[0] == "function":
+            return Application(self.function.replace_at(path[1:], replacement), self.value)
+        if path[0] == "value":
+            return Application(self.function, self.value.replace_at(path[1:], replacement))
+        raise InvalidTermError(term=self, message=f"Application has no child {path[0]!r}")
 
 # MARK: Helper Functions
 def makeVar(name: str) -> Variable:
@@ -331,6 +535,87 @@ def makeVar(name: str) -> Variable:
     """
     return Variable(name)
 
+def church_numeral(n: int) -> Abstraction:
+    """Builds the Church numeral for `n`, λf. λx. f (f (... x)).
+    
+    Example:
+        >>> church_numeral(2).literal()
+        '(\\f. (\\x. f (f (x))))'
+    """
+    body: Term = Variable("x")
+    for _ in range(n):
+        body = Application(Variable("f"), body)
+    return Abstraction(Variable("f"), Abstraction(Variable("x"), body))
+
+def count_nodes(terms: Iterable[Term]) -> int:
+    """Counts the distinct node objects reachable from `terms`.
+    
+    Subterms shared between terms (or within one) are counted once, so this
+    reflects memory actually held rather than the size of the printed trees.
+    
+    Example:
+        >>> x = Variable("x")
+        >>> count_nodes([Application(x, x)])
+        2
+    """
+    seen: set[int] = set()
+    stack = list(terms)
+    while stack:
+        term = stack.pop()
+        if id(term) in seen:
+            continue
+        seen.add(id(term))
+        if isinstance(term, Abstraction):
+            stack += (term.var, term.body)
+        elif isinstance(term, Application):
+            stack += (term.function, term.value)
+    return len(seen)
+
+def de_bruijn(term: Term) -> str:
+    """Renders `term` with bound variables as de Bruijn indices.
+
+    Bound occurrences become `#n`, counting binders outward from 0, and free
+    variables keep their names, so two terms get the same string exactly
+    when they are alpha-equivalent.
+
+    Example:
+        >>> de_bruijn(Abstraction(Variable("x"), Application(Variable("x"), Variable("y"))))
+        'λ(#0 y)'
+    """
+    binders: dict[str, list[int]] = {}
+    parts: list[str] = []
+    depth = 0
+    stack: list = [term]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            parts.append(item)
+        elif isinstance(item, tuple):
+            # Leaving an abstraction: unbind its variable
+            binders[item[1]].pop()
+            depth -= 1
+        elif isinstance(item, Abstraction):
+            parts.append("λ")
+            binders.setdefault(item.var.name, []).append(depth)
+            depth += 1
+            stack += (("leave", item.var.name), item.body)
+        elif isinstance(item, Application):
+            parts.append("(")
+            stack += (")", item.value, " ", item.function)
+        else:
+            bound = binders.get(item.name)
+            parts.append(f"#{depth - 1 - bound[-1]}" if bound else item.name)
+    return "".join(parts)
+
+def alpha_equivalent(a: Term, b: Term) -> bool:
+    """Checks whether two terms differ only in the names of bound variables.
+
+    Example:
+        >>> alpha_equivalent(parse_lambda(r"\\x. x"), parse_lambda(r"\\y. y"))
+        True
+    """
+    return de_bruijn(a) == de_bruijn(b)
+
 # Test case for left-to-right reduction
 test_expr = Application(
     Abstraction(
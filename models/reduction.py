@@ -0,0 +1,199 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# models/reduction.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import os
+from typing import Callable, Optional
+from utils.config import load_env
+from models.model import Term, Abstraction, Application, Path, alpha_equivalent
+from models.hooks import HookRegistry, fire_event
+from models.types import is_typable
+from models.exceptions import *
+
+load_env()
+
+# Steps a non-interactive reduction may take before giving up
+DEFAULT_REDUCTION_BUDGET = int(os.getenv('REDUCTION_BUDGET', 10000))
+# Tree size a term may grow to during a reduction; 0 for no limit
+DEFAULT_SIZE_BUDGET = int(os.getenv('SIZE_BUDGET', 0)) or None
+# Whether `choose_strategy` may rely on the term's type
+AUTO_STRATEGY = os.getenv('AUTO_STRATEGY', '1') != '0'
+# Strategy `choose_strategy` picks for well-typed terms. Normal order is the
+# faster one on bench.py's workloads: applicative order rebuilds the spine
+# down to the innermost redex on every step, and spends steps on arguments
+# that are then dropped
+TYPED_STRATEGY = os.getenv('TYPED_STRATEGY', 'normal')
+
+# MARK: Strategies
+def innermost_redex_path(term: Term) -> Optional[Path]:
+    """Locates the leftmost-innermost redex, the one applicative order contracts.
+
+    That is the first redex met in a post-order walk, so arguments and
+    function bodies are reduced before the application using them. Redex
+    counts on each node steer the search, so it follows a single path.
+
+    Returns:
+        Path | None: Attribute names leading to the redex, or None if `term`
+        is in normal form
+    """
+    if not term.redexes:
+        return None
+    path: list[str] = []
+    node = term
+    while True:
+        if isinstance(node, Abstraction):
+            path.append("body")
+            node = node.body
+        elif node.function.redexes:
+            path.append("function")
+            node = node.function
+        elif node.value.redexes:
+            path.append("value")
+            node = node.value
+        else:
+            return tuple(path)
+
+def applicative_step(term: Term) -> Term:
+    """Performs one leftmost-innermost (applicative order) beta reduction
+
+    Throws:
+        ReductionOnNormalForm: If `term` has no redex
+    """
+    path = innermost_redex_path(term)
+    if path is None:
+        raise ReductionOnNormalForm(term=term)
+    return term.replace_at(path, term.subterm(path).contract())
+
+def reduce_step(term: Term, strategy: str = 'normal') -> Term:
+    """Performs one step of `strategy`
+
+    Every strategy steps through here, so the `before_step`/`after_step`
+    hooks and the profiler, which wrap this function, see each step once
+    whichever strategy takes it.
+
+    Throws:
+        ReductionOnNormalForm: If `term` has no redex
+    """
+    if strategy == 'applicative':
+        return applicative_step(term)
+    return term.beta_reduce_step()
+
+# One-step reducers by strategy name; normal order is the REPL's. They look
+# `reduce_step` up on every call, so wrappers installed later apply
+STRATEGIES: dict[str, Callable[[Term], Term]] = {
+    'normal': lambda term: reduce_step(term, 'normal'),
+    'applicative': lambda term: reduce_step(term, 'applicative'),
+}
+
+# MARK: Normalization
+def is_fixed_point(previous: Term, term: Term) -> bool:
+    """Checks whether the step from `previous` to `term` left it unchanged
+
+    Only a step that kept every metric can have, so the terms themselves are
+    compared for those steps alone, and never rendered.
+    """
+    if term is previous:
+        return True
+    if (term.size, term.depth, term.redexes) != (previous.size, previous.depth, previous.redexes):
+        return False
+    return alpha_equivalent(previous, term)
+
+def normalize(
+    term: Term,
+    max_steps: Optional[int] = DEFAULT_REDUCTION_BUDGET,
+    step: Optional[Callable[[Term], Term]] = None,
+    on_step: Optional[Callable[[Term, int], None]] = None,
+    max_size: Optional[int] = DEFAULT_SIZE_BUDGET,
+    terminates: bool = False,
+    registry: Optional[HookRegistry] = None
+) -> tuple[Term, int]:
+    """Reduces `term` leftmost-outermost until no redex is left.
+
+    This is the non-interactive counterpart of the beta prompt: the same
+    fixed-point check is applied between steps, but nothing waits on input.
+
+    Arguments:
+        term (Term): Term to reduce
+        max_steps (int | None): Step budget, None for unlimited
+        step (Callable): Performs one step, `Term.beta_reduce_step` by default;
+            the REPL passes one that records the step in history
+        on_step (Callable): Called with each new term and the step count
+        max_size (int | None): Largest `Term.size` a step may produce, None
+            for unlimited; catches terms that diverge by growing
+        terminates (bool): `term` is known to be strongly normalizing, e.g.
+            well typed; skips the fixed-point check. Budgets still apply,
+            since a term that terminates can still take very long
+        registry (HookRegistry): Scoped registry, e.g. a session's, that
+            observes this reduction besides the process-wide `hooks`
+
+    Returns:
+        tuple[Term, int]: The normal form and the number of steps taken
+
+    Throws:
+        FixedPointDetected: If a step leaves the term unchanged
+        ReductionBudgetExceeded: If `max_steps` steps did not reach normal form,
+            or the term outgrew `max_size`; the exception carries the last
+            term reached, and `on_budget` hooks are called first
+    """
+    step = step or (lambda t: t.beta_reduce_step())
+    if registry is not None:
+        with registry.scope():
+            return normalize(term, max_steps, step, on_step, max_size, terminates)
+    steps = 0
+    previous = None
+    while True:
+        if previous is not None and not terminates and is_fixed_point(previous, term):
+            raise FixedPointDetected(term=term)
+        if max_steps is not None and steps >= max_steps:
+            fire_event('on_budget', term, steps)
+            raise ReductionBudgetExceeded(term=term, steps=steps)
+        if max_size is not None and term.size > max_size:
+            fire_event('on_budget', term, steps)
+            raise ReductionBudgetExceeded(term=term, steps=steps, message=f"Term grew past {max_size} nodes before reaching normal form")
+        try:
+            reduced = step(term)
+        except ReductionOnNormalForm:
+            return term, steps
+        previous, term = term, reduced
+        steps += 1
+        if on_step:
+            on_step(term, steps)
+
+def choose_strategy(term: Term) -> tuple[str, bool]:
+    """TYPED_STRATEGY for well-typed terms, normal order otherwise
+
+    A term with a simple type is strongly normalizing: every strategy
+    reaches its normal form, and no step can leave it unchanged. Other terms
+    may only reach it by normal order.
+
+    Returns:
+        tuple[str, bool]: The strategy, and whether `term` is known to
+        terminate, to pass to `normalize` as `terminates`
+    """
+    if AUTO_STRATEGY and is_typable(term):
+        return TYPED_STRATEGY, True
+    return 'normal', False
+
+def normalize_auto(
+    term: Term,
+    max_steps: Optional[int] = DEFAULT_REDUCTION_BUDGET,
+    on_step: Optional[Callable[[Term, int], None]] = None,
+    max_size: Optional[int] = DEFAULT_SIZE_BUDGET
+) -> tuple[Term, int, str]:
+    """Like `normalize`, with the strategy chosen by `choose_strategy`
+
+    Well-typed terms run without the fixed-point check, which they cannot
+    need. `max_steps` and `max_size` apply to every term, so batch and
+    server callers stay bounded; pass None to run a well-typed term to the
+    end however long it takes.
+
+    Returns:
+        tuple[Term, int, str]: The normal form, the steps taken and the
+        strategy used
+    """
+    strategy, terminates = choose_strategy(term)
+    term, steps = normalize(term, max_steps, STRATEGIES[strategy], on_step, max_size, terminates)
+    return term, steps, strategy
@@ -0,0 +1,425 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# models/render.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import io
+import os
+from typing import Iterator, NamedTuple, Optional, TextIO
+from utils.config import load_env
+from models.model import Term, Variable, Abstraction, Application, is_generated, name_stem
+
+load_env()
+
+# Marker written in place of anything cut by a size or depth limit
+ELLIPSIS = '…'
+# Characters the REPL shows for a single term before eliding the rest
+DEFAULT_DISPLAY_LIMIT = int(os.getenv('DISPLAY_LIMIT', 4096))
+
+# MARK: Display Names
+# Binders renamed by the NameSupply, e.g. x#12, are shown by their stem when
+# nothing visible in their body is shown under that name too, and with as
+# few primes as needed otherwise.
+
+class _Scope(NamedTuple):
+    """Stack marker for leaving a binder whose name was looked up"""
+    name: str
+
+class _Names:
+    """Names shown for the binders in scope while a term is walked"""
+
+    def __init__(self):
+        self.shown: dict[str, list[str]] = {}
+        self.renamed = 0    # Binders in scope shown under another name
+
+    def enter(self, node: Abstraction) -> Optional[str]:
+        """The name to show for `node`'s binder, or None if it and its body show as written
+
+        Unless None is returned, `leave` must follow once the body is done.
+        """
+        name = node.var.name
+        if not self.renamed and not node.generated:
+            # Nothing in scope or below is shown under another name
+            return None
+        if is_generated(name) or self.renamed:
+            taken = {self.show(free) for free in node.free_variables()}
+            shown = name_stem(name) if is_generated(name) else name
+            while shown in taken:
+                shown += "'"
+        else:
+            shown = name
+        self.shown.setdefault(name, []).append(shown)
+        self.renamed += shown != name
+        return shown
+
+    def leave(self, name: str) -> None:
+        self.renamed -= self.shown[name].pop() != name
+
+    def show(self, name: str) -> str:
+        shown = self.shown.get(name)
+        return shown[-1] if shown else name
+
+# MARK: Token Streams
+# Each walk is iterative and yields output in order, so rendering stops as
+# soon as a limit is hit and deep terms never touch the recursion limit.
+
+def _elided(depth: int, max_depth: Optional[int]) -> bool:
+    return max_depth is not None and depth > max_depth
+
+def literal_tokens(term: Term, max_depth: Optional[int] = None, readable: bool = True) -> Iterator[str]:
+    """Pieces of `term.literal()`, e.g. `(\\x. x) (y)`
+
+    With `readable`, binders renamed by the NameSupply show their stem.
+    """
+    names = _Names()
+    stack: list = [(term, 0)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+            continue
+        if isinstance(item, _Scope):
+            names.leave(item.name)
+            continue
+        node, depth = item
+        if _elided(depth, max_depth):
+            yield ELLIPSIS
+        elif isinstance(node, Abstraction):
+            shown = names.enter(node) if readable else None
+            if shown is not None:
+                stack.append(_Scope(node.var.name))
+            yield f"(\\{shown or node.var.name}. "
+            stack += (")", (node.body, depth + 1))
+        elif isinstance(node, Application):
+            stack += (")", (node.value, depth + 1), " (", (node.function, depth + 1))
+        else:
+            yield names.show(node.name)
+
+def repr_tokens(term: Term, max_depth: Optional[int] = None, readable: bool = True) -> Iterator[str]:
+    """Pieces of `repr(term)`, e.g. `((λx. x) y)`"""
+    names = _Names()
+    stack: list = [(term, 0)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+            continue
+        if isinstance(item, _Scope):
+            names.leave(item.name)
+            continue
+        node, depth = item
+        if _elided(depth, max_depth):
+            yield ELLIPSIS
+        elif isinstance(node, Abstraction):
+            shown = names.enter(node) if readable else None
+            if shown is not None:
+                stack.append(_Scope(node.var.name))
+            yield f"(λ{shown or node.var.name}. "
+            stack += (")", (node.body, depth + 1))
+        elif isinstance(node, Application):
+            yield "("
+            stack += (")", (node.value, depth + 1), " ", (node.function, depth + 1))
+        else:
+            yield names.show(node.name)
+
+def tree_tokens(
+    term: Term,
+    max_depth: Optional[int] = None,
+    indent: str = "",
+    last: bool = True,
+    child: bool = False,
+    readable: bool = True
+) -> Iterator[str]:
+    """Pieces of `term.tree_str()`, one line per node"""
+    names = _Names()
+    stack: list = [(term, indent, last, child, 0)]
+    first = True
+    while stack:
+        item = stack.pop()
+        if isinstance(item, _Scope):
+            names.leave(item.name)
+            continue
+        node, indent, last, child, depth = item
+        if not first:
+            yield "\n"
+        first = False
+        prefix = f"{indent}{'└── ' if last else '├── '}" if child else ""
+        new_indent = indent + ("    " if last else "│   ")
+        if _elided(depth, max_depth):
+            yield prefix
+            yield ELLIPSIS
+        elif isinstance(node, Abstraction):
+            shown = names.enter(node) if readable else None
+            if shown is not None:
+                stack.append(_Scope(node.var.name))
+            shown = shown or node.var.name
+            yield f"{prefix}λ {shown}" if child else f"Abstraction λ {shown}"
+            stack.append((node.body, new_indent, True, True, depth + 1))
+        elif isinstance(node, Application):
+            yield f"{prefix}Applicate" if child else "Application"
+            stack.append((node.value, new_indent, True, True, depth + 1))
+            stack.append((node.function, new_indent, False, True, depth + 1))
+        else:
+            shown = names.show(node.name)
+            yield f"{prefix}{shown}" if child else f"Variable {shown}"
+
+# MARK: Whole Strings
+# Unlimited renders skip the generator machinery: appending to a list and
+# joining once is linear in the output and about as fast as the recursive
+# f-strings these replace on small terms.
+
+def _join(term: Term, abstraction_open: str, application_open: str, application_sep: str) -> str:
+    parts: list[str] = []
+    append = parts.append
+    names = _Names()
+    show = names.show
+    stack: list = [term]
+    push, pop = stack.append, stack.pop
+    while stack:
+        node = pop()
+        cls = node.__class__
+        if cls is str:
+            append(node)
+        elif cls is _Scope:
+            names.leave(node.name)
+        elif cls is Abstraction:
+            shown = names.enter(node)
+            if shown is not None:
+                push(_Scope(node.var.name))
+            append(abstraction_open)
+            append(shown or node.var.name)
+            append(". ")
+            push(")")
+            push(node.body)
+        elif cls is Application:
+            append(application_open)
+            push(")")
+            push(node.value)
+            push(application_sep)
+            push(node.function)
+        else:
+            append(show(node.name))
+    return ''.join(parts)
+
+def join_literal(term: Term) -> str:
+    """`term.literal()` without limits"""
+    return _join(term, "(\\", "", " (")
+
+def join_repr(term: Term) -> str:
+    """`repr(term)` without limits"""
+    return _join(term, "(λ", "(", " ")
+
+# MARK: Sinks
+def write_tokens(tokens: Iterator[str], sink: TextIO, max_chars: Optional[int] = None) -> bool:
+    """Write `tokens` to `sink`, stopping with an ellipsis after `max_chars`
+
+    Returns:
+        bool: True if anything was elided, by `max_chars` or by a depth limit
+    """
+    written = 0
+    elided = False
+    for token in tokens:
+        if token is ELLIPSIS:
+            elided = True
+        if max_chars is not None and written + len(token) > max_chars:
+            sink.write(token[:max_chars - written])
+            sink.write(ELLIPSIS)
+            return True
+        sink.write(token)
+        written += len(token)
+    return elided
+
+def write_literal(term: Term, sink: TextIO, max_chars: Optional[int] = None, max_depth: Optional[int] = None) -> bool:
+    """Stream `term.literal()` into `sink`; see `write_tokens` for the limits"""
+    return write_tokens(literal_tokens(term, max_depth), sink, max_chars)
+
+def write_repr(term: Term, sink: TextIO, max_chars: Optional[int] = None, max_depth: Optional[int] = None) -> bool:
+    """Stream `repr(term)` into `sink`; see `write_tokens` for the limits"""
+    return write_tokens(repr_tokens(term, max_depth), sink, max_chars)
+
+def write_tree(term: Term, sink: TextIO, max_chars: Optional[int] = None, max_depth: Optional[int] = None) -> bool:
+    """Stream `term.tree_str()` into `sink`; see `write_tokens` for the limits"""
+    return write_tokens(tree_tokens(term, max_depth), sink, max_chars)
+
+# MARK: String Rendering
+def _render(tokens: Iterator[str], max_chars: Optional[int]) -> str:
+    buffer = io.StringIO()
+    write_tokens(tokens, buffer, max_chars)
+    return buffer.getvalue()
+
+def _unlimited(term: Term, max_chars: Optional[int], max_depth: Optional[int]) -> bool:
+    # Levels are counted from 0 at the root, so a depth limit the term never
+    # reaches cuts nothing
+    return max_chars is None and (max_depth is None or term.depth <= max_depth + 1)
+
+def render_literal(term: Term, max_chars: Optional[int] = None, max_depth: Optional[int] = None) -> str:
+    """`term.literal()`, optionally cut to `max_chars` characters or `max_depth` levels
+
+    Example:
+        >>> render_literal(Application(Variable("f"), Variable("x")), max_chars=3)
+        'f (…'
+    """
+    if _unlimited(term, max_chars, max_depth):
+        return join_literal(term)
+    return _render(literal_tokens(term, max_depth), max_chars)
+
+def render_repr(term: Term, max_chars: Optional[int] = None, max_depth: Optional[int] = None) -> str:
+    """`repr(term)`, optionally cut to `max_chars` characters or `max_depth` levels"""
+    if _unlimited(term, max_chars, max_depth):
+        return join_repr(term)
+    return _render(repr_tokens(term, max_depth), max_chars)
+
+def render_tree(
+    term: Term,
+    max_chars: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    indent: str = "",
+    last: bool = True,
+    child: bool = False
+) -> str:
+    """`term.tree_str()`, optionally cut to `max_chars` characters or `max_depth` levels"""
+    return _render(tree_tokens(term, max_depth, indent, last, child), max_chars)
+
+# MARK: Shared Subterms
+# Reduction copies arguments by reference, so a term printed as a tree can be
+# exponentially larger than the objects it is made of. Structural hashing
+# finds every repeated subterm, and the let form prints each one once.
+
+def _hash_cons(term: Term) -> tuple[int, list[tuple]]:
+    """Numbers the distinct shapes in `term`, children before parents
+
+    Returns:
+        tuple[int, list[tuple]]: The root's shape number and every shape, as
+            `('v', name)`, `('λ', name, body)` or `('@', function, value)`
+            with children given by shape number
+    """
+    numbers: dict[int, int] = {}
+    table: dict[tuple, int] = {}
+    shapes: list[tuple] = []
+    stack: list = [(term, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in numbers:
+            continue
+        if isinstance(node, Abstraction):
+            if not expanded:
+                stack += ((node, True), (node.body, False))
+                continue
+            shape = ('λ', node.var.name, numbers[id(node.body)])
+        elif isinstance(node, Application):
+            if not expanded:
+                stack += ((node, True), (node.value, False), (node.function, False))
+                continue
+            shape = ('@', numbers[id(node.function)], numbers[id(node.value)])
+        else:
+            shape = ('v', node.name)
+        number = table.get(shape)
+        if number is None:
+            number = table[shape] = len(shapes)
+            shapes.append(shape)
+        numbers[id(node)] = number
+    return numbers[id(term)], shapes
+
+def _binding_names(taken: set[str]) -> Iterator[str]:
+    """a, b, ..., z, a1, b1, ... skipping any name in `taken`"""
+    suffix = 0
+    while True:
+        for letter in 'abcdefghijklmnopqrstuvwxyz':
+            name = f"{letter}{suffix or ''}"
+            if name not in taken:
+                yield name
+        suffix += 1
+
+def share_subterms(term: Term, min_size: int = 2) -> tuple[list[tuple[str, Term]], Term]:
+    """Splits `term` into let bindings for its repeated subterms and a body
+
+    Every subterm of at least `min_size` nodes that occurs more than once is
+    bound to a fresh name, and each occurrence, in the body or in a later
+    binding, is replaced by a Variable of that name. Bindings are
+    abbreviations in the sense of DEF: expanding them in place gives back
+    `term`, so their free variables refer to the binders around each use.
+
+    The work is linear in the number of distinct subterms, however large
+    the expanded tree is.
+
+    Returns:
+        tuple[list[tuple[str, Term]], Term]: Bindings, each only referring
+            to earlier ones, and the body; no bindings if nothing repeats
+
+    Example:
+        >>> omega = parse_lambda(r"\\x. x (x)")
+        >>> share_subterms(Application(omega, omega))
+        ([('a', (λx. (x x)))], (a a))
+    """
+    root, shapes = _hash_cons(term)
+
+    uses = [0] * len(shapes)
+    sizes = [1] * len(shapes)
+    uses[root] = 1
+    for number, shape in enumerate(shapes):
+        if shape[0] == 'λ':
+            uses[shape[2]] += 1
+            sizes[number] += sizes[shape[2]]
+        elif shape[0] == '@':
+            uses[shape[1]] += 1
+            uses[shape[2]] += 1
+            sizes[number] += sizes[shape[1]] + sizes[shape[2]]
+
+    names = _binding_names({shape[1] for shape in shapes if shape[0] != '@'})
+    bound = {
+        number: next(names) for number, shape in enumerate(shapes)
+        if shape[0] != 'v' and uses[number] > 1 and sizes[number] >= min_size
+    }
+
+    # Shapes are ordered children first, so each one's parts already exist
+    built: list[Term] = []
+    def part(number: int) -> Term:
+        return Variable(bound[number]) if number in bound else built[number]
+    for shape in shapes:
+        if shape[0] == 'λ':
+            built.append(Abstraction(Variable(shape[1]), part(shape[2])))
+        elif shape[0] == '@':
+            built.append(Application(part(shape[1]), part(shape[2])))
+        else:
+            built.append(Variable(shape[1]))
+    return [(name, built[number]) for number, name in bound.items()], built[root]
+
+def let_tokens(term: Term, style: str = 'literal', min_size: int = 2) -> Iterator[str]:
+    """Pieces of `term` in let form, in the `literal`, `repr` or `tree` style
+
+    Each binding goes on its own line as `let a = ... in`, followed by the
+    body; in `tree` style each binding's tree follows a `let a =` line and
+    the body's tree follows `in`.
+    """
+    walk = {'literal': literal_tokens, 'repr': repr_tokens, 'tree': tree_tokens}[style]
+    # Bindings are cut out of their scope, so names are shown as they are
+    def tokens(part: Term) -> Iterator[str]:
+        return walk(part, readable=False)
+    bindings, body = share_subterms(term, min_size)
+    for name, bound in bindings:
+        if style == 'tree':
+            yield f"let {name} =\n"
+            yield from tokens(bound)
+            yield "\n"
+        else:
+            yield f"let {name} = "
+            yield from tokens(bound)
+            yield " in\n"
+    if bindings and style == 'tree':
+        yield "in\n"
+    yield from tokens(body)
+
+def render_let(term: Term, style: str = 'literal', max_chars: Optional[int] = None, min_size: int = 2) -> str:
+    """`term` with repeated subterms printed once as let bindings; see `let_tokens`"""
+    return _render(let_tokens(term, style, min_size), max_chars)
+
+def render_term(term: Term, style: str = 'literal', shared: bool = False) -> str:
+    """`term` in the given style, in let form if `shared` is set
+
+    The let form cannot be parsed back, so it is only produced on request.
+    """
+    if shared:
+        return render_let(term, style)
+    return {'literal': render_literal, 'repr': render_repr, 'tree': render_tree}[style](term)
@@ -0,0 +1,223 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# models/types.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import itertools
+import os
+from typing import Optional, Union
+from utils.config import load_env
+from models.model import Term, Variable, Abstraction, Application
+from models.exceptions import *
+
+load_env()
+
+# Characters of a type shown before it is cut short
+DEFAULT_TYPE_DISPLAY_LIMIT = int(os.getenv('TYPE_DISPLAY_LIMIT', 400))
+
+# Type variable names in order of first appearance; λ is left out
+_GREEK = 'αβγδεζηθικμνξοπρστυφχψω'
+
+# MARK: Types
+class TypeVariable:
+    """An unknown type, to be solved by unification.
+
+    Attributes:
+        id (int): Number telling type variables apart
+    """
+    def __init__(self, id: int):
+        self.id = id
+
+    def __repr__(self):
+        return f"TypeVariable({self.id})"
+
+class Arrow:
+    """The type of functions from `argument` to `result`.
+
+    Attributes:
+        argument (Type): Type of the parameter
+        result (Type): Type of the body
+    """
+    def __init__(self, argument: "Type", result: "Type"):
+        self.argument = argument
+        self.result = result
+
+    def __repr__(self):
+        return f"Arrow({self.argument!r}, {self.result!r})"
+
+Type = Union[TypeVariable, Arrow]
+
+# MARK: Inference
+class TypeInference:
+    """Principal simple types by unification, as in Hindley–Milner.
+
+    The language has no `let`, so nothing is generalized. Definitions are
+    substituted into a term before it is typed, though, and every use of one
+    is inferred afresh, which gives them the polymorphism a `let` would.
+    Free variables get one unknown type each.
+
+    Attributes:
+        bindings (dict): Solved type variables, by id
+    """
+    def __init__(self):
+        self.bindings: dict[int, Type] = {}
+        self._ids = itertools.count()
+
+    def fresh(self) -> TypeVariable:
+        return TypeVariable(next(self._ids))
+
+    def resolve(self, type: Type) -> Type:
+        """Follows solved type variables to the type they stand for"""
+        while isinstance(type, TypeVariable) and type.id in self.bindings:
+            type = self.bindings[type.id]
+        return type
+
+    def occurs(self, variable: TypeVariable, type: Type) -> bool:
+        """Checks whether `variable` appears in `type` once resolved"""
+        stack = [type]
+        seen = set()
+        while stack:
+            type = self.resolve(stack.pop())
+            if type is variable:
+                return True
+            if isinstance(type, Arrow) and id(type) not in seen:
+                seen.add(id(type))
+                stack += (type.argument, type.result)
+        return False
+
+    def unify(self, left: Type, right: Type, term: Optional[Term] = None) -> None:
+        """Solves type variables so that `left` and `right` become equal
+
+        Throws:
+            TypeInferenceError: If that would need a type containing itself
+        """
+        pending = [(left, right)]
+        while pending:
+            left, right = pending.pop()
+            left, right = self.resolve(left), self.resolve(right)
+            if left is right:
+                continue
+            if isinstance(right, TypeVariable):
+                left, right = right, left
+            if isinstance(left, TypeVariable):
+                if self.occurs(left, right):
+                    raise TypeInferenceError(term, "Term has no simple type: a type would have to contain itself")
+                self.bindings[left.id] = right
+            else:
+                pending += ((left.argument, right.argument), (left.result, right.result))
+
+    def infer(self, term: Term) -> Type:
+        """Infers the principal type of `term`, walking it iteratively
+
+        Throws:
+            TypeInferenceError: If `term` has no simple type
+        """
+        scopes: dict[str, list[Type]] = {}
+        free: dict[str, Type] = {}
+        results: list[Type] = []
+        stack: list[tuple[Term, bool]] = [(term, False)]
+        while stack:
+            node, visited = stack.pop()
+            if isinstance(node, Variable):
+                bound = scopes.get(node.name)
+                if bound:
+                    results.append(bound[-1])
+                else:
+                    if node.name not in free:
+                        free[node.name] = self.fresh()
+                    results.append(free[node.name])
+            elif isinstance(node, Abstraction):
+                if visited:
+                    results.append(Arrow(scopes[node.var.name].pop(), results.pop()))
+                else:
+                    scopes.setdefault(node.var.name, []).append(self.fresh())
+                    stack += ((node, True), (node.body, False))
+            elif isinstance(node, Application):
+                if visited:
+                    value, function = results.pop(), results.pop()
+                    result = self.fresh()
+                    self.unify(function, Arrow(value, result), node)
+                    results.append(result)
+                else:
+                    stack += ((node, True), (node.value, False), (node.function, False))
+            else:
+                raise InvalidTermError(term=node, message=f"Cannot type {node!r}")
+        return self.solved(results.pop())
+
+    def solved(self, type: Type) -> Type:
+        """`type` with every solved variable replaced, sharing repeated parts"""
+        built: dict[int, Type] = {}
+        stack = [type]
+        while stack:
+            node = self.resolve(stack[-1])
+            if id(node) in built:
+                stack.pop()
+            elif isinstance(node, TypeVariable):
+                built[id(node)] = node
+                stack.pop()
+            else:
+                argument, result = self.resolve(node.argument), self.resolve(node.result)
+                missing = [part for part in (result, argument) if id(part) not in built]
+                if missing:
+                    stack += missing
+                    continue
+                built[id(node)] = Arrow(built[id(argument)], built[id(result)])
+                stack.pop()
+        return built[id(self.resolve(type))]
+
+def infer_type(term: Term) -> Type:
+    """Principal simple type of `term`
+
+    Throws:
+        TypeInferenceError: If `term` has no simple type, e.g. `\\x. x (x)`
+
+    Example:
+        >>> type_literal(infer_type(parse_term(r"\\f. \\x. f (x)")))
+        '(α → β) → α → β'
+    """
+    return TypeInference().infer(term)
+
+def is_typable(term: Term) -> bool:
+    """Checks whether `term` has a simple type, and so is strongly normalizing"""
+    try:
+        infer_type(term)
+        return True
+    except TypeInferenceError:
+        return False
+
+# MARK: Rendering
+def _variable_name(number: int) -> str:
+    name = _GREEK[number % len(_GREEK)]
+    return name if number < len(_GREEK) else f"{name}{number // len(_GREEK)}"
+
+def type_literal(type: Type, limit: Optional[int] = DEFAULT_TYPE_DISPLAY_LIMIT) -> str:
+    """Writes `type` with right-associative arrows, e.g. `(α → β) → α → β`
+
+    Type variables are named in order of first appearance. Principal types
+    can be far larger written out than as shared structure, so output
+    stops at about `limit` characters, None for no limit.
+    """
+    names: dict[int, str] = {}
+    parts: list[str] = []
+    length = 0
+    stack: list[Union[Type, str]] = [type]
+    while stack:
+        if limit is not None and length > limit:
+            parts.append(" …")
+            break
+        item = stack.pop()
+        if isinstance(item, str):
+            part = item
+        elif isinstance(item, TypeVariable):
+            if item.id not in names:
+                names[item.id] = _variable_name(len(names))
+            part = names[item.id]
+        else:
+            stack += (item.result, " → ")
+            stack += (")", item.argument, "(") if isinstance(item.argument, Arrow) else (item.argument,)
+            continue
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
@@ -13,9 +13,23 @@ from utils.history import HistoryStore
 import re
 from colors import *
 
-# Constants
-histore_temp = HistoryStore()
-db_temp = TermDB()
+# Shared stores, created on first use by get_default_db / get_default_history
+_default_db: Optional[TermDB] = None
+_default_history: Optional[HistoryStore] = None
+
+def get_default_db() -> TermDB:
+    """Return the process-wide TermDB used when no session database is given."""
+    global _default_db
+    if _default_db is None:
+        _default_db = TermDB()
+    return _default_db
+
+def get_default_history() -> HistoryStore:
+    """Return the process-wide HistoryStore used when no session history is given."""
+    global _default_history
+    if _default_history is None:
+        _default_history = HistoryStore()
+    return _default_history
 
 def allowed_identifier(identifier: str) -> bool:
     """Test whether if the given name is valid as an identifier."""
@@ -113,43 +127,58 @@ def parse_abstraction(literal: str) -> Term:
     
     return Abstraction(Variable(var_part), parse_lambda(body_part.strip()))
 
-def auto_alpha_convert(term: Term, bound_vars: set[str] = None, db_vars: set[str] = None) -> Term:
+def auto_alpha_convert(term: Term, bound_vars: set[str] = None, db_vars: set[str] = None, supply: NameSupply = names) -> Term:
     """
-    Alpha-conversion to avoid variable capture and name clashes with bound variables or database variables.
+    Alpha-conversion to the Barendregt convention: every binder gets a name of its own.
+
+    A binder is renamed, with a fresh name from `supply`, when its name is
+    already bound by an enclosing or earlier binder, is free in the term, or
+    is a database variable. Reduction then rarely needs to rename anything:
+    capture is only possible once an argument has been copied under a binder.
+    Subterms that need no renaming are returned as they are, not copied.
     
     Arguments:
         term (Term): The term to convert
         bound_vars (set[str], optional): Set of bound variables in the current scope
         db_vars (set[str], optional): Set of variables already present in the database or history
+        supply (NameSupply, optional): Source of fresh names, the process-wide one by default
     
     Returns:
         Term: The alpha-converted term
     """
-    if bound_vars is None:
-        bound_vars = set()
-
-    if db_vars is None:
-        db_vars = set()
-
-    if isinstance(term, Variable):
-        # Leave free variables alone, no conversion
-        return term
-    elif isinstance(term, Abstraction):
-        # If the bound variable is in the bound set or the db_vars, rename it
-        if term.var.name in bound_vars or term.var.name in db_vars:
-            _var = fresh_variable(term.var.name, lambda x: x in bound_vars or x in db_vars)
-            term = term.alpha_conversion(_var)
-        new_bound_vars = bound_vars | {term.var.name}
-        term.body = auto_alpha_convert(term.body, new_bound_vars, db_vars)
-    
-    elif isinstance(term, Application):
-        term.function = auto_alpha_convert(term.function, bound_vars, db_vars)
-        term.value = auto_alpha_convert(term.value, bound_vars, db_vars)
-    
-    else:
-        raise NotImplementedError(f"WTF IS THIS THING??? {type(term)}")
-
-    return term
+    taken = set(term.free_variables()) | set(bound_vars or ()) | set(db_vars or ())
+    scopes: dict[str, list[str]] = {}
+    done: list[Term] = []
+    stack: list = [term]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, tuple):
+            # Both children are done: rebuild only if one of them changed
+            node, name = item
+            if isinstance(node, Abstraction):
+                body = done.pop()
+                scopes[node.var.name].pop()
+                unchanged = name == node.var.name and body is node.body
+                done.append(node if unchanged else Abstraction(Variable(name), body))
+            else:
+                value, function = done.pop(), done.pop()
+                unchanged = function is node.function and value is node.value
+                done.append(node if unchanged else Application(function, value))
+        elif isinstance(item, Abstraction):
+            name = item.var.name
+            if name in taken:
+                name = supply.fresh(name, taken.__contains__)
+            taken.add(name)
+            scopes.setdefault(item.var.name, []).append(name)
+            stack += ((item, name), item.body)
+        elif isinstance(item, Application):
+            stack += ((item, None), item.value, item.function)
+        elif isinstance(item, Variable):
+            scope = scopes.get(item.name)
+            done.append(Variable(scope[-1]) if scope and scope[-1] != item.name else item)
+        else:
+            raise NotImplementedError(f"WTF IS THIS THING??? {type(item)}")
+    return done[0]
 
 
 def substitute_free_vars(term: Term, db_vars: dict[str, Term]) -> Term:
@@ -172,24 +201,46 @@ def substitute_free_vars(term: Term, db_vars: dict[str, Term]) -> Term:
     elif isinstance(term, Abstraction):
         # In abstraction, bound variables should not be substituted.
         # So we recursively substitute in the body.
-        term.body = substitute_free_vars(term.body, db_vars)
+        return Abstraction(term.var, substitute_free_vars(term.body, db_vars))
     elif isinstance(term, Application):
         # Recursively substitute in both function and argument.
-        term.function = substitute_free_vars(term.function, db_vars)
-        term.value = substitute_free_vars(term.value, db_vars)
+        return Application(
+            substitute_free_vars(term.function, db_vars),
+            substitute_free_vars(term.value, db_vars)
+        )
     else:
         raise NotImplementedError(f"Unexpected term type: {type(term)}")
     return term
 
 
-def parse_term(literal: str) -> Term:
+def referenced_identifiers(literal: str) -> set[str]:
+    """Free identifiers a literal refers to before any definitions are substituted in."""
+    return {name for name in parse_lambda(literal).free_variables() if not name.startswith('%')}
+
+def parse_term(literal: str, db: Optional[TermDB] = None, history: Optional[HistoryStore] = None) -> Term:
+    """
+    Parse a literal and resolve its free identifiers against stored definitions and history.
+
+    Arguments:
+        literal (str): Lambda term literal, e.g. "succ (C1)"
+        db (TermDB, optional): Definitions to resolve against; defaults to the shared TermDB
+        history (HistoryStore, optional): Source of %n entries; defaults to the shared HistoryStore
+
+    Returns:
+        Term: The parsed term with known identifiers substituted
+    """
+    db = get_default_db() if db is None else db
+    history = get_default_history() if history is None else history
     unreplaced = parse_lambda(literal)
-    unreplaced = auto_alpha_convert(unreplaced, None, db_temp.get_vars())
-    db_vars = db_temp.get_all_terms()
-    his_vars = histore_temp.list_entries()
+    unreplaced = auto_alpha_convert(unreplaced, None, db.get_vars())
+    # Only the identifiers actually referenced need to be fetched and parsed
+    free_names = unreplaced.free_variables()
+    db_vars = db.get_terms(free_names)
+    his_vars = history.get_entries(free_names)
     combined_vars = [*db_vars, *his_vars]
     unreplaced = substitute_free_vars(unreplaced, combined_vars)
-    return unreplaced
+    # Definitions spliced in bring their own binders, often the same names
+    return auto_alpha_convert(unreplaced) if combined_vars else unreplaced
 
 def parse_application(literal: str) -> Term:
     """Parse an application expression."""
@@ -203,43 +254,46 @@ def parse_application(literal: str) -> Term:
         current = Application(current, term)
     return current
 
+# Sample literals covering clashes, divergence and Church arithmetic
+TEST_LITERALS = [
+    r"(\f'. f') ((\x. x))",
+    r"((\(n). ((\(f). ((\(x). ((f) (((n) (f)) (x))))))))) ((\(f). ((\(x). (x)))))",
+    r"(\x. (x (x)))",  # Checks for variable-parameter name clash
+    r"(((\x. ((x (x)))) (\y. ((y (y))))))",  # Infinite recursion
+    r"(((\x. ((\y. ((x) (y))))) (a)) (b))",  # Reduces to (a b)
+    r"(((\x. ((x ((\y. ((y) (y))))))) (z)))",  # Reduces to (z (\y. (y y)))
+    r"((((\x. ((\y. ((x) (y) (y))))) ((\z. (z)))) ((\w. (w)))))",  # Reduces to identity function
+    r"((((\m. ((\n. ((\f. ((m) ((n) (f)))))))) ((\f. ((\x. ((f) (x))))))) ((\f. ((\x. ((f) ((f) (x)))))))))",  # Church numeral 2
+    r"(((S) (K)) (K) (a))",  # Reduces to a
+    r"(((\x. ((x) (x)))) ((\y. ((\z. ((y) ((y) (z))))))))",  # Infinite pattern growth
+    r"((((\x. ((\y. ((x) (y) (x))))) ((\z. (z)))) ((a) (b))))",  # Reduces to ((a b) I)
+    r"((Y) (g))",  # Infinite recursion
+    r"((((\x. ((\y. ((x) (y))))) ((\x. ((x) (x))))) ((\y. ((y) (y))))))",  # Infinite loop
+    r"((((\x. ((\y. ((\z. ((x) (z) ((y) (z)))))))) ((\a. (a)))) ((\b. (b)))))",  # Reduces to (\z. (z z))
+    r"(((\x. ((x) ((\y. ((x) (y)))))) ((\z. (z)))))",  # Reduces to identity function
+    r"((((\m. ((\n. ((m) (((n) (f)) (x))))))) ((\f. ((\x. ((f) ((f) (x)))))))) ((\f. ((\x. ((f) ((f) ((f) (x)))))))))",  # f^6 x
+    r"(((((\x. ((\y. ((\z. ((x) ((y) (z)))))))) ((\a. (a)))) ((\b. (b)))) ((\c. (c)))))",  # Reduces to identity function
+    r"((((\x. ((\y. ((x) ((y) (x)))))) ((\z. (z)))) ((\w. (w)))))",  # Reduces to identity function
+    r"((((\x. ((\y. ((\z. ((x) ((y) (z)))))))) ((\a. ((\b. ((a) (b))))))) ((\c. ((\d. ((c) (d))))))))",  # Complex abstraction
+    r"(((\x. ((x) ((x) ((x)))))) ((\y. ((y) ((y) ((y)))))))",  # Accelerated divergence
+    r"((((\x. ((\y. ((x) ((x) (y)))))) ((\z. (z)))) (a)))",  # Reduces to a
+    r"(((((\x. ((\y. ((x) (y)))))) ((\x. ((\y. (x)))))) (a)) (b))",  # Reduces to a
+    r"(((((\x. ((\y. ((x)))))) (a)) (b)) (c))",  # Reduces to (a c)
+    r"(((((\x. ((\y. ((\z. ((x) ((z) (y))))))))) (a)) (b) (c)))",  # Reduces to (a c b)
+    r"(((\n. ((\f. ((\x. ((f) (((n) (f)) (x))))))))) ((\f. ((\x. ((f) ((f) (x))))))))",  # Successor of Church numeral 2
+    r"((((\x. ((\y. ((\z. ((x) ((y) (z))))))))) ((\a. (a)))) ((\b. (b))))",  # Reduces to identity function
+    r"(((\x. ((\y. ((x) ((y)))))) ((\z. (z)))) ((\w. (w))))",  # Simple application
+    r"((((\x. ((\y. ((\z. ((x) ((y) ((z))))))))) ((\a. (a)))) ((\b. (b)))) ((\c. (c))))",  # Nested application
+    r"(((\x. ((\y. ((x) ((y)))))) ((\z. ((z) ((z)))))) ((\w. ((w) ((w))))))",  # Higher-order application
+    r"(((\x. ((\y. ((x) ((y)))))) ((\z. (z)))) (((\w. (w))) ((\v. (v)))))",  # Application with nested terms
+    r"((((\x. ((\y. ((\z. ((x) ((y) ((z))))))))) ((\a. ((\b. ((a) (b))))))) ((\c. ((\d. ((c) (d))))))) ((\e. ((\f. ((e) (f)))))))",  # Complex nested application
+    r"((((\x. ((\y. ((\z. ((x) ((y) ((z)))))))))) ((\a. (a)))) (((\b. (b))) ((\c. (c)))))",  # Mixed abstraction and application
+    r"(((\x. ((\y. ((x) ((y)))))) ((\z. (z)))) ((\w. ((\v. ((w) (v)))))))",  # Currying with nested applications
+    r"(((\x. ((\y. ((x) ((y)))))) ((\z. ((z) ((z)))))) (((\w. (w))) ((\v. ((v) ((v)))))))",  # Higher-order currying
+]
+
 if __name__ == "__main__":
-    test_literals = [
-        r"(\f'. f') ((\x. x))",
-        r"((\(n). ((\(f). ((\(x). ((f) (((n) (f)) (x))))))))) ((\(f). ((\(x). (x)))))",
-        r"(\x. (x (x)))",  # Checks for variable-parameter name clash
-        r"(((\x. ((x (x)))) (\y. ((y (y))))))",  # Infinite recursion
-        r"(((\x. ((\y. ((x) (y))))) (a)) (b))",  # Reduces to (a b)
-        r"(((\x. ((x ((\y. ((y) (y))))))) (z)))",  # Reduces to (z (\y. (y y)))
-        r"((((\x. ((\y. ((x) (y) (y))))) ((\z. (z)))) ((\w. (w)))))",  # Reduces to identity function
-        r"((((\m. ((\n. ((\f. ((m) ((n) (f)))))))) ((\f. ((\x. ((f) (x))))))) ((\f. ((\x. ((f) ((f) (x)))))))))",  # Church numeral 2
-        r"(((S) (K)) (K) (a))",  # Reduces to a
-        r"(((\x. ((x) (x)))) ((\y. ((\z. ((y) ((y) (z))))))))",  # Infinite pattern growth
-        r"((((\x. ((\y. ((x) (y) (x))))) ((\z. (z)))) ((a) (b))))",  # Reduces to ((a b) I)
-        r"((Y) (g))",  # Infinite recursion
-        r"((((\x. ((\y. ((x) (y))))) ((\x. ((x) (x))))) ((\y. ((y) (y))))))",  # Infinite loop
-        r"((((\x. ((\y. ((\z. ((x) (z) ((y) (z)))))))) ((\a. (a)))) ((\b. (b)))))",  # Reduces to (\z. (z z))
-        r"(((\x. ((x) ((\y. ((x) (y)))))) ((\z. (z)))))",  # Reduces to identity function
-        r"((((\m. ((\n. ((m) (((n) (f)) (x))))))) ((\f. ((\x. ((f) ((f) (x)))))))) ((\f. ((\x. ((f) ((f) ((f) (x)))))))))",  # f^6 x
-        r"(((((\x. ((\y. ((\z. ((x) ((y) (z)))))))) ((\a. (a)))) ((\b. (b)))) ((\c. (c)))))",  # Reduces to identity function
-        r"((((\x. ((\y. ((x) ((y) (x)))))) ((\z. (z)))) ((\w. (w)))))",  # Reduces to identity function
-        r"((((\x. ((\y. ((\z. ((x) ((y) (z)))))))) ((\a. ((\b. ((a) (b))))))) ((\c. ((\d. ((c) (d))))))))",  # Complex abstraction
-        r"(((\x. ((x) ((x) ((x)))))) ((\y. ((y) ((y) ((y)))))))",  # Accelerated divergence
-        r"((((\x. ((\y. ((x) ((x) (y)))))) ((\z. (z)))) (a)))",  # Reduces to a
-        r"(((((\x. ((\y. ((x) (y)))))) ((\x. ((\y. (x)))))) (a)) (b))",  # Reduces to a
-        r"(((((\x. ((\y. ((x)))))) (a)) (b)) (c))",  # Reduces to (a c)
-        r"(((((\x. ((\y. ((\z. ((x) ((z) (y))))))))) (a)) (b) (c)))",  # Reduces to (a c b)
-        r"(((\n. ((\f. ((\x. ((f) (((n) (f)) (x))))))))) ((\f. ((\x. ((f) ((f) (x))))))))",  # Successor of Church numeral 2
-        r"((((\x. ((\y. ((\z. ((x) ((y) (z))))))))) ((\a. (a)))) ((\b. (b))))",  # Reduces to identity function
-        r"(((\x. ((\y. ((x) ((y)))))) ((\z. (z)))) ((\w. (w))))",  # Simple application
-        r"((((\x. ((\y. ((\z. ((x) ((y) ((z))))))))) ((\a. (a)))) ((\b. (b)))) ((\c. (c))))",  # Nested application
-        r"(((\x. ((\y. ((x) ((y)))))) ((\z. ((z) ((z)))))) ((\w. ((w) ((w))))))",  # Higher-order application
-        r"(((\x. ((\y. ((x) ((y)))))) ((\z. (z)))) (((\w. (w))) ((\v. (v)))))",  # Application with nested terms
-        r"((((\x. ((\y. ((\z. ((x) ((y) ((z))))))))) ((\a. ((\b. ((a) (b))))))) ((\c. ((\d. ((c) (d))))))) ((\e. ((\f. ((e) (f)))))))",  # Complex nested application
-        r"((((\x. ((\y. ((\z. ((x) ((y) ((z)))))))))) ((\a. (a)))) (((\b. (b))) ((\c. (c)))))",  # Mixed abstraction and application
-        r"(((\x. ((\y. ((x) ((y)))))) ((\z. (z)))) ((\w. ((\v. ((w) (v)))))))",  # Currying with nested applications
-        r"(((\x. ((\y. ((x) ((y)))))) ((\z. ((z) ((z)))))) (((\w. (w))) ((\v. ((v) ((v)))))))",  # Higher-order currying
-    ]
+    test_literals = TEST_LITERALS
     c = 0
     passed = 0
     for literal in test_literals:
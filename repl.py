@@ -5,45 +5,51 @@
 # 
 # Makabaka1880, 2025. All rights reserved.
 
-import readline
+import time
+_import_started = time.perf_counter()
+
 from preproc import normalize_blank
 from parser import *
 from models.exceptions import *
 from utils.history import HistoryStore
 from utils.persistence import TermDB
+from utils.trace import ReductionTrace
+from models.hooks import HookRegistry
+from models.reduction import normalize, choose_strategy, is_fixed_point, DEFAULT_REDUCTION_BUDGET
+from models.types import infer_type, type_literal
+from models.render import render_literal, render_repr, render_term, DEFAULT_DISPLAY_LIMIT
 from colors import italic_text, bold_text, IO_label, status_label
 from utils.security import check_for_dangerous_regex_pattern
-import subprocess
-import requests
+import atexit
+import json
+import os
+import shutil
+import sys
+import threading
 from devconst import *
 
-counter = 0
+# readline, signal and argparse are imported where they are used, so that
+# startup only pays for what the chosen mode needs
+_imports_done = time.perf_counter()
+
+# Terminal width, measured once and kept until the terminal reports a resize
+_terminal_width: Optional[int] = None
 
 def width():
     """Get the width of the terminal window"""
-    try:
-        result = subprocess.run(['tput', 'cols'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-        cols = int(result.stdout.decode().strip())
-        if cols > 0:
-            return cols
-    except Exception:
-        # Fallback for Docker or non-interactive environments
-        return int(os.environ.get("COLUMNS", 80))
-    
-    # The following code will be replaced when deployed on a server.
-    # To further contributors, DO NOT REMOVE THIS CODE.
-    # It is a marker for the server update.
-    # This code will be run on the server backend, and if False will be replaced with if True.
-    if False: # MARKER:SERVER_UPDATE1
-        response = requests.get("http://localhost:5050/api/cols", verify=False)
-        if response.status_code == 200:
-            return int(response.json())
-        else:
-            raise ValueError(f"Failed to fetch rows: {response.status_code} {response.reason}")
-            
-    return int(result.stdout.decode().strip())
+    global _terminal_width
+    if _terminal_width is None:
+        # Asks the tty directly; falls back for Docker or non-interactive environments
+        fallback = int(os.environ.get("COLUMNS", 80))
+        _terminal_width = shutil.get_terminal_size((fallback, 24)).columns or fallback
+    return _terminal_width
+
+def refresh_width(*_):
+    """Forget the cached terminal width; installed as the SIGWINCH handler"""
+    global _terminal_width
+    _terminal_width = None
 
-def filler(width, *text, regard_labels: bool = True):
+def filler(width, *text, regard_labels: bool = True, counter: int = 0):
     """Width of fillers needed to fill a line of certain width with text"""
     """Return a string of spaces to fill the line"""
     returned =  (width - sum(len(t) for t in text) - len(text) + 1)
@@ -53,83 +59,179 @@ def filler(width, *text, regard_labels: bool = True):
         return returned
 
 class REPLSession:
-    def __init__(self):
-        self.db: TermDB = TermDB()
-        self.history: HistoryStore = HistoryStore()
+    def __init__(self, db: Optional[TermDB] = None, history: Optional[HistoryStore] = None):
+        self.db: TermDB = get_default_db() if db is None else db
+        # Each session gets its own %n namespace unless a history is shared explicitly
+        self.history: HistoryStore = HistoryStore() if history is None else history
         self.current_term: Term = None
         self.running: bool = True
         self.output_var: Term = None
+        self.counter: int = 0                   # Index of the next %n entry
+        self.columns: Optional[int] = None      # Client-reported width; None asks the terminal
+        self.hooks = HookRegistry(scoped=True)  # Observers of this session's reductions only
         self._init_standard_library()
 
+    def width(self) -> int:
+        """Width of this session's display"""
+        return self.columns or width()
+
+    def filler(self, *text, regard_labels: bool = True) -> int:
+        """`filler` against this session's width and counter"""
+        return filler(self.width(), *text, regard_labels=regard_labels, counter=self.counter)
+
     def _init_standard_library(self):
         """Store built-in terms in DB"""
         std_terms = {
         }
         
-        for name, term in std_terms.items():
-            self.db.insert_term(name, term)
+        self.db.insert_many(std_terms.items())
 class REPLInterface:
-    """User interface components"""
-    
-    @staticmethod
-    def get_lambda_prompt() -> str:
-        return f"{IO_label('lambda_prompt', counter)} "
+    """User interface components
+
+    Output is buffered and written in one go by `flush`, which runs before
+    every prompt and after every command, so printing thousands of
+    reduction steps costs a handful of writes instead of one per line.
+    """
+    # Buffered characters that force an early flush
+    flush_threshold = 1 << 16
+
+    def __init__(self, session: Optional[REPLSession] = None, stream=None):
+        self.session = session
+        self.stream = stream
+        self._buffer: list[str] = []
+        self._buffered = 0
+
+    @property
+    def counter(self) -> int:
+        return self.session.counter if self.session else 0
+
+    # MARK: Output Buffer
+    def write(self, text: str):
+        """Queue raw text for the next flush"""
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.flush_threshold:
+            self.flush()
+
+    def flush(self):
+        """Write everything queued since the last flush"""
+        if not self._buffer:
+            return
+        stream = self.stream or sys.stdout
+        stream.write(''.join(self._buffer))
+        stream.flush()
+        self._buffer.clear()
+        self._buffered = 0
+
+    def emit(self, label: str, line: str, end='\n'):
+        """Write one labelled line; subclasses redirect output here"""
+        self.write(f"{IO_label(label, self.counter)} {line}{end}")
+
+    def input(self, prompt: str = '') -> str:
+        """Flush pending output, then read a line"""
+        self.flush()
+        return input(prompt)
+
+    def confirm(self, message: str) -> bool:
+        """Ask a yes/no question"""
+        self.write(self.get_security_prompt())
+        return self.input(f"{message} (y/n): ").strip().lower() == 'y'
+
+    # MARK: Terminal Geometry
+    def resize(self, columns: Optional[int] = None):
+        """Take a new display width, or re-measure the terminal when none is given"""
+        if self.session is not None and columns is not None:
+            self.session.columns = columns
+        else:
+            refresh_width()
+
+    def watch_resize(self):
+        """Re-measure the terminal on SIGWINCH instead of on every prompt"""
+        import signal
+        if hasattr(signal, 'SIGWINCH'):
+            signal.signal(signal.SIGWINCH, refresh_width)
+
+    def get_lambda_prompt(self) -> str:
+        return f"{IO_label('lambda_prompt', self.counter)} "
         
-    @staticmethod
-    def get_alpha_prompt() -> str:
-        return f"{IO_label('alpha_prompt', counter)} "
+    def get_alpha_prompt(self) -> str:
+        return f"{IO_label('alpha_prompt', self.counter)} "
     
-    @staticmethod
-    def get_beta_prompt() -> str:
-        return f"{IO_label('beta_prompt', counter)} "
+    def get_beta_prompt(self) -> str:
+        return f"{IO_label('beta_prompt', self.counter)} "
     
-    @staticmethod
-    def get_security_prompt() -> str:
-        return f"{IO_label('security_prompt', counter)} "
+    def get_security_prompt(self) -> str:
+        return f"{IO_label('security_prompt', self.counter)} "
         
-    @classmethod
-    def show_warning(cls, message):
+    def show_warning(self, message):
         for line in str(message).splitlines():
-            print(f"{IO_label('warning', counter)} {line}")
+            self.emit('warning', line)
         
-    @classmethod
-    def print_raw(cls, item):
+    def print_raw(self, item):
         for line in str(item).splitlines():
-            print(f"{IO_label('data', counter)} {line}")
+            self.emit('data', line)
 
-    @classmethod
-    def log_item(cls, message):
+    def log_item(self, message):
         for line in str(message).splitlines():
-            print(f"{IO_label('info', counter)} {line}")
+            self.emit('info', line)
         
-    @classmethod
-    def show_error(cls, message):
+    def show_error(self, message):
         for line in str(message).splitlines():
-            print(f"{IO_label('error', counter)} {line}")
+            self.emit('error', line)
 
-    @classmethod
-    def show_success(cls, message, end='\n'):
+    def show_success(self, message, end='\n'):
         for line in str(message).splitlines():
-            print(f"{IO_label('success', counter)} {line}", end=end)
+            self.emit('success', line, end=end)
 
-    @classmethod
-    def show_beta_reduction_step(cls, term):
-        for line in str(term).splitlines():
-            print(f"{IO_label('beta_reduction_step', counter)} β →{filler(width(), line, ' b -') * ' '}{line}")
+    @staticmethod
+    def display(term) -> str:
+        """Text shown for a term in a step line, elided past DISPLAY_LIMIT characters"""
+        return render_repr(term, max_chars=DEFAULT_DISPLAY_LIMIT) if isinstance(term, Term) else str(term)
+
+    def show_beta_reduction_step(self, term):
+        for line in self.display(term).splitlines():
+            self.emit('beta_reduction_step', f"β →{self._filler(line, ' b -') * ' '}{line}")
             
-    @classmethod
-    def show_alpha_reduction_step(cls, term):
-        for line in str(term).splitlines():
-            print(f"{IO_label('alpha_conversion_step', counter)} α →{filler(width(), line, ' a -') * ' '}{line}")
+    def show_alpha_reduction_step(self, term):
+        for line in self.display(term).splitlines():
+            self.emit('alpha_conversion_step', f"α →{self._filler(line, ' a -') * ' '}{line}")
+
+    def show_progress(self, steps, term):
+        """Redraw a live step count and term size on the current line"""
+        self.write(f"\r{IO_label('beta_reduction_step', self.counter)} β ↠ {steps} steps, size {term.size}\033[K")
+        self.flush()
+
+    def _filler(self, *text) -> int:
+        return self.session.filler(*text) if self.session else filler(width(), *text)
     
 
+class CapturedInterface(REPLInterface):
+    """REPLInterface that records output for a structured reply instead of printing it"""
+
+    def __init__(self, session: Optional[REPLSession] = None):
+        super().__init__(session)
+        self.messages: list[dict] = []
+
+    def emit(self, label: str, line: str, end='\n'):
+        self.messages.append({'kind': label, 'text': line})
+
+    def confirm(self, message: str) -> bool:
+        # There is no one to answer mid-command; dangerous operations are refused
+        self.show_warning(f"{message} Declined: confirmation is not available non-interactively.")
+        return False
+
+    def drain(self) -> list[dict]:
+        messages, self.messages = self.messages, []
+        return messages
+
 interface = REPLInterface()
 
 class CommandHandler:
     session: REPLSession
     """Handle different REPL commands"""
-    def __init__(self, session):
+    def __init__(self, session, interface: Optional[REPLInterface] = None):
         self.session = session
+        self.interface = REPLInterface(session) if interface is None else interface
         self.command_map = {
             # Original commands (case-insensitive)
             'def': self.handle_def,
@@ -150,6 +252,8 @@ class CommandHandler:
             'type': self.handle_show_type,
             'alpha': self.handle_alpha_conversion,
             'substitute': self.handle_substitution,
+            'stats': self.handle_stats,
+            'map': self.handle_map,
             
             # Shorthand aliases
             'ls': self.handle_list,      # list
@@ -186,6 +290,11 @@ class CommandHandler:
                 raise ValueError(f"Invalid history reference {identifier}") from e
         return None
 
+    @staticmethod
+    def _shared(decorator) -> bool:
+        """Let form for SHOW, LIT and TREE, asked for with the '&' decorator"""
+        return decorator == '&'
+
     def execute(self, command, decorator=None):
         """Execute a parsed command"""
         keyword, args = command
@@ -199,8 +308,8 @@ class CommandHandler:
             identifier, literal = args.split(':=', 1)
             identifier = identifier.strip()
             # Access DB via session
-            term = parse_term(literal)
-            self.session.db.insert_term(identifier, term)
+            term = parse_term(literal, self.session.db, self.session.history)
+            self.session.db.insert_term(identifier, term, depends_on=referenced_identifiers(literal))
             return f"Defined {identifier}", term
             
         except ValueError:
@@ -222,17 +331,18 @@ class CommandHandler:
         # Store output_var in session
         self.session.output_var = output_var
 
-        self.session.current_term = parse_term(term_part)
+        self.session.current_term = parse_term(term_part, self.session.db, self.session.history)
 
-        return f"{bold_text('Reducing')}{' ' * filler(width(), 'Reducing', str(self.session.current_term))}{str(self.session.current_term)}", self.session.current_term
+        shown = REPLInterface.display(self.session.current_term)
+        return f"{bold_text('Reducing')}{' ' * self.session.filler('Reducing', shown)}{shown}", self.session.current_term
 
     def handle_literal(self, args, decorator=None):
         """Shows literal content of term in PyLambda literal"""
         forced = (decorator != '?')
         identifier = args.strip().split()[0]
         if forced:
-            term = parse_term(identifier)
-            return term.literal(), term
+            term = parse_term(identifier, self.session.db, self.session.history)
+            return render_term(term, 'literal', shared=self._shared(decorator)), term
         else:
             objs = ""
             for t in self.session.db.get_all_terms(identifier):
@@ -247,8 +357,8 @@ class CommandHandler:
         """Method to output a string of a tree representation of term"""
         forced = (decorator == '!')
         identifier = args.strip().split()[0]
-        term = parse_term(identifier)
-        return term.tree_str(), term
+        term = parse_term(identifier, self.session.db, self.session.history)
+        return render_term(term, 'tree', shared=self._shared(decorator)), term
     
     def handle_delete(self, args, decorator=None):
         """Handle DEL command with optional regex"""
@@ -256,14 +366,12 @@ class CommandHandler:
         identifier = args.strip().split()[0]
         if not forced:
             if check_for_dangerous_regex_pattern(identifier):
-                interface.show_warning("Regex pattern is dangerous. Proceed with caution.")
-                print(interface.get_security_prompt(), end= '')
-                if input("Are you sure you want to proceed? (y/n): ").strip().lower() != 'y':
+                self.interface.show_warning("Regex pattern is dangerous. Proceed with caution.")
+                if not self.interface.confirm("Are you sure you want to proceed?"):
                     raise UserCancelledOperation("Operation cancelled by user")
         if terms := self.session.db.get_all_terms(identifier, forced=forced):
             # Delete all matching terms
-            for name, term in terms:
-                self.session.db.delete_terms(name, regex=(not forced))
+            self.session.db.delete_many(name for name, _ in terms)
             if forced:
                 return f"Deleted entry {identifier}", terms[0][1]
             else:
@@ -280,10 +388,10 @@ class CommandHandler:
         # Parse substitution command
         parts = args.split('<')
         if '>' in args:
-            interface.show_warning(f'Operator {italic_text('>')} is used, do you mean {italic_text('<')}?')
+            self.interface.show_warning(f'Operator {italic_text('>')} is used, do you mean {italic_text('<')}?')
         
         term_str = parts[0].strip()
-        term = parse_term(term_str)
+        term = parse_term(term_str, self.session.db, self.session.history)
         
         if len(parts) == 2:
             _replacement = parts[1].strip().split(',', 1)
@@ -293,7 +401,7 @@ class CommandHandler:
             
 
             # Parse terms
-            replacement = parse_term(replacement_str)
+            replacement = parse_term(replacement_str, self.session.db, self.session.history)
             if not (_ := parse_variable(target_str)):
                 raise ValueError(f'Target literal {italic_text(target_str)} is not a valid identifier')
             
@@ -320,6 +428,14 @@ class CommandHandler:
         if forced:
             raise ValueError("Forced decorator '!' is not available for this command")
 
+        if '<' in args:
+            # USE namespace < name, name: import only these names and what they reference
+            name, identifiers = args.split('<', 1)
+            name = name.strip()
+            identifiers = [identifier.strip() for identifier in identifiers.split(',') if identifier.strip()]
+            self.session.db.use_namespace(name, identifiers)
+            return f"Imported {', '.join(identifiers)} from namespace {name}", None
+
         self.session.db.use_namespace(args)
         return f"Namespace {args} imported", None
 
@@ -336,32 +452,50 @@ class CommandHandler:
         forced = (decorator != '?')
         parts = args.strip().split(maxsplit=1)
         identifier = parts[0]
-        term = parse_term(identifier)
+        term = parse_term(identifier, self.session.db, self.session.history)
 
-        return term.__repr__(), term
+        return render_term(term, 'repr', shared=self._shared(decorator)), term
     
     def handle_show_type(self, args, decorator=None):
         """Shows the type of term"""
-        term = parse_term(args)
+        term = parse_term(args, self.session.db, self.session.history)
         if isinstance(term, Variable):
-            return 'TYPE <VAR>', term
-        if isinstance(term, Abstraction):
-            return 'TYPE <ABSTRACTION>', term
-        if isinstance(term, Application):
-            return 'TYPE <APPLICATION>', term
-        
-        return 'WTF???', term
+            kind = 'TYPE <VAR>'
+        elif isinstance(term, Abstraction):
+            kind = 'TYPE <ABSTRACTION>'
+        elif isinstance(term, Application):
+            kind = 'TYPE <APPLICATION>'
+        else:
+            return 'WTF???', term
+        metrics = f"size {term.size}, depth {term.depth}, {term.redexes} redex{'' if term.redexes == 1 else 'es'}"
+        try:
+            inferred = type_literal(infer_type(term))
+        except TypeInferenceError:
+            inferred = 'untyped'
+        return (
+            f"{kind}{' ' * self.session.filler(kind, metrics)}{metrics}\n"
+            f"{bold_text('type')}{' ' * self.session.filler('type', inferred)}{inferred}"
+        ), term
     
     def handle_list(self, args, decorator=None):
         """Lists all terms in the database"""
+        if decorator == '.' and len(args) > 0:
+            terms = self.session.db.get_namespace_terms(args)
+            if not terms:
+                return f"Namespace {args} is empty", None
+            lines = []
+            for term_name, term_value in terms:
+                filler_spaces = self.session.filler(str(term_name), str(term_value)) * ' '
+                lines.append(f"{bold_text(term_name)}{filler_spaces}{term_value}")
+            return "\n".join(lines), None
         if decorator == '.':
             namespaces = self.session.db.list_namespaces()
-            interface.print_raw("Available namespaces:")
+            self.interface.print_raw("Available namespaces:")
             if len(namespaces) == 0:
                 return "No namespaces available", None
             else:
                 for ns in namespaces:
-                    interface.print_raw(f"  {ns}")
+                    self.interface.print_raw(f"  {ns}")
                 return "Namespace query done", None
         forced = (decorator != '?')
         if len(args) > 0:
@@ -373,7 +507,7 @@ class CommandHandler:
             for term in terms:
                 term_name = term[0]
                 term_value = term[1]
-                filler_spaces = filler(width(), str(term_name), str(term_value)) * ' '
+                filler_spaces = self.session.filler(str(term_name), str(term_value)) * ' '
                 lines.append(f"{bold_text(term_name)}{filler_spaces}{term_value}")
             return "\n".join(lines), None
         
@@ -390,7 +524,7 @@ class CommandHandler:
             raise UnexpectedArgsError(args)
         
         expr = args[0]
-        term = parse_term(expr)
+        term = parse_term(expr, self.session.db, self.session.history)
         
         if isinstance(term, Abstraction):
             term = term.body
@@ -413,7 +547,7 @@ class CommandHandler:
             raise UnexpectedArgsError(args)
 
         expr = args[0]
-        term = parse_term(expr)
+        term = parse_term(expr, self.session.db, self.session.history)
 
         if isinstance(term, Abstraction):
             variable = term.var
@@ -436,7 +570,7 @@ class CommandHandler:
             raise UnexpectedArgsError(args)
 
         expr = args[0]
-        term = parse_term(expr)
+        term = parse_term(expr, self.session.db, self.session.history)
 
         if isinstance(term, Application):
             function = term.function
@@ -459,7 +593,7 @@ class CommandHandler:
             raise UnexpectedArgsError(args)
 
         expr = args[0]
-        term = parse_term(expr)
+        term = parse_term(expr, self.session.db, self.session.history)
 
         if isinstance(term, Application):
             value = term.value
@@ -479,7 +613,7 @@ class CommandHandler:
         if len(args) != 2:
             raise UnexpectedArgsError(args)
         
-        term = parse_term(args[0]); name = args[1];
+        term = parse_term(args[0], self.session.db, self.session.history); name = args[1];
         
         try:
             names = self.session.db.get_vars()
@@ -487,12 +621,12 @@ class CommandHandler:
                 if not forced:
                     raise IdentifierNameClash(name)
                 else:
-                    interface.show_warning('Possibility of identifier clash overriden with decorator !: identifier ' + italic_text(name))
+                    self.interface.show_warning('Possibility of identifier clash overriden with decorator !: identifier ' + italic_text(name))
             elif correct:
                 name = fresh_variable(name, lambda x: x in names)
         except Exception as e:
-            interface.show_error('Exception caught while catching for identifier name clash')
-            interface.show_error(e)
+            self.interface.show_error('Exception caught while catching for identifier name clash')
+            self.interface.show_error(e)
         
         if not isinstance(term, Abstraction):
             raise TypeError('Term is not of type ' + italic_text('Abstraction'))
@@ -503,6 +637,55 @@ class CommandHandler:
         
         
         
+    def handle_stats(self, args, decorator=None):
+        """Show reduction profiler counts and phase timings: STATS [ON|OFF|RESET|JSON]"""
+        from utils.profiler import profiler, COUNTERS, PHASES
+        action = args.strip().lower()
+        if action == 'on':
+            profiler.enable()
+            return "Profiler enabled", None
+        if action == 'off':
+            profiler.disable()
+            return "Profiler disabled", None
+        if action == 'reset':
+            profiler.reset()
+            return "Profiler counts reset", None
+        if action == 'json':
+            return profiler.to_json(), None
+        if action:
+            raise UnexpectedArgsError(args)
+
+        snapshot = profiler.snapshot()
+        rows = [('profiler', 'on' if snapshot['enabled'] else 'off')]
+        rows += [(name, str(snapshot['counts'][name])) for name in COUNTERS]
+        rows.append(('peak_nodes', str(snapshot['peak_nodes'])))
+        rows += [(f"{name} time", f"{snapshot['phases'][name] * 1000:.2f} ms") for name in PHASES]
+        rows.append(('elapsed', f"{snapshot['elapsed']:.2f} s"))
+        return "\n".join(f"{bold_text(name)}{' ' * self.session.filler(name, value)}{value}" for name, value in rows), None
+
+    def handle_map(self, args, decorator=None):
+        """Apply one function to many arguments: MAP f < C0..C100, I, (\\x. x)"""
+        from models.batch import split_map, expand_arguments, resolve_arguments, map_terms
+        function_literal, spec = split_map(args)
+        function = parse_term(function_literal, self.session.db, self.session.history)
+        arguments = resolve_arguments(expand_arguments(spec), self.session.db, self.session.history)
+
+        # Results are reported, not saved: a batch leaves history untouched
+        results = map_terms(function, arguments)
+        labels = []
+        for result in results:
+            steps = f"{result.steps} steps" if result.steps >= 0 else result.status.replace('_', ' ')
+            if result.status == 'budget_exceeded':
+                steps += ", budget exceeded"
+            labels.append((result.argument, steps))
+        column = max((len(argument) for argument, _ in labels), default=0)
+        rows = []
+        for (argument, steps), result in zip(labels, results):
+            label = f"{argument:<{column}}  {steps}"
+            shown = render_literal(result.term, max_chars=DEFAULT_DISPLAY_LIMIT)
+            rows.append(f"{bold_text(label)}{' ' * self.session.filler(label, shown)}{shown}")
+        return "\n".join(rows), None
+
     def handle_help(self, _, decorator=None):
         """Show dynamically generated help information"""
         forced = (decorator == '!')
@@ -537,7 +720,7 @@ class CommandHandler:
     def handle_exit(self, _, decorator=None):
         """Exit the REPL"""
         forced = (decorator == '!')
-        interface.show_warning("Exiting REPL. Bye!")
+        self.interface.show_warning("Exiting REPL. Bye!")
         self.session.running = False
         return "Exiting lambda calculus REPL", None
 
@@ -547,83 +730,269 @@ class CommandHandler:
         raise ValueError("Unknown command")
 
 def save_term(term, session):
-    global counter;
-    counter += 1
     """Save term to history"""
-    if isinstance(term, Term):
-        term = term.literal()
-    if isinstance(term, str):
-        term = term.strip()
-        
-    session.history.insert(counter, term)
+    session.counter += 1
+    session.history.insert(session.counter, term)
+
+def save_reduction_step(session, trace, strategy='normal'):
+    """Reduce the current term one step, keeping the step as a trace delta in history"""
+    with session.hooks.scope():
+        session.current_term = trace.reduce(session.counter + 1, session.current_term, base_index=session.counter, strategy=strategy)
+    session.counter += 1
+    session.history.link(session.counter, trace)
+
+def run_reduction(session, trace, max_steps=DEFAULT_REDUCTION_BUDGET, on_step=None, strategy='normal', terminates=False) -> int:
+    """Reduce the current term to normal form, saving every step like the beta prompt does
+
+    `strategy` and `terminates` are as `choose_strategy` returns them; the
+    beta prompt keeps the default, normal order with fixed-point checks.
+
+    Returns:
+        int: Number of steps taken
+
+    Throws:
+        FixedPointDetected, ReductionBudgetExceeded: As `normalize`; the
+        session's current term is left at the last step reached
+    """
+    def step(_):
+        save_reduction_step(session, trace, strategy)
+        return session.current_term
+    session.current_term, steps = normalize(
+        session.current_term, max_steps, step=step, on_step=on_step, terminates=terminates, registry=session.hooks
+    )
+    return steps
+
+# Seconds between progress redraws while fast-forwarding
+PROGRESS_INTERVAL = 0.1
+
+def fast_forward(session, trace, limit=None, interface=interface) -> tuple[int, bool]:
+    """Reduce up to `limit` steps (None for no limit) on a worker thread
+
+    The prompt thread redraws the step count while it waits. Ctrl-C stops
+    the worker after the step in flight; every completed step is already in
+    history and the session keeps the last term reached.
+
+    Returns:
+        tuple[int, bool]: Steps taken, and whether normal form was reached
+
+    Throws:
+        FixedPointDetected: If the reduction stopped at a fixed point
+    """
+    cancel = threading.Event()
+    progress = [0]
+    outcome = {}
+
+    def on_step(_, steps):
+        progress[0] = steps
+        if cancel.is_set():
+            raise UserCancelledOperation("Fast-forward cancelled")
+
+    def work():
+        try:
+            run_reduction(session, trace, limit, on_step=on_step)
+            outcome['normal_form'] = True
+        except Exception as e:
+            outcome['error'] = e
+
+    worker = threading.Thread(target=work, name='fast-forward', daemon=True)
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(PROGRESS_INTERVAL)
+            interface.show_progress(progress[0], session.current_term)
+    except KeyboardInterrupt:
+        cancel.set()
+        worker.join()
+        interface.write('\n')
+        interface.show_warning(f"Cancelled after {progress[0]} steps, keeping the last term reached")
+        return progress[0], False
+    interface.write('\n')
+
+    error = outcome.get('error')
+    if isinstance(error, (ReductionBudgetExceeded, UserCancelledOperation)):
+        return progress[0], False
+    if error is not None:
+        raise error
+    return progress[0], True
+
+def finish_reduction(session, save_variable, interface=interface):
+    """Report the term a reduction ended on, saving it when `RED ... > name` asked for it"""
+    if save_variable:
+        session.db.insert_term(save_variable, session.current_term)
+        interface.show_success(f'Auto-saved as {italic_text(save_variable)}')
+    else:
+        interface.log_item(f'Current literal: ')
+        interface.print_raw(italic_text(f'DEF %{session.counter} := {session.current_term.literal()}'))
+
+def auto_reduce(session, max_steps=DEFAULT_REDUCTION_BUDGET) -> dict:
+    """Run the current term to normal form without prompting, honouring `RED ... > name`
+
+    The strategy comes from `choose_strategy`; `max_steps` applies whichever it is.
+    """
+    trace = ReductionTrace()
+    start = session.counter
+    status = 'normal_form'
+    strategy, terminates = choose_strategy(session.current_term)
+    try:
+        run_reduction(session, trace, max_steps, strategy=strategy, terminates=terminates)
+    except FixedPointDetected:
+        status = 'fixed_point'
+    except ReductionBudgetExceeded:
+        status = 'budget_exceeded'
+    if session.output_var and status != 'budget_exceeded':
+        session.db.insert_term(session.output_var, session.current_term)
+    session.output_var = None
+    return {'status': status, 'steps': session.counter - start, 'first': start, 'last': session.counter, 'strategy': strategy}
+
+def run_line(session, handler, line: str, max_steps=DEFAULT_REDUCTION_BUDGET) -> dict:
+    """Run one input line non-interactively, with RED going straight to normal form
+
+    Like a pass of `main()`'s loop, except that the caller advances
+    `session.counter` once it is done with the reply.
+
+    Returns:
+        dict: `ok`, the `%n` `index` used, per-command `results` and, on failure, `error`
+    """
+    results = []
+    reply = {'ok': True, 'index': session.counter, 'results': results}
+    try:
+        decorator, commands = split_line(line)
+        for keyword, args in commands:
+            response, term = handler.execute((keyword, args), decorator)
+            if term:
+                session.history.insert(session.counter, term)
+            result = {'command': keyword, 'response': response}
+            if term:
+                result['term'] = term.literal()
+            if keyword in ['RED', 'REDUCE', 'RUN'] and session.current_term:
+                result['reduction'] = auto_reduce(session, max_steps)
+                result['term'] = session.current_term.literal()
+            results.append(result)
+    except Exception as e:
+        reply['ok'] = False
+        reply['error'] = str(e)
+    return reply
+
+def run_script(source, max_steps=DEFAULT_REDUCTION_BUDGET, as_json: bool = False, out=None) -> bool:
+    """Execute a script of REPL lines without prompting
+
+    Blank lines and lines starting with `#` are skipped. With `as_json`
+    every executed line produces one JSON object on `out`; otherwise the
+    responses are printed with the usual labels.
+
+    Returns:
+        bool: True when every line succeeded
+    """
+    out = out or sys.stdout
+    session = REPLSession()
+    script_interface = CapturedInterface(session) if as_json else REPLInterface(session, out)
+    handler = CommandHandler(session, script_interface)
+    succeeded = True
+    try:
+        for number, line in enumerate(source, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            reply = run_line(session, handler, line, max_steps)
+            succeeded = succeeded and reply['ok']
+            if as_json:
+                record = {'line': number, 'input': line, **reply, 'messages': script_interface.drain()}
+                out.write(json.dumps(record) + '\n')
+            else:
+                for result in reply['results']:
+                    if result.get('response'):
+                        script_interface.print_raw(result['response'])
+                    if reduction := result.get('reduction'):
+                        script_interface.show_success(f"{reduction['status'].replace('_', ' ')} after {reduction['steps']} steps")
+                        script_interface.print_raw(result['term'])
+                if not reply['ok']:
+                    script_interface.show_error(f"line {number}: {reply['error']}")
+                script_interface.flush()
+            session.counter += 1
+            if not session.running:
+                break
+    finally:
+        session.history.close()
+    out.flush()
+    return succeeded
+
+def split_line(line: str) -> tuple[str, list[tuple[str, str]]]:
+    """Split an input line into its decorator and `(KEYWORD, args)` commands"""
+    decorator = line[0]
+    line = line[1:] if decorator in ['!', '.', '?', '+', '&'] else line
+    commands = []
+    for cmd in line.split(';'):
+        cmd = cmd.strip()
+        if not cmd:
+            continue
+        keyword, args = normalize_blank(cmd)
+        commands.append((keyword.upper(), args))
+    return decorator, commands
 
 def main():
-    global counter
+    import readline
     session = REPLSession()
-    session.history.clear()
-    handler = CommandHandler(session)
+    # Closing the history at exit removes its spill file
+    atexit.register(session.history.close)
+    interface.session = session
+    interface.watch_resize()
+    handler = CommandHandler(session, interface)
     interface.print_raw(clear())
 #    for color, label in zip(COLORS.values(), LABELS.values()):
 #        print(f"{color_text(f'{label}', color, bg=True)}", end=' ')
 #        print()
     while session.running:
         try:
-            print(status_label(f'%{counter}', None), end=' ')
-            print(filler(width(), f'[%{counter}] ', regard_labels=False) * '-')
-            line = input(interface.get_lambda_prompt()).strip()
+            interface.write(status_label(f'%{session.counter}', None) + ' ')
+            interface.write(session.filler(f'[%{session.counter}] ', regard_labels=False) * '-' + '\n')
+            line = interface.input(interface.get_lambda_prompt()).strip()
             readline.add_history(line)
             if not line:
                 continue
-            decorator = line[0]
-            line = line[1:] if decorator in ['!', '.', '?', '+'] else line
-            commands = line.split(';')
-            
-            for cmd in commands:
-                cmd = cmd.strip()
-                if not cmd:
-                    continue
-                        
-                keyword, args = normalize_blank(cmd)
-                response, term = handler.execute((keyword.upper(), args), decorator)
+            decorator, commands = split_line(line)
+        
+            for keyword, args in commands:
+                response, term = handler.execute((keyword, args), decorator)
                 if response == WARNING_FEATURE_UNDER_DEVELOPMENT:
                     interface.show_warning(f'Command {keyword.upper()} is under development.')
                     continue
-                
+            
                 if term:
-                    session.history.insert(counter, term.literal())
+                    session.history.insert(session.counter, term)
                 else:
-                    interface.show_warning(f'Empty literal returned from handler, skipping history insertion for %{counter}.')
-                    
+                    interface.show_warning(f'Empty literal returned from handler, skipping history insertion for %{session.counter}.')
+                
                 if keyword.upper() in ['SHOW', 'DISPLAY']:
                     if response:
                         interface.log_item(f'Term {italic_text(args)} found.' if decorator == '!' else f'Terms matching {italic_text(args)} are found.')
                         interface.print_raw(response)
                     else:
                         interface.show_error(f'Term for identifier {italic_text(args)} does not exist.')
-                
+            
                 if keyword.upper() in ['RED', 'REDUCE', 'RUN'] and session.current_term:
                     if decorator == '!':
                         interface.show_warning(f'Force decorater \'!\' is not available for {italic_text('REDUCE')} command, ignored on execution.')
                     interface.log_item(response)
                     error_occurred = False
                     save_variable = None  # Track output variable
-                    previous_literal = ""
+                    previous_term = None
+                    trace = ReductionTrace()
                     parts = [p.strip() for p in args.replace(' ', '').split('>')]
                     save_variable = parts[1] if len(parts) > 1 else None
-                    
+                
                     try:
                         while True:
                             interface.show_beta_reduction_step(session.current_term)
-                            if session.current_term.literal() == previous_literal:
+                            if previous_term is not None and is_fixed_point(previous_term, session.current_term):
                                 raise FixedPointDetected(term = session.current_term)
 
-                            user_input = input(interface.get_beta_prompt()).strip()
-                            
+                            user_input = interface.input(interface.get_beta_prompt()).strip()
+                        
                             # Parse command and output variable
                             parts = [p.strip() for p in user_input.split('>', 1)]
                             command = parts[0].lower()
                             output_var = parts[1] if len(parts) > 1 else None
-                            
+                        
                             _skip_processing = False
                             # Handle commands
                             if command in ('exit', 'q'):
@@ -641,7 +1010,7 @@ def main():
                                 session.db.insert_term(output_var, session.current_term)
                                 interface.show_success(f'Saved current term as {italic_text(output_var)}')
                                 continue
-                            
+                        
                             if command == 'retreat':
                                 if not output_var:
                                     _skip_processing = True
@@ -661,7 +1030,7 @@ def main():
                                     _skip_processing = True
                                     interface.show_error(f'History entry {output_var} not found')
                                     continue
-                            
+                        
                             if command == 'alpha':
                                 if not output_var:
                                     _skip_processing = True
@@ -670,51 +1039,58 @@ def main():
                                 try:
                                     _skip_processing = True
                                     session.current_term = session.current_term.alpha_conversion(output_var)
-                                    interface.show_alpha_reduction_step(f'{session.current_term.literal()}')
+                                    interface.show_alpha_reduction_step(render_literal(session.current_term, max_chars=DEFAULT_DISPLAY_LIMIT))
                                     save_term(session.current_term, session)
                                     continue
                                 except Exception as e:
                                     _skip_processing = True
                                     interface.show_error(f'Alpha reduction failed: {str(e)}')
                                     continue
-                            
+                        
+                            words = command.split()
+                            if words and (words[0] == 'run' or (words[0] == 'step' and len(words) > 1)):
+                                try:
+                                    limit = None if words[0] == 'run' else int(words[1])
+                                except ValueError:
+                                    interface.show_error(f"Invalid step count: {italic_text(words[1])}")
+                                    continue
+                                steps, reached = fast_forward(session, trace, limit)
+                                previous_term = None
+                                if reached:
+                                    interface.show_success(f"Reached normal form after {steps} steps")
+                                    finish_reduction(session, save_variable)
+                                    break
+                                continue
+                        
                             _skip_linting = False
-                            
+                        
                             if command == 'step' or command == 'beta' or not command:
-                                total_chars = len(str(counter)) + 13
-                                print(f'\033[1A\033[{total_chars}Cbeta', end='\n')
+                                total_chars = len(str(session.counter)) + 13
+                                interface.write(f'\033[1A\033[{total_chars}Cbeta\n')
                                 _skip_linting = True
-                                
+                            
                             if command and not _skip_linting:  # Unknown command
                                 interface.show_error(f"Unknown command: {italic_text(command)}")
-                                interface.show_error("Available commands: exit, save, retreat, alpha, beta")
+                                interface.show_error("Available commands: exit, save, retreat, alpha, beta, step N, run")
                                 continue
-                            
-                            previous_literal = session.current_term.literal()
-                            
+                        
+                            previous_term = session.current_term
+                        
                             # Perform reduction step
                             if not _skip_processing:
                                 try:
-                                    session.current_term = session.current_term.beta_reduce_step()
-                                    save_term(session.current_term, session)
+                                    save_reduction_step(session, trace)
+                                except KeyboardInterrupt:
+                                    interface.write('\n')
+                                    interface.show_warning("Step cancelled, keeping the current term")
                                 except ReductionOnNormalForm as e:
                                     interface.show_success("Reached normal form")
-                                    if save_variable:
-                                        session.db.insert_term(save_variable, session.current_term)
-                                        interface.show_success(f'Auto-saved as {italic_text(save_variable)}')
-                                    else:
-                                        interface.log_item(f'Current literal: ')
-                                        interface.print_raw(italic_text(f'DEF %{counter} := {session.current_term.literal()}'))
+                                    finish_reduction(session, save_variable)
                                     break
                     except FixedPointDetected as e:
                         interface.show_success(f"Reduction reached fixed point")
-                        if save_variable:
-                            session.db.insert_term(save_variable, session.current_term)
-                            interface.show_success(f'Auto-saved as {italic_text(save_variable)}')
-                        else:
-                            interface.log_item(f'Current literal: ')
-                            interface.print_raw(italic_text(f'DEF %{counter} := {session.current_term.literal()}'))
-                            
+                        finish_reduction(session, save_variable)
+                        
                     except ParseError as e:
                         interface.show_error(e.literal)
                     except Exception as e:
@@ -727,16 +1103,16 @@ def main():
                         interface.show_success(f'Saved final result as {italic_text(save_variable)}')
 
                     session.output_var = None
-                
+            
                 if keyword.upper() in ['LIST', 'LS']:
                     interface.print_raw(response)
-                    
+                
                 if keyword.upper() in ['DEL', 'DELETE', 'RM']:
                     if response:
                         interface.show_success(response)
                     else:
                         interface.show_error(f'Term for identifier {italic_text(args)} does not exist.')
-                
+            
                 if keyword.upper() in ['LIT', 'LITERAL']:
                     if decorator == '!':
                         interface.show_warning(f'Force decorater \'!\' is not available for {italic_text('LIT')} command, ignored on execution.')
@@ -752,7 +1128,7 @@ def main():
                         interface.print_raw(response)
                     else:
                         interface.show_error(f'Term for identifier {italic_text(args)} does not exist.')
-                        
+                    
                 if keyword.upper() in ['DEF', 'DEFINE']:
                     if decorator == '!':
                         interface.show_warning(f'Force decorater \'!\' is not available for {italic_text('DEF')} command, ignored on execution.')
@@ -760,7 +1136,7 @@ def main():
                         interface.show_success(response)
                     else:
                         interface.show_error(f'Definition failed for {italic_text(args)}')
-                
+            
                 if keyword.upper() in ['TYPE']:
                     if decorator == '!':
                         interface.show_warning(f'Force decorater \'!\' is not available for {italic_text('TYPE')} command.')
@@ -768,7 +1144,7 @@ def main():
                         interface.print_raw(response)
                     else:
                         interface.show_error(f"Type extraction failed for {italic_text(args)}")
-                
+            
                 if keyword.upper() in ['VAR', 'EXTRACT_VARIABLE']:
                     if decorator == '!':
                         interface.show_warning(f'Force decorater \'!\' is not available for {italic_text('EXTRACT_VARIABLE')} command.')
@@ -776,7 +1152,7 @@ def main():
                         interface.print_raw(response)
                     else:
                         interface.show_error(f"Variable extraction failed for {italic_text(args)}")
-                
+            
                 if keyword.upper() in ['BODY', 'EXTRACT_BODY']:
                     if decorator == '!':
                         interface.show_warning(f'Force decorater \'!\' is not available for {italic_text('EXTRACT_BODY')} command.')
@@ -784,7 +1160,7 @@ def main():
                         interface.print_raw(response)
                     else:
                         interface.show_error(f"Body extraction failed for {italic_text(args)}")
-                
+            
                 if keyword.upper() in ['VAL', 'EXTRACT_VALUE']:
                     if decorator == '!':
                         interface.show_warning(f'Force decorater \'!\' is not available for {italic_text('EXTRACT_VALUE')} command.')
@@ -792,7 +1168,7 @@ def main():
                         interface.print_raw(response)
                     else:
                         interface.show_error(f"Value extraction failed for {italic_text(args)}")
-                
+            
                 if keyword.upper() in ['FUNC', 'EXTRACT_FUNCTION']:
                     if decorator == '!':
                         interface.show_warning(f'Force decorater \'!\' is not available for {italic_text('EXTRACT_FUNCTION')} command.')
@@ -800,10 +1176,10 @@ def main():
                         interface.print_raw(response)
                     else:
                         interface.show_error(f"Function extraction failed for {italic_text(args)}")
-                
+            
                 if keyword.upper() in ['ALPHA', 'ALPHA_CONVERT', 'RENAME']:
                     interface.print_raw(response)
-                
+            
                 if keyword.upper() in ['SUB', 'SUBSTITUTION', 'SUBSTITUTE']:
                     if decorator == '!':
                         interface.show_warning(f'Force decorater \'!\' is not available for {italic_text('SUBSTITUTION')} command.')
@@ -812,6 +1188,13 @@ def main():
                     else:
                         interface.show_error(f"Substitution failed for {italic_text(args)}")
 
+                if keyword.upper() in ['STATS']:
+                    interface.print_raw(response)
+
+                if keyword.upper() in ['MAP']:
+                    if response:
+                        interface.print_raw(response)
+
                 if keyword.upper() in ['HELP', 'H']:
                     if decorator == '!':
                         interface.show_warning(f'Force decorater \'!\' is not available for {italic_text('HELP')} command.')
@@ -819,18 +1202,63 @@ def main():
                 if keyword.upper() == ['EXIT', 'Q', 'QUIT']:
                     interface.show_success(response)
                     session.running = False
+                interface.flush()
 
         except EOFError:
             handler.handle_exit(None)
         except UserCancelledOperation as e:
             interface.show_warning(str(e))
         except KeyboardInterrupt:
-            print()
+            interface.write('\n')
             interface.show_warning("Operation cancelled by user")
             # handler.handle_exit(None)
         except Exception as e:
             interface.show_error(str(e))
-        counter += 1
+        session.counter += 1
+    interface.flush()
     
+def profile_startup(out=None):
+    """Report how long each startup phase takes, without entering the REPL"""
+    out = out or sys.stdout
+    phases = [('imports', _imports_done - _import_started)]
+
+    def timed(label, action):
+        started = time.perf_counter()
+        result = action()
+        phases.append((label, time.perf_counter() - started))
+        return result
+
+    timed('readline', lambda: __import__('readline'))
+    db = timed('database', get_default_db)
+    session = timed('session', lambda: REPLSession(db))
+    timed('first prompt', lambda: (session.filler(f'[%{session.counter}] ', regard_labels=False), REPLInterface(session).get_lambda_prompt()))
+    session.history.close()
+
+    for label, seconds in phases:
+        out.write(f"{label:<14}{seconds * 1000:9.2f} ms\n")
+    out.write(f"{'total':<14}{sum(seconds for _, seconds in phases) * 1000:9.2f} ms\n")
+    out.write(f"{len(sys.modules)} modules loaded; interpreter startup is not included (see python -X importtime)\n")
+
+def parse_options(argv):
+    """Parse command-line options"""
+    import argparse
+    arg_parser = argparse.ArgumentParser(description="PyLambda lambda calculus REPL")
+    arg_parser.add_argument('--script', metavar='FILE', help="Run a script non-interactively ('-' for stdin)")
+    arg_parser.add_argument('--json', action='store_true', help="With --script, print one JSON object per line")
+    arg_parser.add_argument('--budget', type=int, default=DEFAULT_REDUCTION_BUDGET, help="Steps RED may take in --script mode")
+    arg_parser.add_argument('--profile-startup', action='store_true', help="Report startup time per phase and exit")
+    return arg_parser.parse_args(argv)
+
 if __name__ == "__main__":
-    main()
+    # A bare interactive start skips option parsing altogether
+    options = parse_options(sys.argv[1:]) if len(sys.argv) > 1 else None
+
+    if options is None or (options.script is None and not options.profile_startup):
+        main()
+    elif options.profile_startup:
+        profile_startup()
+    elif options.script == '-':
+        sys.exit(0 if run_script(sys.stdin, options.budget, options.json) else 1)
+    else:
+        with open(options.script, encoding='utf-8') as script:
+            sys.exit(0 if run_script(script, options.budget, options.json) else 1)
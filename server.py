@@ -0,0 +1,206 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# repl/server.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import argparse
+import asyncio
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from utils.config import load_env
+from repl import REPLSession, CapturedInterface, CommandHandler, run_line
+from models.reduction import DEFAULT_REDUCTION_BUDGET
+from parser import get_default_db
+from utils.persistence import TermDB
+from utils.sessions import SessionRegistry
+
+load_env()
+
+# MARK: Configuration
+DEFAULT_SERVER_HOST = os.getenv('SERVER_HOST', '127.0.0.1')
+DEFAULT_SERVER_PORT = int(os.getenv('SERVER_PORT', 7878))
+# Threads running commands; a long reduction occupies one and leaves the rest free
+DEFAULT_SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', min(32, (os.cpu_count() or 1) + 4)))
+# Seconds between sweeps for idle sessions
+EVICTION_INTERVAL = float(os.getenv('SESSION_EVICTION_INTERVAL', 60))
+# Longest request line accepted from a client, in bytes
+MAX_LINE_LENGTH = int(os.getenv('SERVER_MAX_LINE', 1 << 20))
+
+# MARK: ServerSession Class
+class ServerSession:
+    """One client's REPL state: session, handler and captured output.
+
+    Commands of a session run one at a time, in arrival order, on the
+    server's worker threads.
+    """
+
+    def __init__(self, session_id: str, session: REPLSession, reduction_budget: int):
+        self.id = session_id
+        self.session = session
+        self.interface = CapturedInterface(session)
+        self.handler = CommandHandler(session, self.interface)
+        self.reduction_budget = reduction_budget
+        self.lock = asyncio.Lock()
+
+    def execute_line(self, line: str) -> dict:
+        """Run one input line with `run_line`, adding the session id and captured messages"""
+        reply = {'session': self.id, **run_line(self.session, self.handler, line, self.reduction_budget)}
+        reply['messages'] = self.interface.drain()
+        reply['running'] = self.session.running
+        self.session.counter += 1
+        return reply
+
+# MARK: LambdaServer Class
+class LambdaServer:
+    """Line-delimited JSON server hosting many REPL sessions in one process.
+
+    Each request is one JSON object per line:
+
+        {"line": "DEF id := \\x. x"}      run a REPL line
+        {"columns": 120}                   report the client's display width
+        {"session": "<id>"}                attach to an existing session
+
+    Every request is answered with one JSON line carrying the session id,
+    the `%n` index used, per-command `results` and the labelled `messages`
+    the CLI would have printed. `RED` runs to normal form under the
+    reduction budget instead of prompting for each step. Commands execute
+    on a thread pool, so a long reduction in one session does not stall
+    the others.
+
+    Example:
+        >>> server = LambdaServer(port=7878)
+        >>> asyncio.run(server.serve_forever())
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_SERVER_HOST,
+        port: int = DEFAULT_SERVER_PORT,
+        db: Optional[TermDB] = None,
+        workers: int = DEFAULT_SERVER_WORKERS,
+        reduction_budget: int = DEFAULT_REDUCTION_BUDGET,
+        registry: Optional[SessionRegistry] = None
+    ):
+        self.host = host
+        self.port = port
+        self.db = get_default_db() if db is None else db
+        self.reduction_budget = reduction_budget
+        self.registry = SessionRegistry() if registry is None else registry
+        # Sessions the registry drops, e.g. to stay under `max_sessions`, are dropped here too
+        self.registry.on_evict = self._forget_session
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='lambda-worker')
+        self.sessions: dict[str, ServerSession] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # MARK: Sessions
+    def open_session(self, session_id: Optional[str] = None) -> ServerSession:
+        """Return the live session `session_id`, or start a new one"""
+        if session_id in self.sessions and session_id in self.registry:
+            self.registry.touch(session_id)
+            return self.sessions[session_id]
+        session_id = session_id or uuid.uuid4().hex
+        session = REPLSession(self.db, self.registry.history(session_id))
+        self.sessions[session_id] = ServerSession(session_id, session, self.reduction_budget)
+        return self.sessions[session_id]
+
+    def close_session(self, session_id: str) -> None:
+        self._forget_session(session_id)
+        self.registry.close(session_id)
+
+    def _forget_session(self, session_id: str) -> None:
+        self.sessions.pop(session_id, None)
+
+    async def _evict_idle(self) -> None:
+        while True:
+            await asyncio.sleep(EVICTION_INTERVAL)
+            self.registry.evict_idle()
+
+    # MARK: Requests
+    async def dispatch(self, current: Optional[ServerSession], message: dict) -> tuple[ServerSession, dict]:
+        """Apply one request, returning the session it ran against and the reply"""
+        if current is None or ('session' in message and message['session'] != current.id):
+            current = self.open_session(message.get('session'))
+        elif current.id not in self.registry:
+            # Evicted while this connection held it; its history is gone
+            return None, {'ok': False, 'session': current.id, 'error': "Session was closed by the server; send a request to start a new one"}
+        else:
+            self.registry.touch(current.id)
+
+        if 'columns' in message:
+            current.session.columns = int(message['columns']) or None
+        if 'line' not in message:
+            return current, {'ok': True, 'session': current.id, 'index': current.session.counter}
+
+        line = str(message['line']).strip()
+        if not line:
+            return current, {'ok': True, 'session': current.id, 'index': current.session.counter, 'results': []}
+        async with current.lock:
+            loop = asyncio.get_running_loop()
+            reply = await loop.run_in_executor(self.executor, current.execute_line, line)
+        return current, reply
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one connection until it closes or its session exits"""
+        current = None
+        try:
+            while raw := await reader.readline():
+                try:
+                    message = json.loads(raw)
+                    if not isinstance(message, dict):
+                        raise ValueError("Request must be a JSON object")
+                    current, reply = await self.dispatch(current, message)
+                except (ValueError, TypeError) as e:
+                    reply = {'ok': False, 'error': f"Malformed request: {e}"}
+                writer.write(json.dumps(reply).encode() + b'\n')
+                await writer.drain()
+                if current is not None and not current.session.running:
+                    self.close_session(current.id)
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            # Dropped connection, or a request line over MAX_LINE_LENGTH
+            pass
+        finally:
+            writer.close()
+
+    # MARK: Lifecycle
+    async def start(self) -> asyncio.AbstractServer:
+        self._server = await asyncio.start_server(self.handle_client, self.host, self.port, limit=MAX_LINE_LENGTH)
+        self._eviction = asyncio.create_task(self._evict_idle())
+        return self._server
+
+    async def serve_forever(self) -> None:
+        server = await self.start()
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            self._eviction.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.registry.close_all()
+        self.sessions.clear()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve PyLambda REPL sessions as line-delimited JSON over TCP")
+    parser.add_argument('--host', default=DEFAULT_SERVER_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_SERVER_PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_SERVER_WORKERS)
+    parser.add_argument('--budget', type=int, default=DEFAULT_REDUCTION_BUDGET, help="Steps a RED may take")
+    options = parser.parse_args()
+
+    server = LambdaServer(options.host, options.port, workers=options.workers, reduction_budget=options.budget)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    main()
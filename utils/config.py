@@ -0,0 +1,38 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# utils/config.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import os
+
+_loaded = False
+
+def find_env_file(start: str = os.path.dirname(os.path.abspath(__file__))) -> str:
+    """Return the nearest `.env` at or above `start`, or '' if there is none"""
+    directory = start
+    while True:
+        candidate = os.path.join(directory, '.env')
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return ''
+        directory = parent
+
+def load_env() -> None:
+    """Load `.env` into the environment, once per process.
+
+    Every module reads its settings through `os.getenv` after calling this.
+    python-dotenv is imported only when a `.env` file exists, so deployments
+    configured through real environment variables (e.g. the Docker image)
+    skip it entirely. Variables already set in the environment win.
+    """
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    if path := find_env_file():
+        from dotenv import load_dotenv
+        load_dotenv(path)
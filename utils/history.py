@@ -6,87 +6,229 @@
 # Makabaka1880, 2025. All rights reserved.
 
 import sqlite3
-from typing import Optional
-from dotenv import load_dotenv
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Union
+from utils.config import load_env
 from models.exceptions import InvalidTermError, ParseError
 import os
 import re
-from models.model import Term
+from models.model import Term, count_nodes
 
-load_dotenv()
+load_env()
+
+# Entries kept as live Term objects before the least recently used spill to disk
+DEFAULT_HISTORY_CAPACITY = int(os.getenv('HISTORY_CAPACITY', 4096))
+
+HISTORY_REFERENCE = re.compile(r'%([0-9]+)')
+
+def history_indices(names: Iterable[str]) -> list[int]:
+    """Pick the history references (%n) out of a collection of identifiers"""
+    return [int(match.group(1)) for name in names if (match := HISTORY_REFERENCE.fullmatch(name))]
 
 # MARK: HistoryStore Class
 class HistoryStore:
-    """Minimal history storage persistant layer with index-based overwrite semantics"""
-    
+    """In-process history of %n entries holding Term objects directly.
+
+    Terms are treated as immutable, so fetch hands back the stored object
+    without copying or re-parsing it. At most `capacity` entries stay in
+    memory; beyond that the least recently used are written as literals to a
+    private SQLite spill file and parsed again only if they are fetched.
+    Steps linked to a ReductionTrace count against the same capacity; they
+    are spilled first, oldest first, one checkpoint segment at a time.
+
+    Example:
+        >>> history = HistoryStore(capacity=2)
+        >>> history.insert(0, Variable("x"))
+        >>> history.fetch(0)
+        x
+    """
+
     # MARK: Initialization
-    def __init__(self, db_path: str = 'file::memory:?cache=shared', uri: bool = True):
-        r"""Initialize the history store with a SQLite database.
-        :param db_path: Path to the SQLite database file.
-        :param uri: Whether to use URI filename.
+    def __init__(self, capacity: int = DEFAULT_HISTORY_CAPACITY, spill_path: Optional[str] = None):
+        """Initialize an empty history.
+
+        Arguments:
+            capacity (int): Entries kept in memory before spilling
+            spill_path (str, optional): File for spilled entries; a temporary
+                file is created on first spill when omitted
         """
-        self.conn = sqlite3.connect(db_path, uri=uri)
-        self._init_table()
-
-    # MARK: Table Initialization
-    def _init_table(self):
-        """Create or overwrite history table"""
-        self.conn.execute('''
-            CREATE TABLE IF NOT EXISTS history (
-                id INTEGER PRIMARY KEY,
-                literal TEXT NOT NULL
-            ) WITHOUT ROWID
-        ''')
-        self.conn.commit()
-    
+        self.capacity = max(1, capacity)
+        self.spill_path = spill_path
+        self._entries: "OrderedDict[int, Term]" = OrderedDict()
+        self._spilled: set[int] = set()
+        # Indices whose term lives in a ReductionTrace rather than in this store
+        self._traces: "OrderedDict[int, ReductionTrace]" = OrderedDict()
+        self._spill: Optional[sqlite3.Connection] = None
+        self._owns_spill_file = spill_path is None
+        self._closed = False
+        self._lock = threading.RLock()
+
     # MARK: Clear History
     def clear(self) -> None:
-        """Clear the history table"""
-        self.conn.execute('DROP TABLE IF EXISTS history')
-        self.conn.execute('''
-            CREATE TABLE history (
-                id INTEGER PRIMARY KEY,
-                literal TEXT NOT NULL
-            ) WITHOUT ROWID
-        ''')
+        """Drop every entry, in memory and on disk"""
+        with self._lock:
+            self._entries.clear()
+            self._spilled.clear()
+            self._traces.clear()
+            if self._spill is not None:
+                self._spill.execute('DELETE FROM history')
+                self._spill.commit()
 
     # MARK: Insert Entry
-    def insert(self, index: int, literal: str) -> None:
-        """Insert/overwrite entry at specified index"""
-        
-        self.conn.execute('''
-            INSERT OR REPLACE INTO history (id, literal)
-            VALUES (?, ?)
-        ''', (index, literal))
-        self.conn.commit()
+    def insert(self, index: int, term: Union[Term, str]) -> None:
+        """Insert/overwrite entry at specified index
+
+        Arguments:
+            index (int): History slot, referenced as %index
+            term (Term | str): Term to store; literals are parsed once here
+
+        Throws:
+            ValueError: If the history was closed
+        """
+        if isinstance(term, str):
+            from parser import parse_lambda
+            term = parse_lambda(term.strip())
+
+        with self._lock:
+            self._check_open()
+            self._entries[index] = term
+            self._entries.move_to_end(index)
+            self._spilled.discard(index)
+            self._traces.pop(index, None)
+            self._evict()
 
     # MARK: Fetch Entry
     def fetch(self, index: int) -> Term:
-        """Get literal by index, raises IndexError if missing"""
-        from parser import parse_term
-        from utils.persistence import TermDB
-        
-        # Validate index
+        """Get term by index, raises IndexError if missing"""
         if not isinstance(index, int) or index < 0:
             raise IndexError(f"Invalid index: {index}")
-        
-        # Fetch the literal
-        cursor = self.conn.execute('''
-            SELECT literal FROM history
-            WHERE id = ?
-        ''', (index,))
-        
-        if result := cursor.fetchone():
-            return parse_term(result[0], TermDB(), self)
-        else:
-            raise IndexError(f"Index {index} not found in history")
-    def list_entries(self) -> list[tuple[str, str]]:
+
+        with self._lock:
+            if (term := self._entries.get(index)) is not None:
+                self._entries.move_to_end(index)
+                return term
+            if index in self._spilled:
+                term = self._unspill(index)
+                self.insert(index, term)
+                return term
+            if (trace := self._traces.get(index)) is not None:
+                return trace.get(index)
+        raise IndexError(f"Index {index} not found in history")
+
+    def __contains__(self, index: int) -> bool:
+        return index in self._entries or index in self._spilled or index in self._traces
+
+    def link(self, index: int, trace: "ReductionTrace") -> None:
+        """Serve entry `index` from a reduction trace instead of storing the term
+
+        The trace keeps the step as a delta, so the full term is rebuilt only
+        when the entry is fetched.
+        """
+        with self._lock:
+            self._check_open()
+            self._entries.pop(index, None)
+            self._spilled.discard(index)
+            self._traces.pop(index, None)
+            self._traces[index] = trace
+            self._evict()
+
+    def get_entries(self, names: Iterable[str]) -> list[tuple[str, Term]]:
+        """Return (%n, term) pairs for the history references among `names`"""
+        entries = []
+        for index in history_indices(names):
+            if index in self:
+                entries.append((f"%{index}", self.fetch(index)))
+        return entries
+
+    def list_entries(self) -> list[tuple[str, Term]]:
         """Return a list of tuples with index in the form %n and the corresponding term."""
+        with self._lock:
+            indices = sorted(self._entries.keys() | self._spilled | self._traces.keys())
+        return [(f"%{index}", self.fetch(index)) for index in indices]
+
+    # MARK: Memory Accounting
+    def memory_usage(self) -> dict[str, int]:
+        """Summarize what the history holds
+
+        Returns:
+            dict[str, int]: `entries` in memory, `spilled` to disk, `linked`
+            to reduction traces, and `nodes`, the distinct Term nodes kept
+            alive (shared structure counted once)
+        """
+        with self._lock:
+            roots = list(self._entries.values())
+            traces = {id(trace): trace for trace in self._traces.values()}
+            usage = {
+                'entries': len(self._entries),
+                'spilled': len(self._spilled),
+                'linked': len(self._traces),
+            }
+        for trace in traces.values():
+            roots += trace.terms()
+        usage['nodes'] = count_nodes(roots)
+        return usage
+
+    # MARK: Spill File
+    def _evict(self) -> None:
+        """Spill entries until no more than `capacity` are held in memory or in traces"""
+        while len(self._entries) + len(self._traces) > self.capacity:
+            if not self._traces:
+                self._spill_entries([self._entries.popitem(last=False)])
+                continue
+            index, trace = next(iter(self._traces.items()))
+            # The trace drops the whole segment; steps this store links are kept on disk
+            steps = [(step, term) for step, term in trace.pop_segment(index) if self._traces.get(step) is trace]
+            for step, _ in steps:
+                del self._traces[step]
+            self._traces.pop(index, None)
+            self._spill_entries(steps)
+
+    def _spill_entries(self, entries: list[tuple[int, Term]]) -> None:
+        """Move entries out of memory into the spill file"""
+        if not entries:
+            return
+        if self._spill is None:
+            if self.spill_path is None:
+                import tempfile
+                handle, self.spill_path = tempfile.mkstemp(prefix='pylambda-history-', suffix='.db')
+                os.close(handle)
+            self._spill = sqlite3.connect(self.spill_path, check_same_thread=False)
+            self._spill.execute('''
+                CREATE TABLE IF NOT EXISTS history (
+                    id INTEGER PRIMARY KEY,
+                    literal TEXT NOT NULL
+                ) WITHOUT ROWID
+            ''')
+        self._spill.executemany(
+            'INSERT OR REPLACE INTO history (id, literal) VALUES (?, ?)',
+            ((index, term.literal()) for index, term in entries)
+        )
+        self._spill.commit()
+        self._spilled.update(index for index, _ in entries)
+
+    def _unspill(self, index: int) -> Term:
+        """Read a spilled entry back"""
         from parser import parse_lambda
-        cursor = self.conn.execute('SELECT id, literal FROM history')
-        return [(f"%{row[0]}", parse_lambda(row[1])) for row in cursor.fetchall()]
+        row = self._spill.execute('SELECT literal FROM history WHERE id = ?', (index,)).fetchone()
+        return parse_lambda(row[0])
+
+    # MARK: Close
+    def _check_open(self) -> None:
+        # A closed store would otherwise start a spill file nobody removes
+        if self._closed:
+            raise ValueError("History is closed")
 
-    # MARK: Close Connection
-    def close(self):
-        """Close database connection"""
-        self.conn.close()
\ No newline at end of file
+    def close(self) -> None:
+        """Release the spill file; the store takes no new entries afterwards"""
+        with self._lock:
+            self._closed = True
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+                if self._owns_spill_file and self.spill_path:
+                    os.remove(self.spill_path)
+                    self.spill_path = None
+            self._entries.clear()
+            self._spilled.clear()
+            self._traces.clear()
@@ -8,103 +8,366 @@
 
 # MARK: Imports
 import sqlite3
-from typing import Optional, List
+from contextlib import contextmanager
+from typing import Optional, List, Iterable, Iterator
 from utils.history import HistoryStore
+from utils.pool import ConnectionPool, get_pool
 from models.model import Term
 from models.exceptions import InvalidTermError, ParseError
-from dotenv import load_dotenv
+from utils.config import load_env
+from collections import deque
+from functools import lru_cache
+import json
 import os
 import re
 
 # MARK: Initialization
-load_dotenv()
+load_env()
+
+# Dependency rows for definitions in the base table use this namespace
+BASE_NAMESPACE = 'base'
+# Bumped whenever _create_table changes the schema (including the scope view)
+# or needs to backfill derived data; databases already at this version skip all DDL
+SCHEMA_VERSION = 2
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern: str, flags: int = 0) -> re.Pattern:
+    """Compile and memoize a regex used for identifier/literal filtering"""
+    return re.compile(pattern, flags)
+
+def topological_order(identifiers: Iterable[str], edges: Iterable[tuple[str, str]]) -> list[str]:
+    """Sort identifiers so that each comes after everything it depends on.
+
+    Arguments:
+        identifiers (Iterable[str]): Names to order; input order breaks ties
+        edges (Iterable[tuple[str, str]]): (identifier, depends_on) pairs; edges
+            leaving the given identifiers are ignored
+
+    Returns:
+        list[str]: Ordered names. Members of a cycle are appended in input order.
+    """
+    identifiers = list(dict.fromkeys(identifiers))
+    members = set(identifiers)
+    missing = {identifier: 0 for identifier in identifiers}
+    dependents: dict[str, list[str]] = {}
+    for identifier, depends_on in set(edges):
+        if identifier in members and depends_on in members and identifier != depends_on:
+            missing[identifier] += 1
+            dependents.setdefault(depends_on, []).append(identifier)
+
+    ordered = []
+    ready = deque(identifier for identifier in identifiers if not missing[identifier])
+    while ready:
+        current = ready.popleft()
+        ordered.append(current)
+        for identifier in dependents.get(current, ()):
+            missing[identifier] -= 1
+            if not missing[identifier]:
+                ready.append(identifier)
+    placed = set(ordered)
+    return ordered + [identifier for identifier in identifiers if identifier not in placed]
 
 class TermDB:
-    """SQLite persistence layer for lambda terms"""
+    """SQLite persistence layer for lambda terms
+
+    Instances are cheap: connections come from the process-wide pool for
+    `db_path`, one per thread, and the parse cache is shared by every TermDB
+    opened on the same file.
+    """
     
-    def __init__(self, db_path: str = os.getenv('DEFAULT_DB_PATH')):
-        self.conn = sqlite3.connect(db_path)
-        self.conn.create_function('REGEXP', 2, self._regexp)
-        self._create_table()
+    def __init__(self, db_path: str = os.getenv('DEFAULT_DB_PATH'), pool: Optional[ConnectionPool] = None):
+        self.pool = pool or get_pool(db_path)
+        self.pool.add_initializer(TermDB._register_functions)
+        # (namespace, identifier) -> (literal, parsed Term); an entry is only
+        # used while the row still holds that literal, so writes from other
+        # processes sharing the file are picked up on the next read
+        self._cache: dict[tuple[str, str], tuple[str, Term]] = self.pool.cache.setdefault('terms', {})
+        self.pool.run_once('termdb.schema', self._create_table)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The calling thread's pooled connection"""
+        return self.pool.connection()
+
+    @staticmethod
+    def _register_functions(conn: sqlite3.Connection) -> None:
+        """Install the SQL functions TermDB queries rely on"""
+        conn.create_function('REGEXP', 2, TermDB._regexp, deterministic=True)
+        conn.create_function('REGEXP_NOCASE', 2, TermDB._regexp_nocase, deterministic=True)
 
     # MARK: Regex Helper
     @staticmethod
     def _regexp(pattern: str, value: str) -> bool:
-        """SQLite regex helper with partial matching"""
-        try:
-            return re.search(pattern, value) is not None
-        except re.error:
-            return False
+        """SQLite regex helper with full matching, backing `value REGEXP pattern`"""
+        return compile_pattern(pattern).fullmatch(value) is not None
+
+    @staticmethod
+    def _regexp_nocase(pattern: str, value: str) -> bool:
+        """Case-insensitive variant of `_regexp`, called as REGEXP_NOCASE(pattern, value)"""
+        return compile_pattern(pattern, re.IGNORECASE).fullmatch(value) is not None
     
     # MARK: Table Management
     def _create_table(self):
         """Initialize database schema"""
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+            # Up to date: opening the database stays read-only
+            return
+
         self.conn.execute('''
             CREATE TABLE IF NOT EXISTS base (
                 identifier TEXT PRIMARY KEY,
                 literal TEXT NOT NULL
             )
         ''')
+        # identifier = ? is served by the primary key; these cover the rest
+        self.conn.execute('''
+            CREATE INDEX IF NOT EXISTS base_identifier_nocase
+            ON base (identifier COLLATE NOCASE)
+        ''')
+        self.conn.execute('''
+            CREATE INDEX IF NOT EXISTS base_literal
+            ON base (literal)
+        ''')
+
+        # Namespaces share one table keyed by (namespace, identifier)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS namespaces (
+                name TEXT PRIMARY KEY
+            ) WITHOUT ROWID
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS namespace_terms (
+                namespace TEXT NOT NULL,
+                identifier TEXT NOT NULL,
+                literal TEXT NOT NULL,
+                PRIMARY KEY (namespace, identifier)
+            ) WITHOUT ROWID
+        ''')
+        self.conn.execute('''
+            CREATE INDEX IF NOT EXISTS namespace_terms_identifier
+            ON namespace_terms (identifier)
+        ''')
+
+        # USE records an overlay instead of copying rows; earlier imports win
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS namespace_imports (
+                namespace TEXT PRIMARY KEY,
+                position INTEGER NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        # Identifiers deleted from the session while an import still provides them
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS namespace_hidden (
+                identifier TEXT PRIMARY KEY
+            ) WITHOUT ROWID
+        ''')
+
+        # Edges of the definition graph: `identifier` references `depends_on`
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS dependencies (
+                namespace TEXT NOT NULL,
+                identifier TEXT NOT NULL,
+                depends_on TEXT NOT NULL,
+                PRIMARY KEY (namespace, identifier, depends_on)
+            ) WITHOUT ROWID
+        ''')
+        self.conn.execute('''
+            CREATE INDEX IF NOT EXISTS dependencies_reverse
+            ON dependencies (depends_on, namespace)
+        ''')
+
+        # Everything visible to the session: base first, then imported overlays
+        self.conn.execute('DROP VIEW IF EXISTS scope')
+        self.conn.execute(f'''
+            CREATE VIEW scope (identifier, literal, namespace) AS
+            SELECT identifier, literal, '{BASE_NAMESPACE}' FROM base
+            UNION ALL
+            SELECT n.identifier, n.literal, n.namespace
+            FROM namespace_imports i
+            JOIN namespace_terms n ON n.namespace = i.namespace
+            WHERE n.identifier NOT IN (SELECT identifier FROM base)
+              AND n.identifier NOT IN (SELECT identifier FROM namespace_hidden)
+              AND NOT EXISTS (
+                  SELECT 1 FROM namespace_imports j
+                  JOIN namespace_terms m ON m.namespace = j.namespace
+                  WHERE m.identifier = n.identifier AND j.position < i.position
+              )
+        ''')
         self.conn.commit()
+        self._migrate_legacy_namespaces()
+        self._migrate_schema()
+
+    def _migrate_legacy_namespaces(self):
+        """Move table-per-namespace `ns_<name>` tables into namespace_terms"""
+        cursor = self.conn.execute('''
+            SELECT name FROM sqlite_master
+            WHERE type='table'
+            AND name LIKE 'ns\\_%' ESCAPE '\\'
+        ''')
+        legacy_tables = [row[0] for row in cursor.fetchall()]
+        if not legacy_tables:
+            return
+
+        with self.transaction():
+            for table in legacy_tables:
+                name = table.split('_', 1)[1]
+                self.conn.execute('INSERT OR IGNORE INTO namespaces (name) VALUES (?)', (name,))
+                self.conn.execute(f'''
+                    INSERT OR REPLACE INTO namespace_terms (namespace, identifier, literal)
+                    SELECT ?, identifier, literal FROM "{table}"
+                    WHERE identifier IS NOT NULL AND literal IS NOT NULL
+                ''', (name,))
+                self._derive_dependencies(self.conn.execute(
+                    'SELECT namespace, identifier, literal FROM namespace_terms WHERE namespace = ?', (name,)
+                ).fetchall())
+            for table in legacy_tables:
+                self.conn.execute(f'DROP TABLE "{table}"')
         
+    def _migrate_schema(self):
+        """Backfill data introduced by newer schema versions"""
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        with self.transaction():
+            if version < 1:
+                # Existing rows predate dependency tracking; derive edges from their literals
+                rows = [(BASE_NAMESPACE, identifier, literal) for identifier, literal in
+                        self.conn.execute('SELECT identifier, literal FROM base')]
+                rows += self.conn.execute(
+                    'SELECT namespace, identifier, literal FROM namespace_terms'
+                ).fetchall()
+                self._derive_dependencies(rows)
+            self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def _derive_dependencies(self, rows: Iterable[tuple[str, str, str]]) -> None:
+        """Record edges for (namespace, identifier, literal) rows from their free variables"""
+        from parser import parse_lambda
+        for namespace, identifier, literal in rows:
+            try:
+                references = parse_lambda(literal).free_variables()
+            except ParseError:
+                continue
+            self._record_dependencies(namespace, identifier, references)
+
+    # MARK: Transactions
+    @contextmanager
+    def transaction(self) -> Iterator["TermDB"]:
+        """Group writes into a single SQLite transaction.
+
+        Nested blocks join the outermost one, which commits on success and
+        rolls back if an exception escapes it. The depth is tracked per
+        thread by the pool, so other TermDB instances on this thread join
+        the same block and other threads' blocks are left alone.
+
+        Example:
+            >>> with db.transaction():
+            ...     db.insert_term("I", identity)
+            ...     db.delete_terms("K")
+        """
+        with self.pool.transaction():
+            yield self
+
+    def _commit(self) -> None:
+        """Commit unless an enclosing transaction() block will do it"""
+        self.pool.commit()
+
     # MARK: Term Retrieval
     def get_term(self, identifier: str) -> Optional[Term]:
         """Retrieve a term by its exact identifier"""
-        from parser import parse_lambda
         cursor = self.conn.execute(
-            'SELECT literal FROM base WHERE identifier = ?', (identifier,)
+            'SELECT identifier, literal, namespace FROM scope WHERE identifier = ?', (identifier,)
         )
-        row = cursor.fetchone()
-        if row:
-            try:
-                return parse_lambda(row[0])
-            except ParseError as e:
-                raise ParseError(f"Invalid term {identifier}") from e
+        if rows := self._parse_rows(cursor.fetchall(), skip_invalid=False):
+            return rows[0][1]
         return None
 
     # MARK: Term Deletion
     def delete_terms(self, identifier: str, regex: bool = False) -> None:
-        """Delete terms by scanning all entries"""
+        """Delete a term by identifier, or every term matching a regex"""
         if regex:
-            targets = self.get_all_terms(
+            targets = [target_id for target_id, _ in self.get_all_terms(
                 identifier_pattern=identifier,
                 forced=not regex,
                 case_sensitive=True
-            )
+            )]
         else:
-            target = self.get_term(identifier)
-            if target:
-                targets = [(identifier, target)]
-            else:
-                targets = []
-        
-        for target_id, _ in targets:
-            self.conn.execute('DELETE FROM base WHERE identifier = ?', (target_id,))
-        self.conn.commit()
+            targets = [identifier]
+        self.delete_many(targets)
+
+    def delete_many(self, identifiers: Iterable[str]) -> None:
+        """Delete several terms by exact identifier in one transaction
+
+        Terms that come from an imported namespace are hidden from the
+        session rather than removed from the namespace itself.
+        """
+        identifiers = [(identifier,) for identifier in identifiers]
+        self.invalidate(identifier for identifier, in identifiers)
+        with self.transaction():
+            self.conn.executemany('DELETE FROM base WHERE identifier = ?', identifiers)
+            self.conn.executemany(
+                f"DELETE FROM dependencies WHERE namespace = '{BASE_NAMESPACE}' AND identifier = ?",
+                identifiers
+            )
+            self.conn.executemany('''
+                INSERT OR IGNORE INTO namespace_hidden (identifier)
+                SELECT n.identifier FROM namespace_imports i
+                JOIN namespace_terms n ON n.namespace = i.namespace
+                WHERE n.identifier = ?
+                LIMIT 1
+            ''', identifiers)
 
     # MARK: Term Insertion
-    def insert_term(self, identifier: str, term: Term) -> None:
-        """Insert with existence check via get_all_terms"""
-        exists = any(t[0] == identifier for t in self.get_all_terms())
-        
-        if exists:
-            self.conn.execute('''
-                UPDATE base SET literal = ?
-                WHERE identifier = ?
-            ''', (term.literal(), identifier))
-        else:
+    def insert_term(self, identifier: str, term: Term, depends_on: Optional[Iterable[str]] = None) -> None:
+        """Insert a term, overwriting any existing definition
+
+        Arguments:
+            identifier (str): Name to define
+            term (Term): Definition to store
+            depends_on (Iterable[str], optional): Identifiers the definition was
+                written in terms of; the term's own free variables are always included
+        """
+        with self.transaction():
             self.conn.execute('''
                 INSERT INTO base (identifier, literal)
                 VALUES (?, ?)
+                ON CONFLICT(identifier) DO UPDATE SET literal = excluded.literal
             ''', (identifier, term.literal()))
-        self.conn.commit()
+            self._record_dependencies(
+                BASE_NAMESPACE, identifier, term.free_variables() | set(depends_on or ())
+            )
+        self.invalidate([identifier])
+
+    def insert_many(self, terms: Iterable[tuple[str, Term]]) -> None:
+        """Insert or overwrite several terms in one transaction"""
+        terms = list(terms)
+        if not terms:
+            return
+        with self.transaction():
+            self.conn.executemany('''
+                INSERT INTO base (identifier, literal)
+                VALUES (?, ?)
+                ON CONFLICT(identifier) DO UPDATE SET literal = excluded.literal
+            ''', ((identifier, term.literal()) for identifier, term in terms))
+            for identifier, term in terms:
+                self._record_dependencies(BASE_NAMESPACE, identifier, term.free_variables())
+        self.invalidate(identifier for identifier, _ in terms)
     
     # MARK: Get All Var Names 
     def get_vars(self) -> List[str]:
-        cursor = self.conn.execute('SELECT identifier FROM base')
+        cursor = self.conn.execute('SELECT identifier FROM scope')
         return [row[0] for row in cursor.fetchall()]
     
     # MARK: Term Querying
+    def get_terms(self, identifiers: Iterable[str]) -> List[tuple[str, Term]]:
+        """Retrieve the terms defined for the given exact identifiers"""
+        # A single JSON parameter keeps the SQL text constant, so the statement cache can reuse it
+        cursor = self.conn.execute(
+            'SELECT identifier, literal, namespace FROM scope WHERE identifier IN (SELECT value FROM json_each(?))',
+            (json.dumps(list(dict.fromkeys(identifiers))),)
+        )
+        return self._parse_rows(cursor.fetchall(), skip_invalid=True)
+
     def get_all_terms(
         self,
         identifier_pattern: Optional[str] = None,
@@ -113,103 +376,204 @@ class TermDB:
         skip_invalid: bool = True,
         forced: bool = False
     ) -> List[tuple[str, Term]]:
-        """Retrieve terms with optional regex/string search"""
+        """Retrieve terms with optional regex/string search
+
+        Filtering happens in the WHERE clause, so only matching rows are parsed.
+        With `forced` the patterns are compared verbatim, otherwise they must
+        fully match as regular expressions.
+        """
+        clauses, params = [], []
+        for column, pattern in (('identifier', identifier_pattern), ('literal', literal_pattern)):
+            if not pattern:
+                continue
+            if forced:
+                clauses.append(f'{column} = ?' if case_sensitive else f'{column} = ? COLLATE NOCASE')
+            else:
+                # Compile up front so a bad pattern surfaces as re.error, not as a SQLite error
+                compile_pattern(pattern, 0 if case_sensitive else re.IGNORECASE)
+                clauses.append(f'{column} REGEXP ?' if case_sensitive else f'REGEXP_NOCASE(?, {column})')
+            params.append(pattern)
+
+        query = 'SELECT identifier, literal, namespace FROM scope'
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        cursor = self.conn.execute(query, params)
+        return self._parse_rows(cursor.fetchall(), skip_invalid)
+
+    def _parse_rows(self, rows: list[tuple[str, str, str]], skip_invalid: bool) -> List[tuple[str, Term]]:
+        """Parse (identifier, literal, namespace) rows into (identifier, Term) pairs
+
+        A cached parse is reused only if it was made from the same literal.
+        """
         from parser import parse_lambda
 
-        cursor = self.conn.execute('SELECT * FROM base')
         results = []
-        fetched = cursor.fetchall()
-        
-        for row in fetched:
-            identifier, literal = row
-
-            if identifier_pattern:
-                if forced:
-                    if case_sensitive:
-                        if identifier_pattern != identifier:
-                            continue
-                    else:
-                        if identifier_pattern.lower() != identifier.lower():
-                            continue
-                else:
-                    flags = 0 if case_sensitive else re.IGNORECASE
-                    if not re.fullmatch(identifier_pattern, identifier, flags=flags):
-                        continue
-
-            if literal_pattern:
-                if forced:
-                    if case_sensitive:
-                        if literal_pattern != literal:
-                            continue
-                    else:
-                        if literal_pattern.lower() != literal.lower():
-                            continue
-                else:
-                    flags = 0 if case_sensitive else re.IGNORECASE
-                    if not re.fullmatch(literal_pattern, literal, flags=flags):
-                        continue
-
-            try:
-                term = parse_lambda(literal)
-                results.append((identifier, term))
-            except ParseError as e:
-                if not skip_invalid:
-                    raise ParseError(f"Invalid term {identifier}") from e
-                continue
+        for identifier, literal, namespace in rows:
+            cached = self._cache.get((namespace, identifier))
+            if cached is not None and cached[0] == literal:
+                term = cached[1]
+            else:
+                try:
+                    term = parse_lambda(literal)
+                except ParseError as e:
+                    if not skip_invalid:
+                        raise ParseError(f"Invalid term {identifier}") from e
+                    continue
+                self._cache[(namespace, identifier)] = (literal, term)
+            results.append((identifier, term))
         return results
+
+    # MARK: Dependency Graph
+    def _record_dependencies(self, namespace: str, identifier: str, references: Iterable[str]) -> None:
+        """Replace the outgoing edges of `identifier` within `namespace`"""
+        self.conn.execute(
+            'DELETE FROM dependencies WHERE namespace = ? AND identifier = ?', (namespace, identifier)
+        )
+        self.conn.executemany('''
+            INSERT OR IGNORE INTO dependencies (namespace, identifier, depends_on)
+            VALUES (?, ?, ?)
+        ''', ((namespace, identifier, reference) for reference in references
+              if reference != identifier and not reference.startswith('%')))
+
+    # MARK: Cache
+    def invalidate(self, identifiers: Iterable[str], namespace: str = BASE_NAMESPACE) -> None:
+        """Drop cached parses of `identifiers` in `namespace` once their rows changed
+
+        Entries are checked against the stored literal anyway; this only
+        frees the memory of ones that can no longer match.
+        """
+        for identifier in identifiers:
+            self._cache.pop((namespace, identifier), None)
         
     # MARK: Conn Management
     def close(self):
-        """Close database connection"""
-        self.conn.close()
+        """Close this thread's pooled connection"""
+        self.pool.close()
 
     # MARK: Namespaces
     def list_namespaces(self) -> list[str]:
         """List all available namespaces excluding 'base'"""
-        cursor = self.conn.execute('''
-            SELECT name FROM sqlite_master 
-            WHERE type='table' 
-            AND name LIKE 'ns\\_%' ESCAPE '\\'
-        ''')
-        return [t[0].split('_', 1)[1] for t in cursor.fetchall()]
+        cursor = self.conn.execute('SELECT name FROM namespaces')
+        return [row[0] for row in cursor.fetchall()]
+
+    def get_namespace_terms(self, name: str) -> List[tuple[str, Term]]:
+        """Retrieve every term stored in a namespace, imported or not"""
+        self._validate_namespace_name(name)
+        if not self._namespace_exists(name):
+            raise ValueError(f"Namespace {name} does not exist")
+        cursor = self.conn.execute(
+            'SELECT identifier, literal, namespace FROM namespace_terms WHERE namespace = ?', (name,)
+        )
+        return self._parse_rows(cursor.fetchall(), skip_invalid=True)
 
     def save_namespace(self, name: str, force: bool = False) -> None:
-        """Save current base table as a new namespace"""
+        """Snapshot every term visible in the session as a namespace"""
         self._validate_namespace_name(name)
-        namespace_table = f'ns_{name}'
-        
-        if self._table_exists(namespace_table):
+
+        if self._namespace_exists(name):
             if not force:
                 raise ValueError(f"Namespace {name} exists. Use force decorator to overwrite")
-            self.conn.execute(f'DROP TABLE {namespace_table}')
 
-        self.conn.execute(f'''
-            CREATE TABLE {namespace_table} AS
-            SELECT * FROM base
-        ''')
-        self.conn.commit()
+        # Materialize first: the scope may itself read from the namespace being replaced
+        rows = self.conn.execute('SELECT identifier, literal FROM scope').fetchall()
+        edges = self.conn.execute('''
+            SELECT s.identifier, d.depends_on FROM scope s
+            JOIN dependencies d ON d.namespace = s.namespace AND d.identifier = s.identifier
+        ''').fetchall()
+        with self.transaction():
+            self.conn.execute('INSERT OR IGNORE INTO namespaces (name) VALUES (?)', (name,))
+            self.conn.execute('DELETE FROM namespace_terms WHERE namespace = ?', (name,))
+            self.conn.execute('DELETE FROM dependencies WHERE namespace = ?', (name,))
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO namespace_terms (namespace, identifier, literal)
+                VALUES (?, ?, ?)
+            ''', ((name, identifier, literal) for identifier, literal in rows))
+            self.conn.executemany('''
+                INSERT OR IGNORE INTO dependencies (namespace, identifier, depends_on)
+                VALUES (?, ?, ?)
+            ''', ((name, identifier, depends_on) for identifier, depends_on in edges))
+        self.invalidate((identifier for identifier, _ in rows), name)
 
-    def use_namespace(self, name: str) -> None:
-        """Import terms from a namespace into base table"""
+    def use_namespace(self, name: str, identifiers: Optional[Iterable[str]] = None) -> None:
+        """Import a namespace as a read-only overlay beneath the base table
+
+        Base definitions keep precedence over imported ones, and namespaces
+        imported earlier take precedence over later ones.
+
+        Arguments:
+            name (str): Namespace to import
+            identifiers (Iterable[str], optional): Import only these names and
+                the definitions they transitively reference. They are copied
+                into base in dependency order instead of overlaying the namespace.
+        """
         self._validate_namespace_name(name)
-        namespace_table = f'ns_{name}'
-        
-        if not self._table_exists(namespace_table):
+
+        if not self._namespace_exists(name):
             raise ValueError(f"Namespace {name} does not exist")
-            
-        self.conn.execute(f'''
-            INSERT OR IGNORE INTO base (identifier, literal)
-            SELECT identifier, literal FROM {namespace_table}
-        ''')
-        self.conn.commit()
+
+        if identifiers is not None:
+            self._use_closure(name, list(identifiers))
+            return
+
+        with self.transaction():
+            self.conn.execute('''
+                INSERT OR IGNORE INTO namespace_imports (namespace, position)
+                SELECT ?, COALESCE(MAX(position), 0) + 1 FROM namespace_imports
+            ''', (name,))
+            # Re-importing brings back anything previously deleted from it
+            self.conn.execute('''
+                DELETE FROM namespace_hidden WHERE identifier IN (
+                    SELECT identifier FROM namespace_terms WHERE namespace = ?
+                )
+            ''', (name,))
+
+    def _use_closure(self, name: str, identifiers: list[str]) -> None:
+        """Copy `identifiers` and their transitive dependencies from a namespace into base"""
+        if not identifiers:
+            return
+        rows = self.conn.execute('''
+            WITH RECURSIVE needed (identifier) AS (
+                SELECT value FROM json_each(?)
+                UNION
+                SELECT d.depends_on FROM dependencies d
+                JOIN needed n ON d.identifier = n.identifier
+                WHERE d.namespace = ?
+            )
+            SELECT t.identifier, t.literal FROM namespace_terms t
+            JOIN needed n ON t.identifier = n.identifier
+            WHERE t.namespace = ?
+        ''', (json.dumps(identifiers), name, name)).fetchall()
+
+        found = {identifier for identifier, _ in rows}
+        if missing := [identifier for identifier in identifiers if identifier not in found]:
+            raise ValueError(f"Namespace {name} does not define {', '.join(missing)}")
+
+        edges = self.conn.execute(
+            'SELECT identifier, depends_on FROM dependencies WHERE namespace = ?', (name,)
+        ).fetchall()
+        literals = dict(rows)
+        # Existing base definitions win, exactly as with an overlay import
+        shadowed = {identifier for identifier, in self.conn.execute(
+            'SELECT identifier FROM base WHERE identifier IN (SELECT value FROM json_each(?))',
+            (json.dumps(list(literals)),)
+        )}
+        order = [identifier for identifier in topological_order(literals, edges) if identifier not in shadowed]
+        with self.transaction():
+            self.conn.executemany(
+                'INSERT INTO base (identifier, literal) VALUES (?, ?)',
+                ((identifier, literals[identifier]) for identifier in order)
+            )
+            self.conn.executemany(f'''
+                INSERT OR IGNORE INTO dependencies (namespace, identifier, depends_on)
+                SELECT '{BASE_NAMESPACE}', identifier, depends_on FROM dependencies
+                WHERE namespace = ? AND identifier = ?
+            ''', ((name, identifier) for identifier in order))
+        self.invalidate(order)
 
     # MARK: Helpers
-    def _table_exists(self, table_name: str) -> bool:
-        """Check if table exists in database"""
-        cursor = self.conn.execute('''
-            SELECT 1 FROM sqlite_master 
-            WHERE type='table' AND name=?
-        ''', (table_name,))
+    def _namespace_exists(self, name: str) -> bool:
+        """Check if a namespace has been saved"""
+        cursor = self.conn.execute('SELECT 1 FROM namespaces WHERE name = ?', (name,))
         return bool(cursor.fetchone())
 
     def _validate_namespace_name(self, name: str) -> None:
@@ -0,0 +1,196 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# utils/pool.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator
+from utils.config import load_env
+import os
+
+load_env()
+
+# MARK: Configuration
+# Milliseconds a connection waits on a locked database before raising
+DEFAULT_BUSY_TIMEOUT = int(os.getenv('DB_BUSY_TIMEOUT', 5000))
+# Compiled statements kept per connection, keyed by SQL text
+DEFAULT_CACHED_STATEMENTS = int(os.getenv('DB_CACHED_STATEMENTS', 256))
+
+# MARK: ConnectionPool Class
+class ConnectionPool:
+    """Thread-safe SQLite connection provider for a single database file.
+
+    Every thread gets its own connection, opened on first use and reused for
+    the thread's lifetime, so concurrent sessions never share a cursor or a
+    transaction. File databases run in WAL mode so readers do not block the
+    writer, and `busy_timeout` makes writers queue instead of failing with
+    "database is locked".
+
+    Attributes:
+        db_path (str): Database path or URI
+        cache (dict): Scratch space shared by every user of this database in
+            the process (e.g. TermDB's parse cache)
+
+    Example:
+        >>> pool = get_pool("terms.db")
+        >>> pool.connection().execute("SELECT 1").fetchone()
+        (1,)
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        uri: bool = False,
+        busy_timeout: int = DEFAULT_BUSY_TIMEOUT,
+        cached_statements: int = DEFAULT_CACHED_STATEMENTS,
+        wal: bool = True
+    ):
+        """Initializes a pool without opening any connection.
+
+        Arguments:
+            db_path (str): Path to the SQLite database file, or a URI
+            uri (bool): Whether `db_path` is a URI filename
+            busy_timeout (int): Milliseconds to wait for a lock
+            cached_statements (int): Size of each connection's statement cache
+            wal (bool): Switch file databases to write-ahead logging
+        """
+        self.db_path = db_path
+        self.uri = uri
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self.wal = wal and not self.in_memory
+        self.cache: dict = {}
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._connections: list[sqlite3.Connection] = []
+        self._initializers: list[Callable[[sqlite3.Connection], None]] = []
+        self._done: set[str] = set()
+
+    @property
+    def in_memory(self) -> bool:
+        """Whether the pool points at an in-memory database"""
+        return ':memory:' in self.db_path or 'mode=memory' in self.db_path
+
+    # MARK: Connections
+    def connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            uri=self.uri,
+            timeout=self.busy_timeout / 1000,
+            cached_statements=self.cached_statements,
+            check_same_thread=False
+        )
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout)}')
+        if self.wal:
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+        with self._lock:
+            for initializer in self._initializers:
+                initializer(conn)
+            self._connections.append(conn)
+        return conn
+
+    def add_initializer(self, initializer: Callable[[sqlite3.Connection], None]) -> None:
+        """Run `initializer` on every connection, including ones already open
+
+        Used for per-connection state such as user-defined SQL functions.
+        Registering the same callable twice has no effect.
+        """
+        with self._lock:
+            if initializer in self._initializers:
+                return
+            self._initializers.append(initializer)
+            for conn in self._connections:
+                initializer(conn)
+
+    def run_once(self, key: str, setup: Callable[[], None]) -> None:
+        """Run `setup` the first time `key` is seen for this database
+
+        Schema creation and migrations go through here so that opening many
+        sessions on one file does not repeat DDL on every connection.
+        """
+        with self._lock:
+            if key in self._done:
+                return
+            setup()
+            self._done.add(key)
+
+    # MARK: Transactions
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Group the calling thread's writes into one SQLite transaction.
+
+        The nesting depth is kept per thread, beside the connection it
+        belongs to, so every TermDB or HistoryStore sharing that connection
+        joins the same outermost block, and other threads never commit or
+        roll it back. The outermost block commits on success and rolls back
+        if an exception escapes it.
+        """
+        conn = self.connection()
+        self._local.depth = getattr(self._local, 'depth', 0) + 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.rollback()
+            raise
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            conn.commit()
+
+    def commit(self) -> None:
+        """Commit the calling thread's connection unless a transaction() block is open"""
+        if not getattr(self._local, 'depth', 0):
+            self.connection().commit()
+
+    # MARK: Close Connections
+    def close(self) -> None:
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            with self._lock:
+                self._connections.remove(conn)
+            conn.close()
+            self._local.conn = None
+            self._local.depth = 0
+
+    def close_all(self) -> None:
+        """Close every connection the pool has opened"""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+# MARK: Pool Registry
+_pools: dict[tuple[str, bool], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path: str, uri: bool = False, **options) -> ConnectionPool:
+    """Return the process-wide pool for a database, creating it on first request
+
+    Arguments:
+        db_path (str): Path to the SQLite database file, or a URI
+        uri (bool): Whether `db_path` is a URI filename
+        **options: Forwarded to ConnectionPool when the pool is created
+
+    Returns:
+        ConnectionPool: The pool shared by every caller using the same path
+    """
+    key = (db_path, uri)
+    with _pools_lock:
+        if (pool := _pools.get(key)) is None:
+            pool = _pools[key] = ConnectionPool(db_path, uri=uri, **options)
+        return pool
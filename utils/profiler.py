@@ -0,0 +1,208 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# utils/profiler.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+import parser
+import models.reduction
+import models.render
+from models.model import Variable, Abstraction, Application, NameSupply
+from models.hooks import Patch, patch, unpatch
+from utils.history import HistoryStore
+from utils.persistence import TermDB
+from utils.trace import ReductionTrace
+
+# Operations counted while profiling, in the order STATS lists them
+COUNTERS = (
+    'steps',                # Top-level reduction steps
+    'beta_contractions',    # Redexes contracted
+    'substitutions',        # `substitute` calls, one per node visited
+    'alpha_conversions',    # `alpha_conversion` calls, one per node visited
+    'fresh_names',          # Names drawn from a NameSupply to avoid capture
+    'normal_form_checks',   # `is_normal_form` calls, one per node visited
+    'allocations',          # Term nodes constructed
+)
+# Phases timed while profiling; time is charged to the innermost one running
+PHASES = ('parse', 'reduce', 'render', 'persist')
+
+# MARK: ReductionProfiler Class
+class ReductionProfiler:
+    """Operation counts and per-phase timings for the reduction engine.
+
+    Nothing is instrumented until `enable` is called: it swaps the counted
+    methods and functions for wrappers, and `disable` puts the originals
+    back, so an idle profiler costs nothing. Counts are process-wide and
+    include every session of a server.
+
+    Example:
+        >>> with profiler:
+        ...     normalize(parse_term(r"(\\x. x) (y)"))
+        >>> profiler.snapshot()['counts']['beta_contractions']
+        1
+    """
+
+    def __init__(self):
+        self._patches: list[Patch] = []
+        self._local = threading.local()
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.reset()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._patches)
+
+    def __enter__(self) -> "ReductionProfiler":
+        self.enable()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.disable()
+
+    # MARK: Recording
+    def reset(self) -> None:
+        """Zero every count and timing"""
+        # Cleared in place: the installed wrappers hold on to these dicts
+        self.counts.update(dict.fromkeys(COUNTERS, 0))
+        self.times.update(dict.fromkeys(PHASES, 0.0))
+        self.peak_nodes = 0
+        self.started = time.perf_counter()
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Charge the time spent in the block to `name`, pausing the enclosing phase"""
+        stack = self._stack()
+        now = time.perf_counter()
+        if stack:
+            self.times[stack[-1][0]] += now - stack[-1][1]
+        stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            name, since = stack.pop()
+            self.times[name] += now - since
+            if stack:
+                stack[-1][1] = now
+
+    def record_step(self, term) -> None:
+        """Count one reduction step ending on `term`"""
+        self.counts['steps'] += 1
+        self.peak_nodes = max(self.peak_nodes, term.size)
+
+    # MARK: Wrappers
+    def _counted(self, original: Callable, counter: str) -> Callable:
+        counts = self.counts
+        def wrapper(*args, **kwargs):
+            counts[counter] += 1
+            return original(*args, **kwargs)
+        return wrapper
+
+    def _timed(self, original: Callable, name: str) -> Callable:
+        def wrapper(*args, **kwargs):
+            with self.phase(name):
+                return original(*args, **kwargs)
+        return wrapper
+
+    def _stepped(self, original: Callable) -> Callable:
+        # beta_reduce_step recurses into subterms; only the outermost call is a step
+        local = self._local
+        def wrapper(*args, **kwargs):
+            if getattr(local, 'stepping', False):
+                return original(*args, **kwargs)
+            local.stepping = True
+            try:
+                with self.phase('reduce'):
+                    result = original(*args, **kwargs)
+            finally:
+                local.stepping = False
+            self.record_step(result)
+            return result
+        return wrapper
+
+    # MARK: Patching
+    def _patch_method(self, owner: type, name: str, wrap: Callable[[Callable], Callable]) -> None:
+        self._patches.append(patch(owner, name, wrap))
+
+    def _patch_function(self, module, name: str, wrap: Callable[[Callable], Callable]) -> None:
+        # Also wrap copies bound by `from module import name` elsewhere
+        original = getattr(module, name)
+        for owner in list(sys.modules.values()):
+            if getattr(owner, '__dict__', {}).get(name) is original:
+                self._patches.append(patch(owner, name, wrap))
+
+    def enable(self) -> None:
+        """Start instrumenting; counts accumulate until `reset`"""
+        if self.enabled:
+            return
+        terms = (Variable, Abstraction, Application)
+        for cls in terms:
+            self._patch_method(cls, '__init__', lambda f: self._counted(f, 'allocations'))
+            self._patch_method(cls, 'substitute', lambda f: self._counted(f, 'substitutions'))
+            self._patch_method(cls, 'alpha_conversion', lambda f: self._counted(f, 'alpha_conversions'))
+            self._patch_method(cls, 'is_normal_form', lambda f: self._counted(f, 'normal_form_checks'))
+            self._patch_method(cls, 'beta_reduce_step', self._stepped)
+        self._patch_method(Application, 'contract', lambda f: self._counted(f, 'beta_contractions'))
+        self._patch_function(models.reduction, 'reduce_step', self._stepped)
+        self._patch_method(NameSupply, 'fresh', lambda f: self._counted(f, 'fresh_names'))
+
+        self._patch_function(parser, 'parse_term', lambda f: self._timed(f, 'parse'))
+        self._patch_function(parser, 'parse_lambda', lambda f: self._timed(f, 'parse'))
+        for name in ('join_literal', 'join_repr', '_render'):
+            self._patch_function(models.render, name, lambda f: self._timed(f, 'render'))
+        for owner, name in (
+            (TermDB, 'insert_term'), (TermDB, 'insert_many'), (TermDB, 'delete_many'),
+            (HistoryStore, 'insert'), (HistoryStore, 'link')
+        ):
+            self._patch_method(owner, name, lambda f: self._timed(f, 'persist'))
+        # The REPL's terminal writes count as rendering. It usually runs as
+        # __main__, so its interface is looked up rather than imported anew
+        for module in (sys.modules.get('repl'), sys.modules.get('__main__')):
+            if (interface := getattr(module, 'REPLInterface', None)) is not None:
+                self._patch_method(interface, 'flush', lambda f: self._timed(f, 'render'))
+                break
+
+        def traced(original):
+            def reduce(trace, index, term, base_index, **kwargs):
+                with self.phase('reduce'):
+                    reduced = original(trace, index, term, base_index, **kwargs)
+                self.record_step(reduced)
+                return reduced
+            return reduce
+        self._patch_method(ReductionTrace, 'reduce', traced)
+
+    def disable(self) -> None:
+        """Stop instrumenting, restoring every original; counts are kept"""
+        while self._patches:
+            unpatch(self._patches.pop())
+
+    # MARK: Reporting
+    def snapshot(self) -> dict:
+        """Counts, peak term size in distinct nodes and seconds per phase"""
+        return {
+            'enabled': self.enabled,
+            'counts': dict(self.counts),
+            'peak_nodes': self.peak_nodes,
+            'phases': dict(self.times),
+            'elapsed': time.perf_counter() - self.started,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot())
+
+# Process-wide profiler used by the STATS command
+profiler = ReductionProfiler()
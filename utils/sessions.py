@@ -0,0 +1,141 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# utils/sessions.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+from utils.config import load_env
+from utils.history import HistoryStore
+
+load_env()
+
+# Seconds a session may stay untouched before `evict_idle` drops it
+DEFAULT_SESSION_IDLE_TIMEOUT = float(os.getenv('SESSION_IDLE_TIMEOUT', 1800))
+# Upper bound on live sessions; 0 disables the limit
+DEFAULT_MAX_SESSIONS = int(os.getenv('MAX_SESSIONS', 0))
+
+# MARK: SessionRegistry Class
+class SessionRegistry:
+    """Per-session `%n` histories for many users in one process.
+
+    Each session id owns a private HistoryStore, so `%3` in one session never
+    resolves to another session's entry and clearing one history leaves the
+    others alone. Sessions are kept in least-recently-used order; idle ones
+    are dropped by `evict_idle`, and the oldest is dropped when `max_sessions`
+    would be exceeded. `on_evict` is told of every session dropped, however
+    it was dropped, so owners of per-session state can release theirs.
+
+    Example:
+        >>> registry = SessionRegistry()
+        >>> registry.history("alice").insert(1, parse_lambda("x"))
+        >>> 1 in registry.history("bob")
+        False
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = DEFAULT_SESSION_IDLE_TIMEOUT,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        factory: Callable[[], HistoryStore] = HistoryStore,
+        on_evict: Optional[Callable[[str], None]] = None
+    ):
+        """Initializes an empty registry.
+
+        Arguments:
+            idle_timeout (float): Seconds of inactivity before a session is evictable
+            max_sessions (int): Live session limit, 0 for unlimited
+            factory (Callable): Creates the history for a new session
+            on_evict (Callable): Called with the id of each session dropped
+        """
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.factory = factory
+        self.on_evict = on_evict
+        self._histories: OrderedDict[str, HistoryStore] = OrderedDict()
+        self._last_access: dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._histories
+
+    def __len__(self) -> int:
+        return len(self._histories)
+
+    # MARK: Access
+    def history(self, session_id: str) -> HistoryStore:
+        """Return the history of `session_id`, creating it on first use"""
+        with self._lock:
+            history = self._histories.get(session_id)
+            if history is None:
+                history = self._histories[session_id] = self.factory()
+                if self.max_sessions:
+                    while len(self._histories) > self.max_sessions:
+                        self.close(next(iter(self._histories)))
+            self.touch(session_id)
+            return history
+
+    def touch(self, session_id: str) -> None:
+        """Mark `session_id` as active now"""
+        with self._lock:
+            if session_id in self._histories:
+                self._histories.move_to_end(session_id)
+                self._last_access[session_id] = time.monotonic()
+
+    def sessions(self) -> list[str]:
+        """Live session ids, least recently used first"""
+        with self._lock:
+            return list(self._histories)
+
+    # MARK: Eviction
+    def close(self, session_id: str) -> None:
+        """Drop a session and release its history"""
+        with self._lock:
+            history = self._histories.pop(session_id, None)
+            self._last_access.pop(session_id, None)
+        if history is not None:
+            history.close()
+            if self.on_evict is not None:
+                self.on_evict(session_id)
+
+    def evict_idle(self, now: Optional[float] = None) -> list[str]:
+        """Drop every session idle for longer than `idle_timeout`
+
+        Returns:
+            list[str]: The evicted session ids
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [
+                session_id for session_id, last in self._last_access.items()
+                if now - last > self.idle_timeout
+            ]
+            for session_id in idle:
+                self.close(session_id)
+        return idle
+
+    def close_all(self) -> None:
+        """Drop every session"""
+        for session_id in self.sessions():
+            self.close(session_id)
+
+    # MARK: Memory Accounting
+    def usage(self, session_id: Optional[str] = None) -> dict:
+        """Memory figures for one session, or for every session keyed by id
+
+        See `HistoryStore.memory_usage` for the fields; each also carries
+        `idle`, the seconds since the session was last touched.
+        """
+        now = time.monotonic()
+        with self._lock:
+            targets = self.sessions() if session_id is None else [session_id]
+            histories = {sid: (self._histories[sid], self._last_access[sid]) for sid in targets}
+        report = {}
+        for sid, (history, last) in histories.items():
+            report[sid] = history.memory_usage() | {'idle': now - last}
+        return report if session_id is None else report[session_id]
@@ -0,0 +1,156 @@
+# Created by Sean L. on Mar. 28
+#
+# Lambda Calculus Implementation
+# utils/trace.py
+#
+# Makabaka1880, 2025. All rights reserved.
+
+import os
+import threading
+from typing import NamedTuple, Optional
+from utils.config import load_env
+from models.model import Term, Path
+from models.exceptions import ReductionOnNormalForm
+
+load_env()
+
+# Deltas allowed between full checkpoints; bounds the replay cost of a retreat
+DEFAULT_CHECKPOINT_INTERVAL = int(os.getenv('TRACE_CHECKPOINT_INTERVAL', 32))
+
+class TraceEntry(NamedTuple):
+    """One recorded step: a full term, or a patch against an earlier step"""
+    parent: Optional[int]       # None for checkpoints
+    path: Optional[Path]        # Where `term` replaces the parent's subterm
+    term: Term                  # The full term (checkpoint) or the contractum (delta)
+    distance: int               # Deltas since the nearest checkpoint
+
+# MARK: ReductionTrace Class
+class ReductionTrace:
+    """Reduction history stored as path deltas with periodic checkpoints.
+
+    Consecutive reduction steps differ only at the contracted redex, so each
+    step is kept as the redex path plus the contractum instead of a whole
+    term. Every `checkpoint_interval` steps a full term is kept, and
+    reconstructing a step replays at most that many deltas from the nearest
+    checkpoint. Memory grows with the size of each step's change rather than
+    with the size of the whole term.
+
+    Example:
+        >>> trace = ReductionTrace()
+        >>> _ = trace.reduce(1, parse_lambda(r"(\\x. x) (y)"), base_index=0)
+        >>> trace.get(0).literal(), trace.get(1).literal()
+        ('(\\x. x) (y)', 'y')
+    """
+
+    def __init__(self, checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL):
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        self._entries: dict[int, TraceEntry] = {}
+        self._last: Optional[tuple[int, Term]] = None
+        self._lock = threading.RLock()
+
+    def __contains__(self, index: int) -> bool:
+        return index in self._entries
+
+    # MARK: Recording
+    def checkpoint(self, index: int, term: Term) -> None:
+        """Record `term` in full as step `index`"""
+        with self._lock:
+            self._entries[index] = TraceEntry(None, None, term, 0)
+            self._last = (index, term)
+
+    def reduce(self, index: int, term: Term, base_index: int, strategy: str = 'normal') -> Term:
+        """Perform one step of `strategy`, leftmost-outermost by default, on `term` and record it
+
+        Arguments:
+            index (int): Step number to record the result under
+            term (Term): Term to reduce, known to the caller as `base_index`
+            base_index (int): Step number of `term`; it is checkpointed first
+                unless it is the step most recently recorded
+            strategy (str): 'normal' or 'applicative'
+
+        Returns:
+            Term: The reduced term, identical to `reduce_step(term, strategy)`
+
+        Throws:
+            ReductionOnNormalForm: If `term` has no redex
+        """
+        if strategy == 'applicative':
+            from models.reduction import innermost_redex_path
+            path = innermost_redex_path(term)
+        else:
+            path = term.redex_path()
+        if path is None:
+            raise ReductionOnNormalForm(term=term)
+        contractum = term.subterm(path).contract()
+        reduced = term.replace_at(path, contractum)
+
+        with self._lock:
+            if (self._last is None or self._last[0] != base_index or self._last[1] is not term
+                    or base_index not in self._entries):
+                self.checkpoint(base_index, term)
+            distance = self._entries[base_index].distance + 1
+            if distance >= self.checkpoint_interval:
+                self._entries[index] = TraceEntry(None, None, reduced, 0)
+            else:
+                self._entries[index] = TraceEntry(base_index, path, contractum, distance)
+            self._last = (index, reduced)
+        return reduced
+
+    # MARK: Retrieval
+    def get(self, index: int) -> Term:
+        """Reconstruct the term recorded as step `index`, raises IndexError if missing"""
+        with self._lock:
+            if self._last is not None and self._last[0] == index:
+                return self._last[1]
+            if index not in self._entries:
+                raise IndexError(f"Step {index} not found in trace")
+
+            deltas = []
+            entry = self._entries[index]
+            while entry.parent is not None:
+                deltas.append(entry)
+                entry = self._entries[entry.parent]
+
+        term = entry.term
+        for delta in reversed(deltas):
+            term = term.replace_at(delta.path, delta.term)
+        return term
+
+    def pop_segment(self, index: int) -> list[tuple[int, Term]]:
+        """Remove the checkpoint step `index` is rebuilt from, with every step recorded against it
+
+        A segment is a checkpoint and the deltas chained to it, so removing
+        one whole leaves every other step reconstructible.
+
+        Returns:
+            list[tuple[int, Term]]: The removed steps, rebuilt, in step order;
+            empty if `index` is not recorded
+        """
+        with self._lock:
+            if index not in self._entries:
+                return []
+            root = index
+            while (parent := self._entries[root].parent) is not None:
+                root = parent
+            members = {root: self._entries[root].term}
+            for step in sorted(self._entries):
+                entry = self._entries[step]
+                if step > root and entry.parent in members:
+                    members[step] = members[entry.parent].replace_at(entry.path, entry.term)
+            for step in members:
+                del self._entries[step]
+        return sorted(members.items())
+
+    def terms(self) -> list[Term]:
+        """Every term object the trace keeps alive: checkpoints, contracta and the latest step"""
+        with self._lock:
+            terms = [entry.term for entry in self._entries.values()]
+            if self._last is not None:
+                terms.append(self._last[1])
+        return terms
+
+    def clear(self) -> None:
+        """Forget every recorded step"""
+        with self._lock:
+            self._entries.clear()
+            self._last = None